@@ -69,6 +69,7 @@ class ShareFilesRequest(BaseModel):
 class DeleteFilesRequest(BaseModel):
     """删除文件请求"""
     file_ids: List[Dict[str, Any]]
+    folder_id: Optional[str] = None  # 文件所在文件夹ID，提供时用一次列表确认删除结果
 
 # 客户端缓存
 client_cache: Optional[Cloud189Client] = None
@@ -287,7 +288,7 @@ async def delete_files(
     :param client: 天翼云盘客户端
     """
     try:
-        result = await client.delete_files(request.file_ids)
+        result = await client.delete_files(request.file_ids, folder_id=request.folder_id)
         return Response(code=200, message=result["message"], data=result)
     except Cloud189Error as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -84,7 +84,8 @@ class DoubanService:
                 url,
                 params=params,
                 headers=self.headers,
-                retry_times=max_retries
+                retry_times=max_retries,
+                coalesce=True
             )
             if isinstance(response, str):
                 return {}
@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Response, HTTPException
+from contextlib import AsyncExitStack
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from utils.http_client import http_client
 import base64
 from urllib.parse import unquote
@@ -31,32 +34,32 @@ async def proxy_image(url: str):
         if "cdn-telegram.org" not in decoded_url:
             raise HTTPException(status_code=403, detail="仅支持代理Telegram CDN的图片")
 
-        # 确保session已初始化
-        await http_client._ensure_session()
+        # 获取图片，响应体边读边转发，不整体缓存在内存中
+        stack = AsyncExitStack()
+        try:
+            response = await stack.enter_async_context(http_client.stream("GET", decoded_url, timeout=30))
+        except aiohttp.ClientResponseError as e:
+            raise HTTPException(status_code=e.status, detail="获取图片失败")
+
+        async def body():
+            async with stack:
+                async for chunk in response.iter_chunks():
+                    yield chunk
 
-        # 获取图片内容
-        async with http_client._session.get(
-            url=decoded_url,
-            timeout=aiohttp.ClientTimeout(total=30),
-            ssl=False  # 禁用SSL验证
-        ) as response:
-            if response.status != 200:
-                raise HTTPException(status_code=response.status, detail="获取图片失败")
-            
-            # 读取二进制数据
-            content = await response.read()
-            
-            # 获取正确的媒体类型
-            content_type = response.headers.get("content-type", "image/jpeg")
+        headers = {
+            "Cache-Control": "public, max-age=31536000",
+            "Access-Control-Allow-Origin": "*"
+        }
+        # aiohttp 会自动解压 gzip/deflate，压缩过的响应长度与实际转发的字节数不一致
+        if response.content_length is not None and not response.headers.get("content-encoding"):
+            headers["Content-Length"] = str(response.content_length)
 
-        # 返回图片
-        return Response(
-            content=content,
-            media_type=content_type,  # 使用实际的媒体类型
-            headers={
-                "Cache-Control": "public, max-age=31536000",
-                "Access-Control-Allow-Origin": "*"
-            }
+        # 返回图片；客户端提前断开时 body 可能没有执行完，由后台任务关闭上游响应
+        return StreamingResponse(
+            body(),
+            media_type=response.content_type or "image/jpeg",  # 使用实际的媒体类型
+            headers=headers,
+            background=BackgroundTask(stack.aclose)
         )
 
     except HTTPException:
@@ -5,10 +5,11 @@ from models.user import User
 from schemas.response import Response
 from schemas.sysSetting import SysSettingUpdate, TGChannel, TGResourceConfig, ProxyConfig
 from utils.config_manager import config_manager
+from utils.host_policy import host_policies
+from utils import json_codec
 from typing import Dict, Any, List, Optional
 from api.quark import quark_helpers
 from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
-import json
 from datetime import datetime
 import os
 from pathlib import Path
@@ -117,6 +118,46 @@ async def update_system_config(
     updated_config = config_manager.get_config()
     return Response(data=updated_config)
 
+@router.get("/http-policies", response_model=Response[Dict[str, Any]])
+async def get_http_policies(current_user: User = Depends(get_current_user)):
+    """
+    获取各主机的请求策略和实时状态
+
+    返回示例:
+    ```json
+    {
+        "code": 200,
+        "message": "操作成功",
+        "data": {
+            "drive-pc.quark.cn": {
+                "host": "drive-pc.quark.cn",
+                "policy": {"max_concurrency": 10, "rate": 20, "...": "..."},
+                "in_flight": 2,
+                "requests": 135,
+                "failures": 0,
+                "rejected": 0,
+                "throttled": 0,
+                "tokens": 17.5,
+                "circuit": {"state": "closed", "consecutive_failures": 0, "retry_after": 0}
+            }
+        }
+    }
+    ```
+    """
+    return Response(data=host_policies.snapshot())
+
+@router.post("/http-policies/reset", response_model=Response[Dict[str, Any]])
+async def reset_http_policies(
+    host: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    关闭熔断并清空统计
+    :param host: 主机名，为空时重置全部主机
+    """
+    host_policies.reset(host)
+    return Response(data=host_policies.snapshot())
+
 @router.get("/proxy/config", response_model=Response[ProxyConfig])
 async def get_proxy_config(current_user: User = Depends(get_current_user)):
     """
@@ -268,7 +309,7 @@ async def export_tg_channels(
     }
     
     # 将数据转换为JSON字符串
-    json_data = json.dumps(export_data, ensure_ascii=False, indent=2)
+    json_data = json_codec.dumps(export_data, indent=True)
     
     # 创建内存流
     stream = io.BytesIO(json_data.encode('utf-8'))
@@ -299,7 +340,7 @@ async def import_tg_channels(
     try:
         # 读取上传的文件内容
         content = await file.read()
-        channels_data = json.loads(content.decode())
+        channels_data = json_codec.loads(content)
         
         # 获取channels列表
         channels = channels_data.get("channels", [])
@@ -336,7 +377,7 @@ async def import_tg_channels(
             data={"channels": channels}
         )
         
-    except json.JSONDecodeError:
+    except json_codec.JSONDecodeError:
         return Response(
             code=-1,
             message="导入失败：文件格式错误，请上传有效的JSON文件"
@@ -19,6 +19,7 @@ from utils.logger_service import logger_service
 import asyncio
 from contextlib import asynccontextmanager
 from utils.auth_middleware import AuthCodeMiddleware
+from utils import json_codec
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     if route.tags:
@@ -123,6 +124,7 @@ def init_app():
         version=settings.app_config["version"],
         debug=settings.app_config["debug"],
         generate_unique_id_function=custom_generate_unique_id,
+        default_response_class=json_codec.json_response_class(),
         lifespan=lifespan
     )
 
@@ -1,18 +1,19 @@
 # 天翼云盘自动保存任务
+import asyncio
 import re
 from typing import Any, Dict
 from loguru import logger
 from utils import config_manager, logger_service, scheduled_manager
 from utils.cloud189.client import Cloud189Client
-from utils.magic_rename import MagicRename
+from utils.magic_rename import FileNameIndex, MagicRename
+from task.task_context import TaskRunContext
 
 class Cloud189AutoSave:
     client = {}
-    params = {}
-    task = {}
-    task_name = ""
-    need_save_files_global = []
     def __init__(self):
+      # 同一账号下同时处理的目录数
+      folder_concurrency = config_manager.config_manager.get_config().get("scheduler", {}).get("cloud189_folder_concurrency", 3)
+      self.folder_semaphore = asyncio.Semaphore(max(1, int(folder_concurrency)))
       # 创建客户端实例，它会自动从配置文件加载session
       sys_config = config_manager.config_manager.get_config()
       username = sys_config.get("tianyiAccount", "")
@@ -31,61 +32,87 @@ class Cloud189AutoSave:
           sson_cookie=sson_cookie
       )
       
-    async def dir_check_and_save(self, share_info, file_id = '', target_file_id = ''):
-      target_dir = target_file_id or self.params.get("targetDir", "-11")
-      start_magic = self.params.get("startMagic", [])
+    async def dir_check_and_save(self, ctx: TaskRunContext, share_info, file_id = '', target_file_id = ''):
+      """
+      遍历分享目录，待保存文件按目标文件夹归并到 ctx.save_batches
+      同级子文件夹并发处理，单个目录的查询与文件夹创建受账号级并发数限制
+      """
+      async with self.folder_semaphore:
+        sub_dirs = await self._check_dir(ctx, share_info, file_id, target_file_id)
+      if sub_dirs:
+        await asyncio.gather(*(
+          self.dir_check_and_save(ctx, share_info, folder_id, target_folder_id)
+          for folder_id, target_folder_id in sub_dirs
+        ))
+
+    async def _check_dir(self, ctx: TaskRunContext, share_info, file_id = '', target_file_id = ''):
+      """
+      检查单个分享目录：筛选需要保存的文件，批量创建缺失的文件夹
+      :return: 需要继续遍历的子文件夹 [(分享文件夹ID, 目标文件夹ID)]
+      """
+      target_dir = target_file_id or ctx.params.get("targetDir", "-11")
+      start_magic = ctx.params.get("startMagic", [])
       if not isinstance(start_magic, list):
         start_magic = [start_magic] if start_magic else []
-      # 获取分享文件列表
-      filesResponse = await self.client.list_share_files(
-        share_id=share_info["shareId"],
-        file_id= file_id if file_id else share_info["fileId"],
-        share_mode=share_info.get("shareMode", "1"),
-        access_code=share_info.get("accessCode", ""),
-        is_folder=share_info.get("isFolder", "")
+      # 并发获取分享文件列表和目标文件列表
+      filesResponse, target_response = await asyncio.gather(
+        self.client.list_share_files(
+          share_id=share_info["shareId"],
+          file_id= file_id if file_id else share_info["fileId"],
+          share_mode=share_info.get("shareMode", "1"),
+          access_code=share_info.get("accessCode", ""),
+          is_folder=share_info.get("isFolder", "")
+        ),
+        self.client.list_files(target_dir)
       )
         
       files = filesResponse.get("fileListAO", {}).get("fileList", [])
       folders = filesResponse.get("fileListAO", {}).get("folderList", [])
       
       #获取目标文件列表
-      target_response = await self.client.list_files(target_dir)
       target_files = target_response.get("fileListAO", {}).get("fileList", [])
       target_folders = target_response.get("fileListAO", {}).get("folderList", [])
       
       
       # 文件判重
       mr = MagicRename(scheduled_manager.scheduled_manager.get_config().get("magic_regex", {}))
-      mr.set_taskname(self.task_name)
+      mr.set_taskname(ctx.task_name)
       
            # 魔法正则转换
       pattern, replace = mr.magic_regex_conv(
-          self.params.get("pattern", ""), self.params.get("replace", "")
+          ctx.params.get("pattern", ""), ctx.params.get("replace", "")
       )
       logger.info(f"pattern: {pattern}")
       logger.info(f"replace: {replace}")
-      # 文件夹对比 创建文件夹
-      dir_name_list = [dir_file["name"] for dir_file in target_folders]
-      for folder in folders:
-        search_pattern = (
-            self.params.get("search_pattern", "")
+      # 文件夹对比 批量创建缺失的文件夹
+      target_folder_ids = {dir_file["name"]: dir_file["id"] for dir_file in target_folders}
+      search_pattern = ctx.params.get("search_pattern", "")
+      matched_folders = [folder for folder in folders if re.search(search_pattern, folder["name"])]
+      missing_folders = [folder for folder in matched_folders if folder["name"] not in target_folder_ids]
+      if missing_folders:
+        create_results = await asyncio.gather(
+          *(self.client.create_folder(folder["name"], target_dir) for folder in missing_folders),
+          return_exceptions=True
         )
-        if re.search(search_pattern, folder["name"]):
-          if folder["name"] not in dir_name_list:
-            res = await self.client.create_folder(folder["name"], target_dir)
-            if res.get("res_code") == 0:
-              file_id = res.get("id")
-              logger.info(f"创建文件夹: {folder['name']} 成功")
+        for folder, res in zip(missing_folders, create_results):
+          if isinstance(res, dict) and res.get("res_code") == 0:
+            target_folder_ids[folder["name"]] = res.get("id")
+            logger.info(f"创建文件夹: {folder['name']} 成功")
           else:
-            # 使用列表推导式找到匹配的文件夹
-            matching_folder = next((f for f in target_folders if f["name"] == folder["name"]), None)
-            if matching_folder:
-              file_id = matching_folder["id"]
-          logger.info(f"文件夹ID: {file_id}")
-          await self.dir_check_and_save(share_info, folder["id"], file_id)
+            logger.error(f"创建文件夹: {folder['name']} 失败: {res}")
+
+      sub_dirs = []
+      for folder in matched_folders:
+        folder_target_id = target_folder_ids.get(folder["name"])
+        logger.info(f"文件夹ID: {folder_target_id}")
+        if folder_target_id:
+          sub_dirs.append((folder["id"], folder_target_id))
       # 文件
-      dir_name_list = [dir_file["name"] for dir_file in target_files]
+      dir_name_list = FileNameIndex([dir_file["name"] for dir_file in target_files])
       need_save_files = []
+      # 整个分享列表的替换后文件名一次算出
+      file_names = [file["name"] for file in files]
+      renamed = dict(zip(file_names, mr.batch_sub(pattern, replace, file_names)))
       for file in files:
         # 正则文件名匹配  选择那些需要保存的文件
         should_save = True
@@ -94,26 +121,50 @@ class Cloud189AutoSave:
         if (not mr.is_exists(
                     file["name"],
                     dir_name_list,
-                    (self.params.get("ignore_extension")),
+                    (ctx.params.get("ignore_extension")),
                 ) and should_save):
           # 替换后的文件名
-          file_name_re = mr.sub(pattern, replace, file["name"])
+          file_name_re = renamed[file["name"]]
           # 判断替换后的文件名是否存在
           if not mr.is_exists(
               file_name_re,
               dir_name_list,
-              self.params.get("ignore_extension"),
+              ctx.params.get("ignore_extension"),
           ):
               # 视频文件才进行重命名
               if re.search(r'\.(mp4|mkv|avi|rmvb|flv|wmv|mov|m4v)$', file["name"].lower()):
                   file["name_re"] = file_name_re
               need_save_files.append(file)
-              self.need_save_files_global.append(file)
-              
+
+      # 按目标文件夹归并待保存文件，同一目标文件夹下同名文件只保存一次
+      if need_save_files:
+        batch = ctx.save_batches.setdefault(target_dir, [])
+        batch_names = {file["name"] for file in batch}
+        for file in need_save_files:
+          if file["name"] not in batch_names:
+            batch_names.add(file["name"])
+            batch.append(file)
+            ctx.need_save_files_global.append(file)
+      return sub_dirs
+
+    async def save_batches(self, ctx: TaskRunContext, share_info):
+      """文件夹全部创建完成后，并发保存各目标文件夹下归并好的文件"""
+      async def save_with_limit(target_dir, need_save_files):
+        async with self.folder_semaphore:
+          await self._save_batch(share_info, target_dir, need_save_files)
+
+      await asyncio.gather(*(
+        save_with_limit(target_dir, need_save_files)
+        for target_dir, need_save_files in ctx.save_batches.items()
+      ))
+
+    async def _save_batch(self, share_info, target_dir, need_save_files):
+      """保存同一目标文件夹下的文件并按需重命名"""
       #保存文件
       file_ids = [{"fileId": file["id"], "fileName": file["name"], "isFolder": False} for file in need_save_files]
-      if file_ids:
-        await self.client.save_share_files(shareInfo=share_info, file_ids=file_ids, target_folder_id=target_dir)
+      if not file_ids:
+        return
+      await self.client.save_share_files(shareInfo=share_info, file_ids=file_ids, target_folder_id=target_dir)
       
       #重命名文件
       need_rename_files = await self.client.list_files(target_dir)
@@ -132,13 +183,11 @@ class Cloud189AutoSave:
         2. targetDir: 目标文件夹ID，默认为-11
         3. others: 其他参数
         """
+        ctx = TaskRunContext(task)
         try:  
-          self.task = task
-          self.params = task.get("params", {})
-          self.task_name = task.get("name", "")
-          logger_service.info_sync(f"天翼云盘自动转存任务 开始🏃‍➡️: {self.task_name} ({self.task.get('task', '')})")
-          target_dir = self.params.get("targetDir", "-11")
-          share_url = self.params.get("shareUrl")
+          logger_service.info_sync(f"天翼云盘自动转存任务 开始🏃‍➡️: {ctx.task_name} ({ctx.task.get('task', '')})")
+          target_dir = ctx.params.get("targetDir", "-11")
+          share_url = ctx.params.get("shareUrl")
           if not share_url:
               logger.error("缺少必要参数: shareUrl")
               return
@@ -161,7 +210,7 @@ class Cloud189AutoSave:
               updated_task['enabled'] = False
               updated_task["params"] = task.get("params", {}).copy()
               updated_task["params"]["isShareUrlValid"] = False
-              scheduled_manager.scheduled_manager.update_task(self.task_name, updated_task)
+              scheduled_manager.scheduled_manager.update_task(ctx.task_name, updated_task)
               logger.error("无效的分享链接")
               return
           # 获取分享码
@@ -176,7 +225,7 @@ class Cloud189AutoSave:
               updated_task['enabled'] = False
               updated_task["params"] = task.get("params", {}).copy()
               updated_task["params"]["isShareUrlValid"] = False
-              scheduled_manager.scheduled_manager.update_task(self.task_name, updated_task)
+              scheduled_manager.scheduled_manager.update_task(ctx.task_name, updated_task)
               logger.error("获取分享信息失败")
               return
           except Exception as e:
@@ -185,24 +234,24 @@ class Cloud189AutoSave:
             updated_task['enabled'] = False
             updated_task["params"] = task.get("params", {}).copy()
             updated_task["params"]["isShareUrlValid"] = False
-            scheduled_manager.scheduled_manager.update_task(self.task_name, updated_task)
+            scheduled_manager.scheduled_manager.update_task(ctx.task_name, updated_task)
             logger.error(f"获取分享信息失败: {e}")
             return
-          self.need_save_files_global = []
-          await self.dir_check_and_save(share_info, self.params.get("sourceDir", ""))
+          await self.dir_check_and_save(ctx, share_info, ctx.params.get("sourceDir", ""))
+          await self.save_batches(ctx, share_info)
           # 格式化打印需要保存的文件列表
-          if self.need_save_files_global:
-            file_list_str = "\n".join([f"🎬 {file['name']}" + (f"\n   ↳ 将重命名为: {file['name_re']}" if file.get('name_re') else "") for file in self.need_save_files_global])
-            logger_service.info_sync(f"天翼云盘自动转存任务 {self.task_name} ({self.task.get('task', '')}) 保存的文件:\n{file_list_str}")
+          if ctx.need_save_files_global:
+            file_list_str = "\n".join([f"🎬 {file['name']}" + (f"\n   ↳ 将重命名为: {file['name_re']}" if file.get('name_re') else "") for file in ctx.need_save_files_global])
+            logger_service.info_sync(f"天翼云盘自动转存任务 {ctx.task_name} ({ctx.task.get('task', '')}) 保存的文件:\n{file_list_str}")
           else:
-            logger_service.info_sync(f"天翼云盘自动转存任务 {self.task_name} ({self.task.get('task', '')}) 没有需要保存的文件")
-          logger_service.info_sync(f"天翼云盘自动转存任务 结束🏁: {self.task_name} ({self.task.get('task', '')})")
+            logger_service.info_sync(f"天翼云盘自动转存任务 {ctx.task_name} ({ctx.task.get('task', '')}) 没有需要保存的文件")
+          logger_service.info_sync(f"天翼云盘自动转存任务 结束🏁: {ctx.task_name} ({ctx.task.get('task', '')})")
           return {
-            "task_name": f'{self.task_name}',
-            "task": self.task.get("task", ""),
-            "need_save_files": [{"file_name": file["name"], "file_name_re": file.get("name_re")} for file in self.need_save_files_global]
+            "task_name": f'{ctx.task_name}',
+            "task": ctx.task.get("task", ""),
+            "need_save_files": [{"file_name": file["name"], "file_name_re": file.get("name_re")} for file in ctx.need_save_files_global]
           }
         except Exception as e:
-          logger_service.error_sync(f"天翼云盘自动转存任务 异常🚨: {self.task_name} ({self.task.get('task', '')}) {e}")
+          logger_service.error_sync(f"天翼云盘自动转存任务 异常🚨: {ctx.task_name} ({ctx.task.get('task', '')}) {e}")
 
 
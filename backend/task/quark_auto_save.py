@@ -1,48 +1,93 @@
 # 夸克网盘自动保存任务
 import asyncio
+import random
 import re
-from typing import Any, Dict
+from typing import Any, Dict, List
 from loguru import logger
 from utils import config_manager, emby_manager, logger_service, scheduled_manager
-from utils.magic_rename import MagicRename
+from utils.magic_rename import FileNameIndex, MagicRename
+from utils.path_fid_cache import quark_fid_cache
+from utils.rate_limiter import get_token_bucket
 from utils.quark_helper import QuarkHelper
+from task.task_context import TaskRunContext
 
 class QuarkAutoSave:
     helper = None
-    task_name = ""
-    params = {}
-    task = {}
-    savepath_fid = {"/": "0"}
-    need_save_files_global = []
+    SAVED_POLL_INTERVAL = 0.3  # 轮询转存结果的初始间隔（秒）
+    SAVED_POLL_MAX_INTERVAL = 2  # 轮询转存结果的最大间隔（秒）
+    SAVED_POLL_TIMEOUT = 15  # 等待转存文件出现的最长时间（秒）
+    RENAME_MAX_RETRIES = 3  # 重命名被限流时的最大重试次数
+    RENAME_RETRY_INTERVAL = 1  # 重命名被限流后的首次重试间隔（秒）
     
   
     def __init__(self):
+        # 同一账号下同时处理的目录数
+        folder_concurrency = config_manager.config_manager.get_config().get("scheduler", {}).get("quark_folder_concurrency", 3)
+        self.folder_semaphore = asyncio.Semaphore(max(1, int(folder_concurrency)))
         try:
             # 从系统配置中获取 cookie
             sys_config = config_manager.config_manager.get_config()
             cookie = sys_config.get("quarkCookie", "")
             if not cookie:
-                logger.error(f"任务 [{self.task_name}] 未配置夸克网盘 cookie")
+                logger.error("夸克网盘自动转存 未配置夸克网盘 cookie")
                 return
             self.helper= QuarkHelper(cookie)
         except Exception as e:
-            logger.error(f"任务 [{self.task_name}] 夸克网盘helper获取失败: {str(e)}")
+            logger.error(f"夸克网盘自动转存 夸克网盘helper获取失败: {str(e)}")
             return
     
+    async def resolve_dir_fids(self, dir_names: List[str]) -> Dict[str, str]:
+        """
+        批量获取目录fid，优先读取目录缓存，未命中的路径合并为一次 path_list 请求
+        :return: {规范化路径: fid}，不存在的目录不会出现在结果中
+        """
+        paths = list(dict.fromkeys(quark_fid_cache.normalize(dir_name) for dir_name in dir_names))
+        result = {}
+        missing = []
+        for path in paths:
+            fid = quark_fid_cache.get(path)
+            if fid:
+                result[path] = fid
+            else:
+                missing.append(path)
+        if missing:
+            fids = await self.helper.sdk.get_fids(missing)
+            for index, item in enumerate(fids):
+                # 返回结果没有路径时按请求顺序对应
+                if item.get("file_path"):
+                    path = quark_fid_cache.normalize(item["file_path"])
+                else:
+                    path = missing[index] if len(fids) == len(missing) else ""
+                if path in missing and item.get("fid"):
+                    result[path] = item["fid"]
+                    quark_fid_cache.set(path, item["fid"])
+        return result
+
     async def get_dir_fid(self, dir_name: str):
         """获取目录fid"""
-        savepath = re.sub(r"/{2,}", "/", f"/{dir_name}")
-        if not self.savepath_fid.get(savepath):
-            if get_fids := await self.helper.sdk.get_fids([savepath]):
-                self.savepath_fid[savepath] = get_fids[0]["fid"]
-            else:
-                return None
-        to_pdir_fid = self.savepath_fid[savepath]
-        return to_pdir_fid
+        savepath = quark_fid_cache.normalize(dir_name)
+        return (await self.resolve_dir_fids([savepath])).get(savepath)
 
-    async def dir_check_and_save(self, pwd_id, stoken, pdir_fid="", subdir_path=""):
-        target_dir = self.params.get("targetDir", "/")
-        start_magic = self.params.get("startMagic", [])
+    async def dir_check_and_save(self, ctx: TaskRunContext, pwd_id, stoken, pdir_fid="", subdir_path=""):
+        """
+        遍历分享目录，待保存文件按目标目录fid归并到 ctx.save_batches
+        同级子文件夹并发处理，单个目录的查询受账号级并发数限制
+        """
+        async with self.folder_semaphore:
+            sub_dirs = await self._check_dir(ctx, pwd_id, stoken, pdir_fid, subdir_path)
+        if sub_dirs:
+            await asyncio.gather(*(
+                self.dir_check_and_save(ctx, pwd_id, stoken, fid, subdir_path=path)
+                for fid, path in sub_dirs
+            ))
+
+    async def _check_dir(self, ctx: TaskRunContext, pwd_id, stoken, pdir_fid="", subdir_path=""):
+        """
+        检查单个分享目录：筛选需要保存的文件，创建缺失的子文件夹
+        :return: 需要继续遍历的子文件夹 [(分享fid, 相对路径)]
+        """
+        target_dir = ctx.params.get("targetDir", "/")
+        start_magic = ctx.params.get("startMagic", [])
         if not isinstance(start_magic, list):
             start_magic = [start_magic] if start_magic else []
               
@@ -73,15 +118,22 @@ class QuarkAutoSave:
         #   files = file_list.get("data", {}).get("list", [])
 
         # 获取目标文件夹的fid
-        to_pdir_fid = await self.get_dir_fid(f"{target_dir}{subdir_path}")
+        to_pdir_path = f"{target_dir}{subdir_path}"
+        to_pdir_fid = await self.get_dir_fid(to_pdir_path)
         if not to_pdir_fid:
-            logger.error(f"❌ 目录 {target_dir}{subdir_path} fid获取失败，跳过转存")
+            logger.error(f"❌ 目录 {to_pdir_path} fid获取失败，跳过转存")
             return
         logger.info(f"获取目标文件夹fid成功: {to_pdir_fid}")
     
         # 获取目标文件夹中的文件列表，用于查重
         target_files = await self.helper.sdk.get_file_list(to_pdir_fid, recursive=True)
         if target_files.get("code") != 0:
+            # 缓存的fid可能已失效，清除后重新获取一次
+            quark_fid_cache.invalidate(to_pdir_path)
+            to_pdir_fid = await self.get_dir_fid(to_pdir_path)
+            if to_pdir_fid:
+                target_files = await self.helper.sdk.get_file_list(to_pdir_fid, recursive=True)
+        if not to_pdir_fid or target_files.get("code") != 0:
             logger.error(f"获取目标文件夹文件列表失败: {target_files.get('message')}")
             return
 
@@ -92,19 +144,27 @@ class QuarkAutoSave:
 
         # 需要保存的文件
         need_save_files = []
+        # 需要继续遍历的子文件夹
+        sub_dirs = []
         # 文件判重
         mr = MagicRename(scheduled_manager.scheduled_manager.get_config().get("magic_regex", {}))
-        mr.set_taskname(self.task_name)
+        mr.set_taskname(ctx.task_name)
          # 魔法正则转换
         pattern, replace = mr.magic_regex_conv(
-            self.params.get("pattern", ""), self.params.get("replace", "")
+            ctx.params.get("pattern", ""), ctx.params.get("replace", "")
         )
         logger.info(f"pattern: {pattern}")
         logger.info(f"replace: {replace}")
-        dir_name_list = [dir_file["file_name"] for dir_file in target_file_list]
+        dir_name_list = FileNameIndex([dir_file["file_name"] for dir_file in target_file_list])
+        # 整个分享列表的替换后文件名一次算出
+        save_names = [
+            share_file["file_name"] for share_file in files
+            if not share_file["dir"] and re.search(pattern, share_file["file_name"])
+        ]
+        renamed = dict(zip(save_names, mr.batch_sub(pattern, replace, save_names)))
         for share_file in files:
             search_pattern = (
-                self.params.get("search_pattern", "") if share_file["dir"] else pattern
+                ctx.params.get("search_pattern", "") if share_file["dir"] else pattern
             )
             if re.search(search_pattern, share_file["file_name"]):
               if not share_file["dir"]:
@@ -117,29 +177,67 @@ class QuarkAutoSave:
                 if (not mr.is_exists(
                     share_file["file_name"],
                     dir_name_list,
-                    (self.params.get("ignore_extension")),
+                    (ctx.params.get("ignore_extension")),
                 ) and should_save):
                     # 替换后的文件名
-                    file_name_re = mr.sub(pattern, replace, share_file["file_name"])
+                    file_name_re = renamed[share_file["file_name"]]
                     # 判断替换后的文件名是否存在
                     if not mr.is_exists(
                         file_name_re,
                         dir_name_list,
-                        self.params.get("ignore_extension"),
+                        ctx.params.get("ignore_extension"),
                     ):
                                      # 视频文件才进行重命名
                         if re.search(r'\.(mp4|mkv|avi|rmvb|flv|wmv|mov|m4v)$', share_file["file_name"].lower()):
                             share_file["file_name_re"] = file_name_re
                         need_save_files.append(share_file)
-                        self.need_save_files_global.append(share_file)
               else:
                 # 文件夹
-                # 创建文件夹
-                # 判断文件夹存不存在
-                to_pdir_fid2 = await self.get_dir_fid(f"{target_dir}{subdir_path}/{share_file['file_name']}")
-                if not to_pdir_fid2:
-                  await self.helper.sdk.create_folder(share_file["file_name"], to_pdir_fid)
-                await self.dir_check_and_save(pwd_id, stoken, share_file["fid"],subdir_path= f"{subdir_path}/{share_file['file_name']}")        
+                sub_dirs.append((share_file["fid"], f"{subdir_path}/{share_file['file_name']}"))
+
+        # 批量判断文件夹存不存在，创建缺失的文件夹
+        if sub_dirs:
+            sub_dir_paths = [f"{target_dir}{path}" for _, path in sub_dirs]
+            exists_fids = await self.resolve_dir_fids(sub_dir_paths)
+            missing = [path for path in sub_dir_paths if quark_fid_cache.normalize(path) not in exists_fids]
+            if missing:
+                create_results = await asyncio.gather(
+                    *(self.helper.sdk.create_folder(path.rsplit("/", 1)[-1], to_pdir_fid) for path in missing),
+                    return_exceptions=True
+                )
+                for path, res in zip(missing, create_results):
+                    if isinstance(res, dict) and res.get("code") == 0:
+                        quark_fid_cache.set(path, res.get("data", {}).get("fid"))
+                    else:
+                        logger.error(f"创建文件夹 {path} 失败: {res}")
+
+        # 按目标目录归并待保存文件，同一目标目录下同名文件只保存一次
+        if need_save_files:
+            batch = ctx.save_batches.setdefault(to_pdir_fid, [])
+            batch_names = {file["file_name"] for file in batch}
+            for share_file in need_save_files:
+                if share_file["file_name"] not in batch_names:
+                    batch_names.add(share_file["file_name"])
+                    batch.append(share_file)
+                    ctx.need_save_files_global.append(share_file)
+        return sub_dirs
+
+    async def save_batches(self, ctx: TaskRunContext, pwd_id, stoken):
+        """并发保存各目标目录下归并好的文件"""
+        async def save_with_limit(to_pdir_fid, need_save_files):
+            async with self.folder_semaphore:
+                await self._save_batch(ctx, pwd_id, stoken, to_pdir_fid, need_save_files)
+
+        if not ctx.save_batches:
+            logger.info("没有需要保存的文件")
+            return
+        await asyncio.gather(*(
+            save_with_limit(to_pdir_fid, need_save_files)
+            for to_pdir_fid, need_save_files in ctx.save_batches.items()
+        ))
+
+    async def _save_batch(self, ctx: TaskRunContext, pwd_id, stoken, to_pdir_fid, need_save_files):
+        """保存同一目标目录下的文件并按需重命名"""
         # 保存文件
         if need_save_files:
             logger.info(f"开始保存 {len(need_save_files)} 个文件到目录")
@@ -162,44 +260,108 @@ class QuarkAutoSave:
             task_status = await self.helper.sdk.get_task_status(task_id)
                 
             if task_status.get("code") == 0:
-              await asyncio.sleep(5)
-              # #重新获取文件列表
-              re_target_files = await self.helper.sdk.get_file_list(to_pdir_fid)
-              if re_target_files.get("code") != 0:
-                logger.error(f"获取目标文件夹文件列表失败: {re_target_files.get('message')}")
+              saved_fids = await self._get_saved_fids(task_status, to_pdir_fid, need_save_files)
+              if saved_fids is None:
                 return
-
-              re_target_file_list = re_target_files.get("data", {}).get("list", [])
-              for file in need_save_files:
-                saved_fid = next((f for f in re_target_file_list if f["file_name"]==file["file_name"]), None)
-                logger.info(f"saved_fid: {saved_fid}")
-                try:
-                  # 如果需要重命名
-                  if file.get("file_name_re") and file["file_name_re"] != file["file_name"]:
-                    # 执行重命名
-                    rename_result = await self.helper.sdk.rename_file(
-                      saved_fid['fid'],
-                      file["file_name_re"]
-                    )
-                    # 为了防止封控 间隔0.5秒
-                    await asyncio.sleep(0.5)
-                    if rename_result.get("code") != 0:
-                      logger.error(f"文件 {file['file_name']} 重命名失败: {rename_result.get('message')}")
-                      continue
-
-                    logger.success(f"文件 {file['file_name']} 已保存并重命名为 {file['file_name_re']}")
-                  else:
-                    logger.success(f"文件 {file['file_name']} 保存成功")
-        
-                except Exception as e:
-                  logger.error(f"处理文件 {file['file_name']} 时发生错误: {str(e)}")
-                  continue
+              ctx.rename_results.extend(await self._rename_saved_files(saved_fids, need_save_files))
             else:
               logger.error(f"任务 {task_id} 获取失败: {task_status.get('message')}")
               return
         else:
           logger.info("没有需要保存的文件")        
 
+    async def _get_saved_fids(self, task_status, to_pdir_fid, need_save_files):
+        """
+        获取转存后文件的fid {原文件名: fid}
+        优先使用任务结果中按提交顺序返回的 save_as_top_fids，
+        否则按递增间隔轮询目标目录，直到文件全部出现或超时
+        """
+        save_as = task_status.get("data", {}).get("save_as", {}) or {}
+        top_fids = save_as.get("save_as_top_fids") or []
+        if len(top_fids) == len(need_save_files):
+            return {file["file_name"]: fid for file, fid in zip(need_save_files, top_fids)}
+
+        pending = {file["file_name"] for file in need_save_files}
+        saved_fids = {}
+        delay = self.SAVED_POLL_INTERVAL
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.SAVED_POLL_TIMEOUT
+        while True:
+            re_target_files = await self.helper.sdk.get_file_list(to_pdir_fid)
+            if re_target_files.get("code") != 0:
+                logger.error(f"获取目标文件夹文件列表失败: {re_target_files.get('message')}")
+                return None
+            for f in re_target_files.get("data", {}).get("list", []):
+                if f["file_name"] in pending:
+                    saved_fids[f["file_name"]] = f["fid"]
+            pending.difference_update(saved_fids)
+            if not pending or loop.time() + delay > deadline:
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.SAVED_POLL_MAX_INTERVAL)
+        if pending:
+            logger.warning(f"等待转存文件出现超时，未找到: {', '.join(sorted(pending))}")
+        return saved_fids
+
+    def _rename_limiter(self):
+        """同一账号的所有任务共用一个重命名限流器，quark_rename_rate 为 0 时不限流"""
+        rate = config_manager.config_manager.get_config().get("scheduler", {}).get("quark_rename_rate", 5)
+        if not rate or float(rate) <= 0:
+            return None
+        account = quark_fid_cache.account_key(self.helper.sdk.cookie)
+        return get_token_bucket(f"quark_rename:{account}", rate)
+
+    @staticmethod
+    def _is_throttled(result: Dict[str, Any]) -> bool:
+        """判断是否被服务端限流"""
+        message = str(result.get("message", ""))
+        return result.get("status") == 429 or result.get("code") == 429 or "频繁" in message
+
+    async def _rename_saved_files(self, saved_fids: Dict[str, str], need_save_files: List[Dict[str, Any]]):
+        """
+        并发重命名转存后的文件，请求经账号级令牌桶限流，被限流时退避重试
+        :param saved_fids: 转存结果 {原文件名: fid}
+        :return: 每个文件的处理结果
+        """
+        limiter = self._rename_limiter()
+
+        async def rename_one(file):
+            outcome = {"file_name": file["file_name"], "file_name_re": file.get("file_name_re", ""), "status": "saved", "message": ""}
+            if not file.get("file_name_re") or file["file_name_re"] == file["file_name"]:
+                logger.success(f"文件 {file['file_name']} 保存成功")
+                return outcome
+            saved_fid = saved_fids.get(file["file_name"])
+            logger.info(f"saved_fid: {saved_fid}")
+            if not saved_fid:
+                outcome.update(status="failed", message="未找到转存结果")
+                logger.error(f"文件 {file['file_name']} 未找到转存结果，跳过重命名")
+                return outcome
+            delay = self.RENAME_RETRY_INTERVAL
+            for attempt in range(self.RENAME_MAX_RETRIES + 1):
+                if limiter:
+                    await limiter.acquire()
+                try:
+                    rename_result = await self.helper.sdk.rename_file(saved_fid, file["file_name_re"])
+                except Exception as e:
+                    rename_result = {"code": 1, "message": str(e)}
+                if rename_result.get("code") == 0:
+                    outcome.update(status="renamed", message="")
+                    logger.success(f"文件 {file['file_name']} 已保存并重命名为 {file['file_name_re']}")
+                    return outcome
+                outcome.update(status="failed", message=rename_result.get("message", ""))
+                if not self._is_throttled(rename_result) or attempt == self.RENAME_MAX_RETRIES:
+                    break
+                # 被限流 让同账号的其他请求一起放慢
+                if limiter:
+                    limiter.drain()
+                logger.warning(f"文件 {file['file_name']} 重命名被限流，{delay:.1f} 秒后重试")
+                await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+                delay *= 2
+            logger.error(f"文件 {file['file_name']} 重命名失败: {outcome['message']}")
+            return outcome
+
+        return await asyncio.gather(*(rename_one(file) for file in need_save_files))
+
     async def quark_auto_save(self, task: Dict[str, Any]):
         """夸克网盘自动保存任务
         参数:
@@ -207,33 +369,26 @@ class QuarkAutoSave:
         2. targetDir: 目标文件夹ID，默认为根目录
         3. sourcePath: 源路径，默认为根目录
         """
+        ctx = TaskRunContext(task)
         try:
-          self.task = task
-          self.params = task.get("params", {})
-          self.task_name = task.get("name", "")
-          logger_service.info_sync(f"夸克网盘自动转存任务 开始🏃‍➡️: {self.task_name} ({self.task.get('task', '')})") 
-          share_url = self.params.get("shareUrl")
-          target_dir = self.params.get("targetDir", "/")
-          isShareUrlValid = self.params.get("isShareUrlValid", True)
+          logger_service.info_sync(f"夸克网盘自动转存任务 开始🏃‍➡️: {ctx.task_name} ({ctx.task.get('task', '')})") 
+          share_url = ctx.params.get("shareUrl")
+          target_dir = ctx.params.get("targetDir", "/")
+          isShareUrlValid = ctx.params.get("isShareUrlValid", True)
           
           # 验证cookie 是否有效
           if not await self.helper.init():
-            logger.error(f"任务 [{self.task_name}] 夸克网盘初始化失败，请检查 cookie 是否有效")
-            logger_service.error_sync(f"任务 [{self.task_name}] 夸克网盘初始化失败，请检查 cookie 是否有效")
+            logger.error(f"任务 [{ctx.task_name}] 夸克网盘初始化失败，请检查 cookie 是否有效")
+            logger_service.error_sync(f"任务 [{ctx.task_name}] 夸克网盘初始化失败，请检查 cookie 是否有效")
             return
           if not isShareUrlValid:
-              logger.error(f"任务 [{self.task_name}] 分享链接无效: {share_url} 跳过执行")
+              logger.error(f"任务 [{ctx.task_name}] 分享链接无效: {share_url} 跳过执行")
               return
           if not share_url:
-              logger.error(f"任务 [{self.task_name}] 缺少必要参数: shareUrl")
+              logger.error(f"任务 [{ctx.task_name}] 缺少必要参数: shareUrl")
               return
           if not target_dir:
-              logger.error(f"任务 [{self.task_name}] 缺少必要参数: targetDir")
-              return
-
-          ## 验证cookie是否有效
-          if not await self.helper.init():
-              logger.error(f"任务 [{self.task_name}] 夸克网盘初始化失败，请检查 cookie 是否有效")
+              logger.error(f"任务 [{ctx.task_name}] 缺少必要参数: targetDir")
               return
           # 获取分享信息 看看分享链接是否有效
           # 解析分享链接
@@ -245,7 +400,7 @@ class QuarkAutoSave:
              updated_task['enabled'] = False
              updated_task["params"] = task.get("params", {}).copy()
              updated_task["params"]["isShareUrlValid"] = False
-             scheduled_manager.scheduled_manager.update_task(self.task_name, updated_task)
+             scheduled_manager.scheduled_manager.update_task(ctx.task_name, updated_task)
              return
           # 获取分享信息
           try:
@@ -260,7 +415,7 @@ class QuarkAutoSave:
               updated_task['enabled'] = False
               updated_task["params"] = task.get("params", {}).copy()
               updated_task["params"]["isShareUrlValid"] = False
-              scheduled_manager.scheduled_manager.update_task(self.task_name, updated_task)
+              scheduled_manager.scheduled_manager.update_task(ctx.task_name, updated_task)
               return
           except Exception as e:
             logger.error(f"获取分享信息失败: {e}")
@@ -269,7 +424,7 @@ class QuarkAutoSave:
             updated_task['enabled'] = False
             updated_task["params"] = task.get("params", {}).copy()
             updated_task["params"]["isShareUrlValid"] = False
-            scheduled_manager.scheduled_manager.update_task(self.task_name, updated_task)
+            scheduled_manager.scheduled_manager.update_task(ctx.task_name, updated_task)
             return
           # 获取分享文件列表
           token = share_response.get("data", {}).get("stoken")
@@ -277,19 +432,25 @@ class QuarkAutoSave:
               logger.error(f"获取分享token失败: {share_response}")
               return
 
-          await self.dir_check_and_save(share_info["share_id"], token,share_info['dir_id'])
+          # 目录缓存按账号区分
+          quark_fid_cache.bind_account(quark_fid_cache.account_key(self.helper.sdk.cookie))
+          await self.dir_check_and_save(ctx, share_info["share_id"], token,share_info['dir_id'])
+          await self.save_batches(ctx, share_info["share_id"], token)
             # 格式化打印需要保存的文件列表
-          if self.need_save_files_global:
-            file_list_str = "\n".join([f"🎬 {file['file_name']}" + (f"\n   ↳ 将重命名为: {file['file_name_re']}" if file.get('file_name_re') else "") for file in self.need_save_files_global])
-            logger_service.info_sync(f"夸克网盘自动转存任务 {self.task_name} ({self.task.get('task', '')}) 保存的文件:\n{file_list_str}")
+          if ctx.need_save_files_global:
+            file_list_str = "\n".join([f"🎬 {file['file_name']}" + (f"\n   ↳ 将重命名为: {file['file_name_re']}" if file.get('file_name_re') else "") for file in ctx.need_save_files_global])
+            logger_service.info_sync(f"夸克网盘自动转存任务 {ctx.task_name} ({ctx.task.get('task', '')}) 保存的文件:\n{file_list_str}")
           else:
-            logger_service.info_sync(f"夸克网盘自动转存任务 {self.task_name} ({self.task.get('task', '')}) 没有需要保存的文件")
-          logger_service.info_sync(f"夸克网盘自动转存任务 结束🏁: {self.task_name} ({self.task.get('task', '')})")
+            logger_service.info_sync(f"夸克网盘自动转存任务 {ctx.task_name} ({ctx.task.get('task', '')}) 没有需要保存的文件")
+          logger_service.info_sync(f"夸克网盘自动转存任务 结束🏁: {ctx.task_name} ({ctx.task.get('task', '')})")
           return {
-            "task_name": f'{self.task_name}',
-            "task": self.task.get("task", ""),
-            "need_save_files": self.need_save_files_global
+            "task_name": f'{ctx.task_name}',
+            "task": ctx.task.get("task", ""),
+            "need_save_files": ctx.need_save_files_global,
+            "rename_results": ctx.rename_results
           }
         except Exception as e:
-          logger_service.error_sync(f"夸克网盘自动转存任务 异常🚨: {self.task_name} ({self.task.get('task', '')}) {e}")
+          logger_service.error_sync(f"夸克网盘自动转存任务 异常🚨: {ctx.task_name} ({ctx.task.get('task', '')}) {e}")
+        finally:
+          quark_fid_cache.flush()
 
@@ -0,0 +1,22 @@
+# 自动转存任务的单次执行上下文
+from typing import Any, Dict, List
+
+
+class TaskRunContext:
+    """单次任务执行上下文
+
+    保存一次任务执行过程中的全部可变状态，任务处理器实例只持有可共享的客户端，
+    从而允许同一处理器并发执行多个任务。
+    """
+
+    def __init__(self, task: Dict[str, Any]):
+        self.task = task
+        self.params: Dict[str, Any] = task.get("params", {})
+        self.task_name: str = task.get("name", "")
+        self.task_type: str = task.get("task", "")
+        # 本次执行需要保存的全部文件
+        self.need_save_files_global: List[Dict[str, Any]] = []
+        # 按目标目录归并的待保存文件 {目标目录ID: [文件]}
+        self.save_batches: Dict[str, List[Dict[str, Any]]] = {}
+        # 转存后每个文件的重命名结果
+        self.rename_results: List[Dict[str, Any]] = []
@@ -0,0 +1,152 @@
+"""
+JSON 编解码基准测试
+
+在 backend 目录下运行:
+    python -m tests.benchmarks.bench_json_codec
+    python -m tests.benchmarks.bench_json_codec --sizes 1000,10000 --repeat 5 --output bench.json
+
+生成与夸克网盘 /file/sort、天翼云盘 listFiles 结构相同的大列表响应，
+对比标准库 json 与 utils.json_codec（安装 orjson 时走 orjson）的解析、序列化耗时。
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from utils import json_codec
+
+DEFAULT_SIZES = [1000, 10000, 50000]
+
+NAMES = ["繁花", "庆余年", "漫长的季节", "The Bear", "Breaking Bad", "奔跑吧", "乘风破浪", "向往的生活"]
+EXTS = [".mp4", ".mkv", ".ass", ".nfo"]
+
+
+def make_quark_listing(size: int, rng: random.Random) -> Dict[str, Any]:
+    """夸克网盘 /file/sort 响应"""
+    files = []
+    for n in range(size):
+        is_dir = n % 20 == 0
+        files.append({
+            "fid": f"{rng.getrandbits(128):032x}",
+            "file_name": f"{rng.choice(NAMES)}.S01E{n % 99 + 1:02d}{'' if is_dir else rng.choice(EXTS)}",
+            "pdir_fid": f"{rng.getrandbits(128):032x}",
+            "category": 0 if is_dir else 1,
+            "file_type": 0 if is_dir else 1,
+            "size": 0 if is_dir else rng.randint(1 << 20, 1 << 32),
+            "format_type": "" if is_dir else "video/mp4",
+            "status": 1,
+            "dir": is_dir,
+            "file": not is_dir,
+            "created_at": 1700000000000 + n,
+            "updated_at": 1700000000000 + n,
+            "l_created_at": 1700000000000 + n,
+            "l_updated_at": 1700000000000 + n,
+            "share_fid_token": f"{rng.getrandbits(64):016x}",
+            "tags": "",
+        })
+    return {
+        "status": 200,
+        "code": 0,
+        "message": "ok",
+        "data": {"list": files},
+        "metadata": {"_size": size, "_page": 1, "_count": size, "_total": size},
+    }
+
+
+def make_cloud189_listing(size: int, rng: random.Random) -> Dict[str, Any]:
+    """天翼云盘 listFiles 响应"""
+    folders = [
+        {"id": str(rng.randint(10 ** 15, 10 ** 16)), "name": f"{rng.choice(NAMES)} 第{n + 1}季",
+         "parentId": -11, "createDate": "2024-01-01 00:00:00", "lastOpTime": "2024-01-01 00:00:00",
+         "fileCount": 0, "fileListSize": 0, "rev": "20240101000000"}
+        for n in range(size // 20)
+    ]
+    files = [
+        {"id": str(rng.randint(10 ** 15, 10 ** 16)), "name": f"{rng.choice(NAMES)} 第{n % 99 + 1:02d}集{rng.choice(EXTS)}",
+         "size": rng.randint(1 << 20, 1 << 32), "md5": f"{rng.getrandbits(128):032X}", "mediaType": 3,
+         "createDate": "2024-01-01 00:00:00", "lastOpTime": "2024-01-01 00:00:00", "rev": "20240101000000",
+         "starLabel": 2, "icon": {"smallUrl": "", "largeUrl": ""}}
+        for n in range(size - len(folders))
+    ]
+    return {
+        "res_code": 0,
+        "res_message": "成功",
+        "fileListAO": {"count": size, "fileList": files, "folderList": folders, "fileListSize": size},
+        "lastRev": 20240101000000,
+    }
+
+
+def timeit(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """多次运行取统计值（秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+    }
+
+
+def bench_size(size: int, repeat: int) -> List[Dict[str, Any]]:
+    """对一种规模运行全部用例"""
+    rng = random.Random(size)
+    results = []
+
+    def record(case: str, payload: str, body_bytes: int, func: Callable[[], Any]):
+        stats = timeit(func, repeat)
+        results.append({
+            "case": case,
+            "payload": payload,
+            "size": size,
+            "body_kb": round(body_bytes / 1024, 1),
+            **{k: round(v, 6) for k, v in stats.items()},
+        })
+
+    for payload, data in (("quark", make_quark_listing(size, rng)), ("cloud189", make_cloud189_listing(size, rng))):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        record("loads_stdlib", payload, len(body), lambda: json.loads(body.decode("utf-8")))
+        record("loads_codec", payload, len(body), lambda: json_codec.loads(body))
+        record("dumps_stdlib", payload, len(body), lambda: json.dumps(data, ensure_ascii=False))
+        record("dumps_codec", payload, len(body), lambda: json_codec.dumps(data))
+    return results
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="JSON 编解码基准测试")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="逗号分隔的列表条目数")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例重复次数")
+    parser.add_argument("--output", default="", help="JSON 输出文件，默认打印到标准输出")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = {
+        "benchmark": "json_codec",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "backend": json_codec.BACKEND,
+        "repeat": args.repeat,
+        "results": [],
+    }
+    for size in sizes:
+        report["results"].extend(bench_size(size, args.repeat))
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+MagicRename 重命名与查重热点路径基准测试
+
+在 backend 目录下运行:
+    python -m tests.benchmarks.bench_magic_rename
+    python -m tests.benchmarks.bench_magic_rename --sizes 1000,10000 --repeat 5 --output bench.json
+
+使用 ScheduledManager 默认配置中的 $TV、$TV_PRO、$SHOW_PRO、$BLACK_WORD 预设，
+对合成的分享列表和目标目录列表计时，结果以 JSON 输出，便于对比回归。
+默认规模包含 50000 条，用于观察 sort_file_list_numbering 在五万个文件名时的耗时。
+"""
+import argparse
+import copy
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from utils.magic_rename import FileNameIndex, MagicRename
+from utils.scheduled_manager import ScheduledManager
+
+PRESETS = ["$TV", "$TV_PRO", "$SHOW_PRO", "$BLACK_WORD"]
+DEFAULT_SIZES = [1000, 10000, 50000, 100000]
+
+SHOW_NAMES = ["繁花", "庆余年", "漫长的季节", "The Bear", "Breaking Bad", "奔跑吧", "乘风破浪", "向往的生活"]
+TAGS = ["", "加更", "纯享", "抢先看", "预告", "超前企划", "花絮"]
+QUALITIES = ["1080p", "2160p", "4K", "HDR", "WEB-DL", "中字", "国语"]
+EXTS = [".mp4", ".mkv", ".mp4", ".mkv", ".ass", ".nfo"]
+
+
+def make_file_name(rng: random.Random, n: int) -> str:
+    """生成一个常见格式的剧集/综艺文件名"""
+    show = rng.choice(SHOW_NAMES)
+    season = rng.randint(1, 12)
+    episode = n % 999 + 1
+    ext = rng.choice(EXTS)
+    style = rng.randrange(6)
+    if style == 0:
+        return f"{show}.S{season:02d}E{episode:02d}.{rng.choice(QUALITIES)}{ext}"
+    if style == 1:
+        return f"[字幕组] {show} 第{episode:02d}集 [{rng.choice(QUALITIES)}]{ext}"
+    if style == 2:
+        part = rng.choice(["上", "中", "下", ""])
+        return f"{show} 第{episode}期{part}{rng.choice(TAGS)} {rng.randint(2018, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}{ext}"
+    if style == 3:
+        return f"{show} EP{episode:03d} {rng.choice(QUALITIES)}{ext}"
+    if style == 4:
+        return f"{rng.randint(2018, 2025)}.{rng.randint(1, 12):02d}.{rng.randint(1, 28):02d} {show} 第{episode}期{rng.choice(TAGS)}{ext}"
+    return f"{episode:02d}{ext}"
+
+
+def make_listings(size: int, seed: int = 0) -> Dict[str, Any]:
+    """生成分享文件列表和目标目录文件名列表，目标目录约一半与分享文件重名"""
+    rng = random.Random(seed + size)
+    share_names = [make_file_name(rng, n) for n in range(size)]
+    target_names = rng.sample(share_names, size // 2) + [make_file_name(rng, size + n) for n in range(size // 2)]
+    return {"share_names": share_names, "target_names": target_names}
+
+
+def timeit(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """多次运行取统计值（秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "max": max(samples),
+    }
+
+
+def bench_size(size: int, repeat: int) -> List[Dict[str, Any]]:
+    """对一种规模运行全部用例"""
+    magic_regex = ScheduledManager._default_config["magic_regex"]
+    listings = make_listings(size)
+    share_names = listings["share_names"]
+    target_names = listings["target_names"]
+    results = []
+
+    def record(case: str, preset: str, func: Callable[[], Any]):
+        stats = timeit(func, repeat)
+        results.append({
+            "case": case,
+            "preset": preset,
+            "size": size,
+            **{k: round(v, 6) for k, v in stats.items()},
+            "per_item_us": round(stats["median"] / max(size, 1) * 1e6, 3),
+        })
+
+    for preset in PRESETS:
+        def run_conv():
+            mr = MagicRename(magic_regex)
+            for _ in range(size):
+                mr.magic_regex_conv(preset, "")
+        record("magic_regex_conv", preset, run_conv)
+
+        mr = MagicRename(magic_regex)
+        mr.set_taskname("基准测试")
+        pattern, replace = mr.magic_regex_conv(preset, "")
+
+        def run_sub():
+            m = MagicRename(magic_regex)
+            m.set_taskname("基准测试")
+            for name in share_names:
+                m.sub(pattern, replace, name)
+        record("sub", preset, run_sub)
+
+        def run_batch_sub():
+            m = MagicRename(magic_regex)
+            m.set_taskname("基准测试")
+            m.batch_sub(pattern, replace, share_names)
+        record("batch_sub", preset, run_batch_sub)
+
+    for ignore_ext in (False, True):
+        def run_is_exists():
+            mr = MagicRename(magic_regex)
+            index = FileNameIndex(target_names)
+            for name in share_names:
+                mr.is_exists(name, index, ignore_ext)
+        record("is_exists_ignore_ext" if ignore_ext else "is_exists", "", run_is_exists)
+
+    start_magic = [
+        {"type": "{E}", "symbol": ">", "value": 10},
+        {"type": "{YEAR}", "symbol": ">", "value": 2019},
+    ]
+
+    def run_start_magic():
+        mr = MagicRename(magic_regex)
+        for name in share_names:
+            mr.start_magic_is_save(start_magic, name)
+    record("start_magic_is_save", "", run_start_magic)
+
+    # {I+} 编号：目标目录已有 1/3 编号文件
+    show_replace = magic_regex["$SHOW_PRO"]["replace"]
+    dir_files = [
+        {"file_name": f"{n:02d}.基准测试.2024010{n % 9 + 1}.第{n}期.mp4", "dir": False}
+        for n in range(1, size // 3 + 1)
+    ]
+
+    def run_set_dir_file_list():
+        MagicRename(magic_regex).set_dir_file_list(dir_files, show_replace)
+    record("set_dir_file_list", "$SHOW_PRO", run_set_dir_file_list)
+
+    mr = MagicRename(magic_regex)
+    mr.set_taskname("基准测试")
+    show_pattern, _ = mr.magic_regex_conv("$SHOW_PRO", "")
+    base_file_list = [
+        {"file_name": name, "file_name_re": file_name_re, "dir": False}
+        for name, file_name_re in zip(share_names, mr.batch_sub(show_pattern, show_replace, share_names))
+    ]
+
+    def run_sort_file_list():
+        m = MagicRename(magic_regex)
+        m.set_dir_file_list(dir_files, show_replace)
+        m.sort_file_list(copy.deepcopy(base_file_list))
+    record("sort_file_list", "$SHOW_PRO", run_sort_file_list)
+
+    # {IIIII} 编号：每个文件名都不同，目录中已有约 1/10 的编号
+    rng = random.Random(size)
+    numbering_files = [
+        {"file_name": f"raw_{n}.mp4", "file_name_re": f"第{n:05d}期{rng.choice('上中下')}.{{IIIII}}.mp4", "dir": False}
+        for n in range(size)
+    ]
+    numbering_dir = {n * 3: f"第{n * 3:05d}期花絮.{{IIIII}}.mp4" for n in range(1, size // 10)}
+
+    def run_sort_file_list_numbering():
+        MagicRename().sort_file_list(copy.deepcopy(numbering_files), dict(numbering_dir))
+    record("sort_file_list_numbering", "{IIIII}", run_sort_file_list_numbering)
+
+    return results
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="MagicRename 基准测试")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="逗号分隔的列表规模")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例重复次数")
+    parser.add_argument("--output", default="", help="JSON 输出文件，默认打印到标准输出")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = {
+        "benchmark": "magic_rename",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": [],
+    }
+    for size in sizes:
+        report["results"].extend(bench_size(size, args.repeat))
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,543 @@
+"""
+夸克网盘 / 天翼云盘本地模拟服务
+
+实现 QuarkSDK 和 Cloud189Client 自动转存流程用到的接口，数据保存在内存中，
+可配置响应延迟、分页大小、错误率和限流，用于在不访问真实网盘的情况下做端到端压测。
+
+单独启动:
+    python -m tests.benchmarks.fake_drive_server --port 8189 --latency 0.05
+
+客户端指向模拟服务:
+    QuarkSDK.BASE_URL = QuarkSDK.BASE_URL_APP = QuarkSDK.ACCOUNT_URL = <服务地址>
+    utils.cloud189.client.WEB_URL = <服务地址>
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+QUARK_ROOT = "0"
+CLOUD189_ROOT = "-11"
+
+
+class FakeDriveConfig:
+    """模拟服务配置"""
+
+    def __init__(
+        self,
+        latency: float = 0.02,
+        latency_jitter: float = 0.01,
+        max_page_size: int = 100,
+        error_rate: float = 0.0,
+        throttle_rps: float = 0.0,
+        task_delay: float = 0.3,
+        folders_per_share: int = 3,
+        files_per_folder: int = 20,
+        seed: int = 0,
+    ):
+        """
+        :param latency: 每个请求的基础延迟（秒）
+        :param latency_jitter: 延迟随机抖动上限（秒）
+        :param max_page_size: 列表接口单页最大条目数
+        :param error_rate: 随机返回业务错误的概率
+        :param throttle_rps: 每个网盘每秒允许的请求数，超出返回限流错误，0 为不限流
+        :param task_delay: 转存/删除任务完成耗时（秒）
+        :param folders_per_share: 每个分享的子文件夹数
+        :param files_per_folder: 分享根目录及每个子文件夹的文件数
+        :param seed: 随机种子
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.max_page_size = max_page_size
+        self.error_rate = error_rate
+        self.throttle_rps = throttle_rps
+        self.task_delay = task_delay
+        self.folders_per_share = folders_per_share
+        self.files_per_folder = files_per_folder
+        self.seed = seed
+
+
+class FileTree:
+    """内存中的文件树"""
+
+    def __init__(self, root_id: str, id_prefix: str):
+        self._ids = itertools.count(1)
+        self.id_prefix = id_prefix
+        self.nodes: Dict[str, Dict[str, Any]] = {
+            root_id: {"id": root_id, "name": "", "dir": True, "parent": None, "children": [], "updated_at": 0}
+        }
+        self.root_id = root_id
+
+    def new_id(self) -> str:
+        return f"{self.id_prefix}{next(self._ids):08d}"
+
+    def add(self, parent_id: str, name: str, is_dir: bool, **extra) -> Dict[str, Any]:
+        node = {
+            "id": self.new_id(), "name": name, "dir": is_dir, "parent": parent_id,
+            "children": [], "updated_at": int(time.time() * 1000), **extra
+        }
+        self.nodes[node["id"]] = node
+        self.nodes[parent_id]["children"].append(node["id"])
+        return node
+
+    def children(self, node_id: str) -> List[Dict[str, Any]]:
+        node = self.nodes.get(node_id)
+        if not node:
+            return []
+        # 文件夹在前，与服务端排序一致
+        items = [self.nodes[c] for c in node["children"]]
+        return sorted(items, key=lambda n: (not n["dir"], n["name"]))
+
+    def find_child(self, parent_id: str, name: str) -> Optional[Dict[str, Any]]:
+        for child_id in self.nodes.get(parent_id, {}).get("children", []):
+            if self.nodes[child_id]["name"] == name:
+                return self.nodes[child_id]
+        return None
+
+    def mkdirs(self, path: str) -> str:
+        """按路径逐级创建文件夹，返回最后一级的ID"""
+        node_id = self.root_id
+        for part in [p for p in path.split("/") if p]:
+            child = self.find_child(node_id, part)
+            node_id = child["id"] if child else self.add(node_id, part, True)["id"]
+        return node_id
+
+    def resolve(self, path: str) -> Optional[str]:
+        node_id = self.root_id
+        for part in [p for p in path.split("/") if p]:
+            child = self.find_child(node_id, part)
+            if not child or not child["dir"]:
+                return None
+            node_id = child["id"]
+        return node_id
+
+    def remove(self, node_id: str):
+        node = self.nodes.pop(node_id, None)
+        if not node:
+            return
+        for child_id in list(node["children"]):
+            self.remove(child_id)
+        parent = self.nodes.get(node["parent"])
+        if parent and node_id in parent["children"]:
+            parent["children"].remove(node_id)
+
+
+class FakeDriveServer:
+    """夸克网盘 / 天翼云盘模拟服务"""
+
+    def __init__(self, config: Optional[FakeDriveConfig] = None):
+        self.config = config or FakeDriveConfig()
+        self.rng = random.Random(self.config.seed)
+        self.quark = FileTree(QUARK_ROOT, "q")
+        self.cloud189 = FileTree(CLOUD189_ROOT, "c")
+        # 分享 {分享ID: 分享根目录ID}
+        self.quark_shares: Dict[str, str] = {}
+        self.cloud189_shares: Dict[str, Dict[str, Any]] = {}
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self._task_ids = itertools.count(1)
+        self._throttle_windows: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        self.stats: Dict[str, int] = defaultdict(int)
+        self.runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    # ---------- 数据准备 ----------
+
+    def _episode_name(self, show: str, folder_index: int, n: int) -> str:
+        style = n % 3
+        if style == 0:
+            return f"{show}.S{folder_index + 1:02d}E{n + 1:02d}.1080p.mp4"
+        if style == 1:
+            return f"{show} 第{n + 1:02d}集 [4K].mkv"
+        return f"[字幕组] {show} EP{n + 1:03d}.mp4"
+
+    def _fill_share(self, tree: FileTree, root_id: str, show: str, **extra):
+        cfg = self.config
+        for n in range(cfg.files_per_folder):
+            tree.add(root_id, self._episode_name(show, 0, n), False, size=self.rng.randint(1, 4) << 30, **extra)
+        for f in range(cfg.folders_per_share):
+            folder = tree.add(root_id, f"Season {f + 1}", True)
+            for n in range(cfg.files_per_folder):
+                tree.add(folder["id"], self._episode_name(show, f, n), False, size=self.rng.randint(1, 4) << 30, **extra)
+
+    def add_quark_share(self, share_id: str, show: str = "模拟剧集") -> str:
+        """创建夸克分享，返回分享链接"""
+        root = self.quark.add(QUARK_ROOT, f".share_{share_id}", True)
+        self._fill_share(self.quark, root["id"], show)
+        self.quark_shares[share_id] = root["id"]
+        return f"https://pan.quark.cn/s/{share_id}"
+
+    def add_cloud189_share(self, share_code: str, show: str = "模拟剧集") -> str:
+        """创建天翼云盘分享，返回分享链接"""
+        root = self.cloud189.add(CLOUD189_ROOT, f".share_{share_code}", True)
+        self._fill_share(self.cloud189, root["id"], show)
+        self.cloud189_shares[share_code] = {"shareId": f"s{share_code}", "fileId": root["id"]}
+        return f"{self.base_url}/t/{share_code}"
+
+    # ---------- 通用处理 ----------
+
+    def _throttled(self, service: str) -> bool:
+        rps = self.config.throttle_rps
+        if rps <= 0:
+            return False
+        window = self._throttle_windows[service]
+        now = time.monotonic()
+        if now - window[0] >= 1:
+            window[0], window[1] = now, 0
+        window[1] += 1
+        return window[1] > rps
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        service = "cloud189" if request.path.endswith(".action") else "quark"
+        self.stats[f"{request.method} {request.path}"] += 1
+        cfg = self.config
+        await asyncio.sleep(cfg.latency + self.rng.uniform(0, cfg.latency_jitter))
+        if self._throttled(service):
+            self.stats["throttled"] += 1
+            if service == "quark":
+                return web.json_response({"status": 429, "code": 429, "message": "请求过于频繁"})
+            return self._cloud189_response({"res_code": 429, "res_message": "操作过于频繁"})
+        if cfg.error_rate and self.rng.random() < cfg.error_rate and not request.path.startswith("/__"):
+            self.stats["injected_errors"] += 1
+            if service == "quark":
+                return web.json_response({"status": 500, "code": 50000, "message": "模拟服务端错误"})
+            return self._cloud189_response({"res_code": 500, "res_message": "模拟服务端错误"})
+        return await handler(request)
+
+    @staticmethod
+    def _cloud189_response(data: Dict[str, Any]) -> web.Response:
+        # 天翼云盘接口以文本形式返回 JSON，客户端自行解析并检查错误码
+        return web.Response(text=json.dumps(data, ensure_ascii=False), content_type="text/plain")
+
+    def _page(self, items: List[Any], page: int, size: int) -> List[Any]:
+        size = max(1, min(int(size), self.config.max_page_size))
+        page = max(1, int(page))
+        return items[(page - 1) * size: page * size]
+
+    def _new_task(self, **task) -> Dict[str, Any]:
+        task_id = f"task{next(self._task_ids):06d}"
+        task.update({"id": task_id, "ready_at": time.monotonic() + self.config.task_delay, "done": False})
+        self.tasks[task_id] = task
+        return task
+
+    # ---------- 夸克网盘 ----------
+
+    def _quark_item(self, node: Dict[str, Any], share: bool = False) -> Dict[str, Any]:
+        item = {
+            "fid": node["id"],
+            "file_name": node["name"],
+            "dir": node["dir"],
+            "file_type": 0 if node["dir"] else 1,
+            "size": node.get("size", 0),
+            "updated_at": node["updated_at"],
+            "pdir_fid": node["parent"],
+        }
+        if share:
+            item["share_fid_token"] = f"token_{node['id']}"
+        return item
+
+    async def quark_account_info(self, request: web.Request):
+        return web.json_response({"success": True, "code": "OK", "data": {"nickname": "模拟账号"}})
+
+    async def quark_share_token(self, request: web.Request):
+        body = await request.json()
+        share_id = body.get("pwd_id")
+        if share_id not in self.quark_shares:
+            return web.json_response({"status": 404, "code": 41004, "message": "分享不存在"})
+        return web.json_response({"status": 200, "code": 0, "data": {"stoken": f"stoken_{share_id}"}})
+
+    async def quark_share_detail(self, request: web.Request):
+        q = request.query
+        root_id = self.quark_shares.get(q.get("pwd_id"))
+        if not root_id or q.get("stoken") != f"stoken_{q.get('pwd_id')}":
+            return web.json_response({"status": 400, "code": 41011, "message": "分享 token 无效"})
+        pdir_fid = q.get("pdir_fid") or QUARK_ROOT
+        dir_id = root_id if pdir_fid == QUARK_ROOT else pdir_fid
+        items = self.quark.children(dir_id)
+        page = self._page(items, q.get("_page", 1), q.get("_size", 50))
+        return web.json_response({
+            "status": 200, "code": 0,
+            "data": {"list": [self._quark_item(n, share=True) for n in page]},
+            "metadata": {"_total": len(items), "_page": int(q.get("_page", 1)), "_size": int(q.get("_size", 50))},
+        })
+
+    async def quark_file_sort(self, request: web.Request):
+        q = request.query
+        dir_id = q.get("pdir_fid", QUARK_ROOT)
+        if dir_id not in self.quark.nodes:
+            return web.json_response({"status": 404, "code": 41010, "message": "文件夹不存在"})
+        items = self.quark.children(dir_id)
+        page = self._page(items, q.get("_page", 1), q.get("_size", 50))
+        return web.json_response({
+            "status": 200, "code": 0,
+            "data": {"list": [self._quark_item(n) for n in page]},
+            "metadata": {"_total": len(items), "_page": int(q.get("_page", 1)), "_size": int(q.get("_size", 50))},
+        })
+
+    async def quark_path_list(self, request: web.Request):
+        body = await request.json()
+        data = []
+        for path in body.get("file_path", []):
+            fid = self.quark.resolve(path)
+            if fid:
+                data.append({"file_path": path, "fid": fid})
+        return web.json_response({"status": 200, "code": 0, "data": data})
+
+    async def quark_create_folder(self, request: web.Request):
+        body = await request.json()
+        parent_id = body.get("pdir_fid", QUARK_ROOT)
+        name = body.get("file_name", "")
+        if parent_id not in self.quark.nodes:
+            return web.json_response({"status": 404, "code": 41010, "message": "文件夹不存在"})
+        if self.quark.find_child(parent_id, name):
+            return web.json_response({"status": 400, "code": 23008, "message": "文件夹同名冲突"})
+        node = self.quark.add(parent_id, name, True)
+        return web.json_response({"status": 200, "code": 0, "data": {"finish": True, "fid": node["id"]}})
+
+    async def quark_rename(self, request: web.Request):
+        body = await request.json()
+        node = self.quark.nodes.get(body.get("fid"))
+        if not node:
+            return web.json_response({"status": 404, "code": 41010, "message": "文件不存在"})
+        node["name"] = body.get("file_name", node["name"])
+        return web.json_response({"status": 200, "code": 0, "data": {}})
+
+    async def quark_delete(self, request: web.Request):
+        body = await request.json()
+        for fid in body.get("filelist", []):
+            self.quark.remove(fid)
+        task = self._new_task(kind="quark_delete", result={"status": 2, "task_title": "删除文件"})
+        return web.json_response({"status": 200, "code": 0, "data": {"task_id": task["id"], "finish": False}})
+
+    async def quark_save(self, request: web.Request):
+        body = await request.json()
+        to_pdir_fid = body.get("to_pdir_fid", QUARK_ROOT)
+        if to_pdir_fid not in self.quark.nodes:
+            return web.json_response({"status": 404, "code": 41010, "message": "目标文件夹不存在"})
+        task = self._new_task(kind="quark_save", fids=list(body.get("fid_list", [])), target=to_pdir_fid)
+        return web.json_response({"status": 200, "code": 0, "data": {"task_id": task["id"]}})
+
+    def _finish_quark_save(self, task: Dict[str, Any]):
+        top_fids = []
+        for fid in task["fids"]:
+            source = self.quark.nodes.get(fid)
+            if not source:
+                continue
+            node = self.quark.add(task["target"], source["name"], source["dir"], size=source.get("size", 0))
+            top_fids.append(node["id"])
+        task["result"] = {"status": 2, "task_title": "分享-转存", "save_as": {"save_as_top_fids": top_fids}}
+
+    async def quark_task(self, request: web.Request):
+        task = self.tasks.get(request.query.get("task_id", ""))
+        if not task:
+            return web.json_response({"status": 404, "code": 32003, "message": "任务不存在"})
+        if not task["done"] and time.monotonic() >= task["ready_at"]:
+            if task["kind"] == "quark_save":
+                self._finish_quark_save(task)
+            task["done"] = True
+        data = task["result"] if task["done"] else {"status": 0, "task_title": "分享-转存"}
+        return web.json_response({"status": 200, "code": 0, "data": {"task_id": task["id"], **data}})
+
+    # ---------- 天翼云盘 ----------
+
+    def _cloud189_listing(self, dir_id: str, page: int, size: int) -> Dict[str, Any]:
+        items = self.cloud189.children(dir_id)
+        page_items = self._page(items, page, size)
+        return {
+            "res_code": 0,
+            "fileListAO": {
+                "count": len(items),
+                "fileList": [
+                    {"id": n["id"], "name": n["name"], "size": n.get("size", 0), "md5": n.get("md5", n["id"])}
+                    for n in page_items if not n["dir"]
+                ],
+                "folderList": [{"id": n["id"], "name": n["name"]} for n in page_items if n["dir"]],
+            },
+        }
+
+    async def cloud189_user_info(self, request: web.Request):
+        return self._cloud189_response({"res_code": 0, "account": "模拟账号", "cloudCapacityInfo": {}, "familyCapacityInfo": {}})
+
+    async def cloud189_share_info(self, request: web.Request):
+        share = self.cloud189_shares.get(request.query.get("shareCode", ""))
+        if not share:
+            return self._cloud189_response({"res_code": "ShareNotFound", "res_message": "分享不存在"})
+        return self._cloud189_response({
+            "res_code": 0, "shareId": share["shareId"], "fileId": share["fileId"],
+            "shareMode": 1, "isFolder": True, "accessCode": "",
+        })
+
+    async def cloud189_list_share(self, request: web.Request):
+        q = request.query
+        return self._cloud189_response(self._cloud189_listing(q.get("fileId", ""), q.get("pageNum", 1), q.get("pageSize", 60)))
+
+    async def cloud189_list_files(self, request: web.Request):
+        q = request.query
+        folder_id = q.get("folderId", CLOUD189_ROOT)
+        if folder_id not in self.cloud189.nodes:
+            return self._cloud189_response({"res_code": "FileNotFound", "res_message": "文件夹不存在"})
+        return self._cloud189_response(self._cloud189_listing(folder_id, q.get("pageNum", 1), q.get("pageSize", 60)))
+
+    async def cloud189_create_folder(self, request: web.Request):
+        form = await request.post()
+        parent_id = form.get("parentFolderId", CLOUD189_ROOT)
+        name = form.get("folderName", "")
+        if parent_id not in self.cloud189.nodes:
+            return self._cloud189_response({"res_code": "FileNotFound", "res_message": "父文件夹不存在"})
+        existing = self.cloud189.find_child(parent_id, name)
+        node = existing or self.cloud189.add(parent_id, name, True)
+        return self._cloud189_response({"res_code": 0, "id": node["id"], "name": node["name"]})
+
+    async def cloud189_rename(self, request: web.Request):
+        form = await request.post()
+        node = self.cloud189.nodes.get(form.get("fileId", ""))
+        if not node:
+            return self._cloud189_response({"res_code": "FileNotFound", "res_message": "文件不存在"})
+        node["name"] = form.get("destFileName", node["name"])
+        return self._cloud189_response({"res_code": 0})
+
+    async def cloud189_create_batch_task(self, request: web.Request):
+        form = await request.post()
+        task_infos = json.loads(form.get("taskInfos", "[]"))
+        target = form.get("targetFolderId", "")
+        task_type = form.get("type", "")
+        conflicts = []
+        if task_type == "SHARE_SAVE":
+            if target not in self.cloud189.nodes:
+                return self._cloud189_response({"res_code": "FileNotFound", "res_message": "目标文件夹不存在"})
+            conflicts = [info for info in task_infos if self.cloud189.find_child(target, info.get("fileName", ""))]
+        task = self._new_task(kind=task_type, infos=task_infos, target=target, conflicts=conflicts, deal_count=0)
+        return self._cloud189_response({"res_code": 0, "taskId": task["id"]})
+
+    def _finish_cloud189_task(self, task: Dict[str, Any]):
+        if task["kind"] == "SHARE_SAVE":
+            skipped = {info.get("fileId") for info in task["conflicts"]}
+            for info in task["infos"]:
+                source = self.cloud189.nodes.get(info.get("fileId"))
+                if source and info.get("fileId") not in skipped:
+                    self.cloud189.add(task["target"], source["name"], source["dir"],
+                                      size=source.get("size", 0), md5=source.get("md5", source["id"]))
+        elif task["kind"] == "DELETE":
+            for info in task["infos"]:
+                self.cloud189.remove(info.get("fileId"))
+        task["done"] = True
+
+    async def cloud189_check_batch_task(self, request: web.Request):
+        form = await request.post()
+        task = self.tasks.get(form.get("taskId", ""))
+        if not task:
+            return self._cloud189_response({"res_code": "TaskNotFound", "res_message": "任务不存在"})
+        if not task["done"] and time.monotonic() >= task["ready_at"]:
+            # 有冲突且尚未处理时停在冲突状态
+            if task["conflicts"] and not task.get("managed"):
+                return self._cloud189_response({"res_code": 0, "taskId": task["id"], "taskStatus": 2})
+            self._finish_cloud189_task(task)
+        status = 4 if task["done"] else 3
+        return self._cloud189_response({
+            "res_code": 0, "taskId": task["id"], "taskStatus": status,
+            "failedCount": 0, "successedCount": len(task["infos"]), "dealCount": task["deal_count"],
+        })
+
+    async def cloud189_conflict_info(self, request: web.Request):
+        form = await request.post()
+        task = self.tasks.get(form.get("taskId", ""))
+        if not task:
+            return self._cloud189_response({"res_code": "TaskNotFound", "res_message": "任务不存在"})
+        return self._cloud189_response({
+            "res_code": 0, "taskId": task["id"], "targetFolderId": task["target"],
+            "taskInfos": [{**info, "isConflict": 1} for info in task["conflicts"]],
+        })
+
+    async def cloud189_manage_batch_task(self, request: web.Request):
+        form = await request.post()
+        task = self.tasks.get(form.get("taskId", ""))
+        if not task:
+            return self._cloud189_response({"res_code": "TaskNotFound", "res_message": "任务不存在"})
+        task["managed"] = True
+        task["deal_count"] = len(json.loads(form.get("taskInfos", "[]")))
+        task["ready_at"] = time.monotonic() + self.config.task_delay
+        return self._cloud189_response({"res_code": 0})
+
+    # ---------- 服务 ----------
+
+    async def get_stats(self, request: web.Request):
+        return web.json_response(dict(self.stats))
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/__stats", self.get_stats)
+        # 夸克网盘
+        app.router.add_get("/account/info", self.quark_account_info)
+        app.router.add_post("/1/clouddrive/share/sharepage/token", self.quark_share_token)
+        app.router.add_get("/1/clouddrive/share/sharepage/detail", self.quark_share_detail)
+        app.router.add_post("/1/clouddrive/share/sharepage/save", self.quark_save)
+        app.router.add_get("/1/clouddrive/file/sort", self.quark_file_sort)
+        app.router.add_post("/1/clouddrive/file/info/path_list", self.quark_path_list)
+        app.router.add_post("/1/clouddrive/file", self.quark_create_folder)
+        app.router.add_post("/1/clouddrive/file/rename", self.quark_rename)
+        app.router.add_post("/1/clouddrive/file/delete", self.quark_delete)
+        app.router.add_get("/1/clouddrive/task", self.quark_task)
+        # 天翼云盘
+        app.router.add_get("/api/portal/getUserSizeInfo.action", self.cloud189_user_info)
+        app.router.add_get("/api/open/share/getShareInfoByCodeV2.action", self.cloud189_share_info)
+        app.router.add_get("/api/open/share/listShareDir.action", self.cloud189_list_share)
+        app.router.add_get("/api/open/file/listFiles.action", self.cloud189_list_files)
+        app.router.add_post("/api/open/file/createFolder.action", self.cloud189_create_folder)
+        app.router.add_post("/api/open/file/renameFile.action", self.cloud189_rename)
+        app.router.add_post("/api/open/batch/createBatchTask.action", self.cloud189_create_batch_task)
+        app.router.add_post("/api/open/batch/checkBatchTask.action", self.cloud189_check_batch_task)
+        app.router.add_post("/api/open/batch/getConflictTaskInfo.action", self.cloud189_conflict_info)
+        app.router.add_post("/api/open/batch/manageBatchTask.action", self.cloud189_manage_batch_task)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """启动服务，返回服务地址"""
+        self.runner = web.AppRunner(self.create_app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+async def _serve(args):
+    server = FakeDriveServer(FakeDriveConfig(
+        latency=args.latency, error_rate=args.error_rate, throttle_rps=args.throttle_rps,
+        max_page_size=args.page_size,
+    ))
+    base_url = await server.start(args.host, args.port)
+    for i in range(args.shares):
+        print(f"夸克分享: {server.add_quark_share(f'share{i}')}")
+        print(f"天翼分享: {server.add_cloud189_share(f'code{i}')}")
+    print(f"模拟服务已启动: {base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="夸克网盘 / 天翼云盘模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8189)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rps", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--shares", type=int, default=2)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
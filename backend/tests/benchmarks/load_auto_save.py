@@ -0,0 +1,203 @@
+"""
+自动转存端到端压测
+
+启动本地夸克网盘 / 天翼云盘模拟服务，将 QuarkSDK 和 Cloud189Client 指向模拟服务，
+通过 TaskScheduler 并发执行 N 个自动转存任务，统计吞吐量、任务耗时分位数和各接口请求数。
+
+在 backend 目录下运行:
+    python -m tests.benchmarks.load_auto_save
+    python -m tests.benchmarks.load_auto_save --tasks 50 --drive quark --latency 0.05 --throttle-rps 20
+
+配置只在内存中修改，不会写回 config/config.yaml；夸克目录缓存写到临时目录。
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from loguru import logger
+
+from tests.benchmarks.fake_drive_server import CLOUD189_ROOT, FakeDriveConfig, FakeDriveServer
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """最近秩法计算分位数"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def configure(base_url: str, args) -> str:
+    """将客户端指向模拟服务并写入内存配置，返回临时目录"""
+    from utils.config_manager import config_manager
+    from utils.path_fid_cache import quark_fid_cache
+    from utils.quark_sdk import QuarkSDK
+    import utils.cloud189.client as cloud189_client
+
+    QuarkSDK.BASE_URL = QuarkSDK.BASE_URL_APP = QuarkSDK.ACCOUNT_URL = base_url
+    cloud189_client.WEB_URL = base_url
+
+    config = config_manager.get_config()
+    config.update({
+        "quarkCookie": "__pus=load_test; __puus=load_test",
+        "tianyiAccount": "load_test",
+        "tianyiPassword": "load_test",
+        "tianyiCookie": "",
+        "use_proxy": False,
+        "cloud189_session": {
+            "access_token": "load_test",
+            "session_key": "load_test",
+            "expires_in": int(time.time() + 24 * 60 * 60),
+        },
+    })
+    scheduler_config = config.setdefault("scheduler", {})
+    scheduler_config["max_workers"] = args.max_workers
+    scheduler_config["task_type_limits"] = {
+        "quark_auto_save": args.max_workers,
+        "cloud189_auto_save": args.max_workers,
+    }
+
+    temp_dir = tempfile.mkdtemp(prefix="load_auto_save_")
+    quark_fid_cache._cache_file = os.path.join(temp_dir, "quark_fid_cache.json")
+    quark_fid_cache.clear()
+    return temp_dir
+
+
+def build_tasks(server: FakeDriveServer, args) -> List[Dict[str, Any]]:
+    """在模拟服务中准备分享和目标目录，返回任务列表"""
+    drives = ["quark", "cloud189"] if args.drive == "both" else [args.drive]
+    tasks = []
+    for i in range(args.tasks):
+        drive = drives[i % len(drives)]
+        params = {"pattern": args.pattern, "replace": ""}
+        if drive == "quark":
+            target_dir = f"/load/quark_{i}"
+            server.quark.mkdirs(target_dir)
+            params.update({"shareUrl": server.add_quark_share(f"share{i}"), "targetDir": target_dir})
+            task_type = "quark_auto_save"
+        else:
+            target_id = server.cloud189.add(CLOUD189_ROOT, f"load_cloud189_{i}", True)["id"]
+            params.update({"shareUrl": server.add_cloud189_share(f"code{i}"), "targetDir": target_id})
+            task_type = "cloud189_auto_save"
+        tasks.append({"name": f"load_{drive}_{i}", "task": task_type, "drive": drive, "params": params})
+    return tasks
+
+
+async def run(args) -> Dict[str, Any]:
+    server = FakeDriveServer(FakeDriveConfig(
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        max_page_size=args.page_size,
+        error_rate=args.error_rate,
+        throttle_rps=args.throttle_rps,
+        task_delay=args.task_delay,
+        folders_per_share=args.folders,
+        files_per_folder=args.files,
+    ))
+    base_url = await server.start()
+    configure(base_url, args)
+
+    from utils.http_client import http_client
+    from utils.scheduler import TaskScheduler
+
+    tasks = build_tasks(server, args)
+    scheduler = TaskScheduler()
+    scheduler.register_system_tasks()
+    scheduler._init_worker_pool()
+
+    durations: Dict[str, List[float]] = {}
+    failures = 0
+
+    async def timed(task: Dict[str, Any]):
+        nonlocal failures
+        start = time.perf_counter()
+        await scheduler._execute_task(task, is_manual=True)
+        durations.setdefault(task["drive"], []).append(time.perf_counter() - start)
+        result = scheduler.get_task_result(task["name"])
+        if not result or not result.get("success"):
+            failures += 1
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(timed(task) for task in tasks))
+        elapsed = time.perf_counter() - start
+    finally:
+        await http_client.close()
+        await server.stop()
+
+    saved_files = sum(1 for node in server.quark.nodes.values() if not node["dir"]) \
+        + sum(1 for node in server.cloud189.nodes.values() if not node["dir"])
+    # 减去分享中的原始文件，剩下的是转存出来的文件
+    share_files = len(tasks) * args.files * (args.folders + 1)
+    all_durations = [d for samples in durations.values() for d in samples]
+
+    def summary(samples: List[float]) -> Dict[str, Any]:
+        return {
+            "count": len(samples),
+            "mean": round(statistics.mean(samples), 4) if samples else 0,
+            "p50": round(percentile(samples, 50), 4),
+            "p90": round(percentile(samples, 90), 4),
+            "p99": round(percentile(samples, 99), 4),
+            "max": round(max(samples), 4) if samples else 0,
+        }
+
+    return {
+        "benchmark": "load_auto_save",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "options": vars(args),
+        "elapsed": round(elapsed, 4),
+        "tasks": len(tasks),
+        "failed_tasks": failures,
+        "tasks_per_second": round(len(tasks) / elapsed, 3) if elapsed else 0,
+        "saved_files": saved_files - share_files,
+        "files_per_second": round((saved_files - share_files) / elapsed, 3) if elapsed else 0,
+        "latency": {"all": summary(all_durations), **{drive: summary(s) for drive, s in durations.items()}},
+        "requests": dict(sorted(server.stats.items(), key=lambda item: -item[1])),
+    }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="自动转存端到端压测")
+    parser.add_argument("--tasks", type=int, default=20, help="并发任务数")
+    parser.add_argument("--drive", choices=["quark", "cloud189", "both"], default="both", help="压测的网盘类型")
+    parser.add_argument("--max-workers", type=int, default=5, help="调度器全局及各类型并发数")
+    parser.add_argument("--folders", type=int, default=3, help="每个分享的子文件夹数")
+    parser.add_argument("--files", type=int, default=20, help="每个目录的文件数")
+    parser.add_argument("--pattern", default="", help="任务的重命名正则或魔法变量，例如 $TV")
+    parser.add_argument("--latency", type=float, default=0.02, help="模拟服务基础延迟（秒）")
+    parser.add_argument("--latency-jitter", type=float, default=0.01, help="模拟服务延迟抖动（秒）")
+    parser.add_argument("--page-size", type=int, default=100, help="模拟服务单页最大条目数")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="随机业务错误概率")
+    parser.add_argument("--throttle-rps", type=float, default=0.0, help="每个网盘每秒允许的请求数，0 为不限流")
+    parser.add_argument("--task-delay", type=float, default=0.3, help="转存任务完成耗时（秒）")
+    parser.add_argument("--output", default="", help="JSON 输出文件，默认打印到标准输出")
+    parser.add_argument("--verbose", action="store_true", help="输出任务日志")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    return report
+
+
+if __name__ == "__main__":
+    main()
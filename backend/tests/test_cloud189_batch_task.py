@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from utils.cloud189.client import Cloud189Client
+from utils.cloud189.error import Cloud189Error
+
+
+def make_client(monkeypatch, conflict_info):
+    client = Cloud189Client(username="user", password="pass")
+    monkeypatch.setattr(client, "BATCH_TASK_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(client, "BATCH_TASK_POLL_MAX_INTERVAL", 0.01)
+    calls = {"status": 0, "conflict": 0, "manage": 0}
+    statuses = [{"taskStatus": 2}, {"taskStatus": 3}, {"taskStatus": 4, "successedCount": 1}]
+
+    async def check_task_status(task_id, task_type):
+        calls["status"] += 1
+        return statuses.pop(0) if len(statuses) > 1 else statuses[0]
+
+    async def get_conflict_task_info(task_id):
+        calls["conflict"] += 1
+        return conflict_info
+
+    async def manage_batch_task(task_id, target_folder_id, task_infos):
+        calls["manage"] += 1
+        return {"res_code": 0}
+
+    monkeypatch.setattr(client, "check_task_status", check_task_status)
+    monkeypatch.setattr(client, "get_conflict_task_info", get_conflict_task_info)
+    monkeypatch.setattr(client, "manage_batch_task", manage_batch_task)
+    return client, calls
+
+
+def test_conflict_resolved_then_task_finishes(monkeypatch):
+    client, calls = make_client(monkeypatch, {"targetFolderId": "1", "taskInfos": [{"fileId": "a"}]})
+    status = asyncio.run(client.wait_batch_task("task1", timeout=5))
+    assert status["taskStatus"] == 4
+    assert calls["conflict"] == 1
+    assert calls["manage"] == 1
+
+
+def test_conflict_failure_ends_wait_with_error(monkeypatch):
+    client, calls = make_client(monkeypatch, None)
+    with pytest.raises(Cloud189Error, match="获取冲突任务信息失败"):
+        asyncio.run(client.wait_batch_task("task1", timeout=5))
+    # 冲突处理失败后不再重复查询和处理
+    assert calls["status"] == 1
+    assert calls["conflict"] == 1
+    assert calls["manage"] == 0
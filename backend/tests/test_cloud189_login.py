@@ -0,0 +1,90 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import utils.cloud189.client as cloud189_client
+from utils.cloud189.client import Cloud189Client
+from utils.cloud189.error import NetworkError
+from utils.session_cache import validated_sessions
+
+
+@pytest.fixture(autouse=True)
+def clear_validated_sessions():
+    validated_sessions.clear()
+    yield
+    validated_sessions.clear()
+
+
+class FakeCloud189:
+    """模拟天翼云盘接口，session_key 与当前有效值不一致时返回会话失效"""
+
+    def __init__(self, valid_key: str = "new", always_invalid: bool = False):
+        self.valid_key = valid_key
+        self.always_invalid = always_invalid
+        self.requests = 0
+        self.logins = 0
+
+    async def request(self, method, url, params=None, headers=None, **kwargs):
+        self.requests += 1
+        await asyncio.sleep(0.01)
+        if self.always_invalid or (params or {}).get("sessionKey") != self.valid_key:
+            return json.dumps({"errorCode": "InvalidSessionKey"})
+        return json.dumps({"res_code": 0, "account": "test"})
+
+    async def login_by_password(self, username, password):
+        self.logins += 1
+        await asyncio.sleep(0.05)
+        return {"accesstoken": "new", "sessionkey": "new"}
+
+
+def make_client(monkeypatch, fake: FakeCloud189, config: dict = None) -> Cloud189Client:
+    monkeypatch.setattr(cloud189_client, "http_client", fake)
+    client = Cloud189Client(username="user", password="pass")
+    client.auth_client = fake
+    config = config if config is not None else {}
+    client.config_manager = SimpleNamespace(get_config=lambda: config, update_config=config.update)
+    client._set_session({"access_token": "old", "session_key": "old", "expires_in": 0})
+    return client
+
+
+def test_concurrent_expired_requests_login_once(monkeypatch):
+    fake = FakeCloud189()
+    client = make_client(monkeypatch, fake)
+
+    async def run():
+        return await asyncio.gather(*(client.get_user_info() for _ in range(20)))
+
+    results = asyncio.run(run())
+    assert all(result["res_code"] == 0 for result in results)
+    assert fake.logins == 1
+    assert client.session["session_key"] == "new"
+
+
+def test_session_retry_is_bounded(monkeypatch):
+    fake = FakeCloud189(always_invalid=True)
+    client = make_client(monkeypatch, fake)
+
+    with pytest.raises(NetworkError):
+        asyncio.run(client.get_user_info())
+    assert fake.logins == 1
+    assert fake.requests <= 2 + Cloud189Client.MAX_SESSION_RETRIES * 2
+
+
+def test_validated_session_skips_user_info(monkeypatch):
+    fake = FakeCloud189()
+    config = {"cloud189_session": {"access_token": "new", "session_key": "new", "expires_in": 2 ** 31}}
+    task_client = make_client(monkeypatch, fake, config)
+    api_client = make_client(monkeypatch, fake, config)
+
+    async def run():
+        assert await task_client.login()
+        assert await task_client.login()
+        assert await api_client.login()
+
+    asyncio.run(run())
+    # 只有第一次登录请求了用户信息，之后的实例共用验证结果
+    assert fake.requests == 1
+    assert fake.logins == 0
+    assert api_client.user_info["account"] == "test"
@@ -0,0 +1,45 @@
+from utils.cloud189.client import Cloud189Client
+
+
+def make_listing(files, folders=()):
+    return {"res_code": 0, "fileListAO": {"fileList": list(files), "folderList": list(folders)}}
+
+
+def test_failed_save_entries_by_name_and_md5():
+    listing = make_listing(
+        [{"id": "1", "name": "a.mp4", "md5": "m1"}, {"id": "2", "name": "renamed.mp4", "md5": "m2"}],
+        [{"id": "3", "name": "Season 1"}],
+    )
+    task_infos = [
+        {"fileId": "s1", "fileName": "a.mp4", "isFolder": 0},
+        {"fileId": "s2", "fileName": "b.mp4", "isFolder": 0, "md5": "m2"},
+        {"fileId": "s3", "fileName": "Season 1", "isFolder": 1},
+        {"fileId": "s4", "fileName": "c.mp4", "isFolder": 0},
+    ]
+    failed = Cloud189Client.find_failed_entries(task_infos, listing)
+    assert [info["fileId"] for info in failed] == ["s4"]
+
+
+def test_failed_delete_entries_by_id():
+    listing = make_listing([{"id": "1", "name": "a.mp4"}], [{"id": 9, "name": "dir"}])
+    file_ids = [
+        {"fileId": "1", "fileName": "a.mp4"},
+        {"fileId": "2", "fileName": "b.mp4"},
+        {"fileId": "9", "fileName": "dir", "isFolder": 1},
+    ]
+    failed = Cloud189Client.find_failed_entries(file_ids, listing, "DELETE")
+    assert [info["fileId"] for info in failed] == ["1", "9"]
+
+
+def test_failed_entries_tolerates_empty_listing():
+    assert Cloud189Client.find_failed_entries([{"fileId": "1", "fileName": "a"}], None, "DELETE") == []
+    assert len(Cloud189Client.find_failed_entries([{"fileId": "1", "fileName": "a"}], None)) == 1
+
+
+def test_failed_entries_large_listing():
+    n = 20000
+    listing = make_listing([{"id": str(i), "name": f"{i}.mp4", "md5": f"m{i}"} for i in range(n)])
+    task_infos = [{"fileId": f"s{i}", "fileName": f"{i * 2}.mp4"} for i in range(n)]
+    failed = Cloud189Client.find_failed_entries(task_infos, listing)
+    # 只有文件名在列表中的一半保存成功
+    assert [info["fileId"] for info in failed] == [f"s{i}" for i in range(n // 2, n)]
@@ -0,0 +1,46 @@
+import time
+
+from utils.host_policy import CircuitBreaker, HostPolicyRegistry
+
+POLICIES = {
+    "default": {"max_concurrency": 20, "rate": 0},
+    "hosts": {"quark.cn": {"max_concurrency": 10, "rate": 20}, "pan.quark.cn": {"rate": 5}},
+}
+
+
+def test_policy_matches_longest_host_suffix():
+    registry = HostPolicyRegistry()
+    assert registry.get("drive-pc.quark.cn", POLICIES).policy.rate == 20
+    assert registry.get("pan.quark.cn", POLICIES).policy.rate == 5
+    assert registry.get("pan.quark.cn", POLICIES).policy.max_concurrency == 20
+    assert registry.get("notquark.cn", POLICIES).policy.rate == 0
+    assert registry.get("notquark.cn", POLICIES).bucket is None
+
+
+def test_policy_change_updates_state_in_place():
+    registry = HostPolicyRegistry()
+    state = registry.get("drive-pc.quark.cn", POLICIES)
+    changed = {**POLICIES, "hosts": {"quark.cn": {"max_concurrency": 3, "rate": 2}}}
+    assert registry.get("drive-pc.quark.cn", changed) is state
+    assert state.bucket.rate == 2
+    assert state.policy.max_concurrency == 3
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    time.sleep(0.06)
+    # 半开状态只放行一个探测请求
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
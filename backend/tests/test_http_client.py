@@ -0,0 +1,216 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from utils.host_policy import CircuitBreaker, host_policies
+from utils.http_client import http_client
+
+
+def test_coalesce_identical_gets():
+    calls = []
+
+    async def handler(request):
+        calls.append(dict(request.query))
+        await asyncio.sleep(0.05)
+        return web.json_response({"items": [request.query.get("q")]})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/search", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/search"
+        try:
+            results = await asyncio.gather(
+                *(http_client.get(url, params={"q": "a"}, coalesce=True) for _ in range(5)),
+                http_client.get(url, params={"q": "b"}, coalesce=True),
+                http_client.get(url, params={"q": "a"}, headers={"cookie": "other"}, coalesce=True),
+                http_client.get(url, params={"q": "a"}),
+            )
+        finally:
+            await http_client.close()
+            await runner.cleanup()
+        return results
+
+    results = asyncio.run(run())
+    # 5 个相同请求合并为 1 次，参数、身份不同或未开启合并的各自请求
+    assert len(calls) == 4
+    assert [r["items"] for r in results] == [["a"]] * 5 + [["b"], ["a"], ["a"]]
+    # 各调用方拿到独立的副本
+    results[0]["items"].append("x")
+    assert results[1]["items"] == ["a"]
+
+
+def test_stream_retries_before_headers_and_releases_slot():
+    body = bytes(range(256)) * 4096
+    attempts = []
+
+    async def download(request):
+        attempts.append(1)
+        if len(attempts) == 1:
+            return web.Response(status=503)
+        response = web.StreamResponse(headers={"content-type": "application/octet-stream"})
+        await response.prepare(request)
+        for i in range(0, len(body), 100000):
+            await response.write(body[i:i + 100000])
+        await response.write_eof()
+        return response
+
+    async def redirect(request):
+        raise web.HTTPFound("/download")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/download", download)
+        app.router.add_get("/redirect", redirect)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        try:
+            chunks = []
+            async with http_client.stream("GET", f"{base_url}/download", retry_delay=0.01) as response:
+                assert response.status == 200
+                assert response.content_type == "application/octet-stream"
+                async for chunk in response.iter_chunks(32 * 1024):
+                    chunks.append(chunk)
+            async with http_client.stream("GET", f"{base_url}/redirect", allow_redirects=False) as response:
+                location = response.headers.get("location")
+            in_flight = host_policies.snapshot()["127.0.0.1"]["in_flight"]
+        finally:
+            await http_client.close()
+            await runner.cleanup()
+        return chunks, location, in_flight
+
+    chunks, location, in_flight = asyncio.run(run())
+    assert b"".join(chunks) == body
+    assert len(chunks) > 1
+    assert len(attempts) == 2
+    assert location == "/download"
+    assert in_flight == 0
+
+
+def test_stream_outliving_session_drain(monkeypatch):
+    async def ok(request):
+        return web.Response(text="ok")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/ok", ok)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/ok"
+        monkeypatch.setattr(http_client, "SESSION_DRAIN_TIMEOUT", 0.1)
+        try:
+            async with http_client.stream("GET", url) as response:
+                old_session = http_client._session
+                # 连接配置变化后旧会话等待超时被关闭，流仍未结束
+                http_client.reload_profile()
+                assert await http_client.get(url) == "ok"
+                await asyncio.sleep(0.5)
+                assert old_session.closed
+                assert response.status == 200
+            assert old_session not in http_client._session_users
+        finally:
+            await http_client.close()
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def test_retry_after_profile_change_uses_new_session():
+    attempts = []
+
+    async def flaky(request):
+        attempts.append(1)
+        if len(attempts) % 2 == 1:
+            return web.Response(status=503)
+        return web.Response(text="ok")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/flaky", flaky)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/flaky"
+
+        async def change_profile(count: int):
+            # 第一次请求失败后的退避等待期间连接配置变化，旧会话被关闭
+            while len(attempts) < count:
+                await asyncio.sleep(0.01)
+            http_client.reload_profile()
+            await http_client._ensure_session()
+
+        async def stream_text():
+            async with http_client.stream("GET", url, retry_delay=0.5) as response:
+                return await response.read()
+
+        try:
+            text, _ = await asyncio.gather(http_client.get(url, retry_delay=0.5), change_profile(1))
+            body, _ = await asyncio.gather(stream_text(), change_profile(3))
+        finally:
+            await http_client.close()
+            await runner.cleanup()
+        return text, body
+
+    text, body = asyncio.run(run())
+    assert text == "ok"
+    assert body == b"ok"
+    assert len(attempts) == 4
+
+
+def test_half_open_probe_released_by_non_network_errors():
+    async def missing(request):
+        return web.Response(status=404)
+
+    async def broken_json(request):
+        return web.Response(text="{", content_type="application/json")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/missing", missing)
+        app.router.add_get("/broken", broken_json)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        profile = http_client.profile
+        state = host_policies.get("127.0.0.1", profile.http_policies, profile.version)
+        state.breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+        states = []
+        try:
+            for path, error in (("/missing", aiohttp.ClientError), ("/broken", ValueError)):
+                state.breaker.record_failure()
+                await asyncio.sleep(0.06)
+                # 半开状态的探测请求收到了响应，主机可用，熔断关闭
+                with pytest.raises(error):
+                    await http_client.get(f"{base_url}{path}", retry_times=1)
+                states.append(state.breaker.state)
+                assert state.breaker.allow()
+            # 探测请求被取消时释放探测名额，下一个请求可以继续探测
+            state.breaker.record_failure()
+            await asyncio.sleep(0.06)
+            task = asyncio.ensure_future(http_client.get(f"{base_url}/missing", retry_times=1))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            states.append(state.breaker.state)
+            assert state.breaker.allow()
+        finally:
+            await http_client.close()
+            await runner.cleanup()
+        return states
+
+    states = asyncio.run(run())
+    assert states == [CircuitBreaker.CLOSED, CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN]
@@ -0,0 +1,32 @@
+import json
+
+from utils import json_codec
+
+
+def test_round_trip_keeps_unicode_and_compact_output():
+    data = {"name": "繁花 第01集.mp4", "size": 1 << 40, "dir": False, "tags": None, "items": [1.5, "a"]}
+    text = json_codec.dumps(data)
+    assert "繁花" in text
+    assert ", " not in text
+    assert json_codec.loads(text) == data
+    assert json_codec.loads(text.encode("utf-8")) == data
+    assert json_codec.loads(json_codec.dumps_bytes(data)) == data
+
+
+def test_indent_and_default():
+    class Custom:
+        def __str__(self):
+            return "custom"
+
+    assert json_codec.loads(json_codec.dumps({"a": [1]}, indent=True)) == {"a": [1]}
+    assert "\n  " in json_codec.dumps({"a": 1}, indent=True)
+    assert json_codec.loads(json_codec.dumps({"v": Custom()}, default=str)) == {"v": "custom"}
+
+
+def test_decode_error_is_json_decode_error():
+    try:
+        json_codec.loads(b"{not json")
+    except json.JSONDecodeError as e:
+        assert isinstance(e, json_codec.JSONDecodeError)
+    else:
+        raise AssertionError("expected JSONDecodeError")
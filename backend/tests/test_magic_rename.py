@@ -0,0 +1,201 @@
+import copy
+import random
+import re
+from datetime import datetime
+
+from tests.benchmarks.bench_magic_rename import make_file_name
+from utils.magic_rename import MagicRename, compile_pattern
+from utils.scheduled_manager import ScheduledManager
+
+
+def legacy_sub(mr: MagicRename, pattern: str, replace: str, file_name: str) -> str:
+    """原 sub 实现：逐个变量、逐个正则 re.search，用于对照合并正则的结果"""
+    if not replace:
+        return file_name
+    for key, p_list in mr.magic_variable.items():
+        if key in replace:
+            if p_list and isinstance(p_list, list):
+                match = None
+                for p in p_list:
+                    match = compile_pattern(p).search(file_name)
+                    if match:
+                        value = match.group()
+                        if key == "{DATE}":
+                            value = "".join([char for char in value if char.isdigit()])
+                            value = str(datetime.now().year)[: (8 - len(value))] + value
+                        replace = replace.replace(key, value)
+                        break
+                if not match:
+                    if key == "{SXX}":
+                        replace = replace.replace(key, "S01")
+                    else:
+                        replace = replace.replace(key, "")
+            elif key == "{TASKNAME}":
+                replace = replace.replace(key, mr.magic_variable["{TASKNAME}"])
+            elif key == "{I}":
+                continue
+            else:
+                replace = replace.replace(key, "")
+    if pattern and replace:
+        return compile_pattern(pattern).sub(replace, file_name)
+    return replace
+
+
+def legacy_start_magic_is_save(mr: MagicRename, start_magic, file_name: str) -> bool:
+    """原 start_magic_is_save 实现"""
+    if not start_magic:
+        return True
+    flag = [False] * len(start_magic)
+    for i, item in enumerate(start_magic):
+        if item["type"] in mr.magic_variable:
+            for p in mr.magic_variable[item["type"]]:
+                match = compile_pattern(p).search(file_name)
+                if match:
+                    number_str = re.search(r"\d+", match.group())
+                    if number_str:
+                        number = int(number_str.group())
+                        if item["symbol"] == ">":
+                            flag[i] = number > item["value"]
+                        elif item["symbol"] == "<":
+                            flag[i] = number < item["value"]
+                        elif item["symbol"] == "=":
+                            flag[i] = number == item["value"]
+                    break
+    return all(flag)
+
+
+def legacy_sort_file_list(mr: MagicRename, file_list, dir_filename_dict):
+    """原 sort_file_list 实现，用于对照新实现的编号结果"""
+    dir_filename_dict = dir_filename_dict or mr.dir_filename_dict
+    filename_list = [
+        f["file_name_re"]
+        for f in file_list
+        if f.get("file_name_re") and not f["dir"]
+    ]
+    filename_list = list(set(filename_list) | set(dir_filename_dict.values()))
+    filename_list.sort(key=mr._custom_sort_key)
+
+    filename_index = {}
+    for name in filename_list:
+        if name in dir_filename_dict.values():
+            continue
+        i = filename_list.index(name) + 1
+        while i in dir_filename_dict.keys():
+            i += 1
+        dir_filename_dict[i] = name
+        filename_index[name] = i
+
+    for file in file_list:
+        if file.get("file_name_re"):
+            if match := re.search(r"\{I+\}", file["file_name_re"]):
+                i = filename_index.get(file["file_name_re"], 0)
+                file["file_name_re"] = re.sub(
+                    match.group(),
+                    str(i).zfill(match.group().count("I")),
+                    file["file_name_re"],
+                )
+
+
+# 自定义变量：普通正则、含反向引用（退回逐个匹配）、与内置变量同名覆盖
+CUSTOM_VARIABLES = {
+    "{CODE}": [r"[A-Z]{2,}-\d+", r"\[[^\]]+\]"],
+    "{REPEAT}": [r"(\d)\1", r"([a-z])\1"],
+    "{VER}": [r"(?:国语|粤语)版?", r"[\u4e00-\u9fa5]+版"],
+}
+
+TEMPLATES = [
+    "{TASKNAME}.{SXX}E{E}.{EXT}",
+    "{DATE}{PART}{VER}{CHINESE}.{EXT}",
+    "{YEAR}-{S}-{E}-{PART}",
+    "{CODE}{REPEAT}{E}.{EXT}",
+    "{REPEAT}",
+    "{UNKNOWN}{I}{E}",
+]
+
+
+def test_magic_variables_match_legacy():
+    rng = random.Random(20240513)
+    names = [make_file_name(rng, n) for n in range(400)]
+    names += ["ABC-123 [字幕组] 第11集 国语版.mp4", "S1E2 1122 aa.mkv", "无数字.mp4", "", "2024年05月01日 第3期下.mp4"]
+    magic_regex = ScheduledManager._default_config["magic_regex"]
+    for custom in ({}, CUSTOM_VARIABLES):
+        mr, legacy_mr = MagicRename(magic_regex, custom), MagicRename(magic_regex, custom)
+        mr.set_taskname("任务")
+        legacy_mr.set_taskname("任务")
+        cases = [mr.magic_regex_conv(preset, "") for preset in magic_regex]
+        cases += [(r".*\.(mp4|mkv|ass|nfo)$", template) for template in TEMPLATES]
+        cases += [("", template) for template in TEMPLATES]
+        for pattern, replace in cases:
+            expected = [legacy_sub(legacy_mr, pattern, replace, name) for name in names]
+            assert mr.batch_sub(pattern, replace, names) == expected, (pattern, replace)
+            assert [mr.sub(pattern, replace, name) for name in names[:50]] == expected[:50]
+
+        for start_magic in (
+            [{"type": "{E}", "symbol": ">", "value": 10}],
+            [{"type": "{E}", "symbol": "<", "value": 50}, {"type": "{YEAR}", "symbol": ">", "value": 2019}],
+            [{"type": "{S}", "symbol": "=", "value": 1}, {"type": "{REPEAT}", "symbol": ">", "value": 0}],
+        ):
+            if not custom and any(item["type"] == "{REPEAT}" for item in start_magic):
+                continue
+            for name in names:
+                assert mr.start_magic_is_save(start_magic, name) == legacy_start_magic_is_save(legacy_mr, start_magic, name)
+
+
+def make_case(rng: random.Random, size: int):
+    """生成一组分享文件和目录已有编号"""
+    words = ["上", "中", "下", "一", "二", "十", "加更", "纯享", "先导", "花絮"]
+    file_list = []
+    for n in range(size):
+        name = f"综艺{rng.choice(words)}{rng.randint(1, size * 2):05d}.{{II}}.mp4"
+        file_list.append({"file_name": f"raw_{n}.mp4", "file_name_re": name, "dir": rng.random() < 0.05})
+    # 目录中已有的编号，部分与分享文件重名
+    dir_filename_dict = {}
+    for _ in range(rng.randint(0, size)):
+        if file_list and rng.random() < 0.3:
+            name = rng.choice(file_list)["file_name_re"]
+        else:
+            name = f"综艺{rng.choice(words)}{rng.randint(1, size * 2):05d}.{{II}}.mp4"
+        dir_filename_dict[rng.randint(1, size * 2)] = name
+    return file_list, dir_filename_dict
+
+
+def test_sort_file_list_matches_legacy():
+    rng = random.Random(20240601)
+    for size in [0, 1, 2, 5, 20, 100, 500]:
+        for _ in range(20):
+            file_list, dir_filename_dict = make_case(rng, size)
+            expected_files, expected_dict = copy.deepcopy(file_list), dict(dir_filename_dict)
+            legacy_mr, mr = MagicRename(), MagicRename()
+            legacy_sort_file_list(legacy_mr, expected_files, expected_dict)
+            mr.sort_file_list(file_list, dir_filename_dict)
+            assert file_list == expected_files
+            assert (dir_filename_dict or mr.dir_filename_dict) == (expected_dict or legacy_mr.dir_filename_dict)
+
+
+def test_sort_file_list_skips_occupied_numbers():
+    mr = MagicRename()
+    dir_filename_dict = {1: "A.{II}.mp4", 3: "C.{II}.mp4", 4: "Z.{II}.mp4"}
+    file_list = [
+        {"file_name": "b.mp4", "file_name_re": "B.{II}.mp4", "dir": False},
+        {"file_name": "d.mp4", "file_name_re": "D.{II}.mp4", "dir": False},
+        {"file_name": "a.mp4", "file_name_re": "A.{II}.mp4", "dir": False},
+    ]
+    mr.sort_file_list(file_list, dir_filename_dict)
+    assert [f["file_name_re"] for f in file_list] == ["B.02.mp4", "D.05.mp4", "A.00.mp4"]
+    assert dir_filename_dict[2] == "B.{II}.mp4"
+    assert dir_filename_dict[5] == "D.{II}.mp4"
+
+
+def test_sort_file_list_numbers_are_unique():
+    rng = random.Random(7)
+    file_list = [
+        {"file_name": f"raw_{n}.mp4", "file_name_re": f"第{n:05d}期{rng.choice('上中下')}.{{IIIII}}.mp4", "dir": False}
+        for n in range(5000)
+    ]
+    dir_filename_dict = {n * 3: f"第{n * 3:05d}期花絮.{{IIIII}}.mp4" for n in range(1, 500)}
+    mr = MagicRename()
+    mr.sort_file_list(file_list, dir_filename_dict)
+    numbers = [int(re.search(r"\.(\d{5})\.mp4$", f["file_name_re"]).group(1)) for f in file_list]
+    assert len(set(numbers)) == len(numbers)
+    # 不与目录中已有的编号冲突
+    assert not set(numbers) & {n * 3 for n in range(1, 500)}
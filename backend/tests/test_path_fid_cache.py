@@ -0,0 +1,77 @@
+from utils.path_fid_cache import PathFidCache
+
+
+def make_cache(tmp_path, max_size=2000) -> PathFidCache:
+    cache = PathFidCache("fid_cache.json", max_size=max_size)
+    cache._cache_file = str(tmp_path / "fid_cache.json")
+    return cache
+
+
+def test_lru_eviction(tmp_path):
+    cache = make_cache(tmp_path, max_size=2)
+    cache.set("/a", "1")
+    cache.set("/b", "2")
+    assert cache.get("/a") == "1"
+    cache.set("/c", "3")
+    # /b 最久未使用，被淘汰
+    assert cache.get("/b") is None
+    assert cache.get("/a") == "1"
+    assert cache.get("/c") == "3"
+    assert cache.get("/") == PathFidCache.ROOT_FID
+
+
+def test_invalidate_prefix_and_fids(tmp_path):
+    cache = make_cache(tmp_path)
+    for path, fid in {"/tv": "1", "/tv/show": "2", "/tv/show/s1": "3", "/tvx": "4", "/movie": "5"}.items():
+        cache.set(path, fid)
+    cache.invalidate("/tv/")
+    assert [cache.get(p) for p in ("/tv", "/tv/show", "/tv/show/s1")] == [None, None, None]
+    # 仅前缀字符串相同的兄弟目录不受影响
+    assert cache.get("/tvx") == "4"
+
+    cache.set("/movie/a", "6")
+    cache.invalidate_fids(["5"])
+    assert cache.get("/movie") is None
+    assert cache.get("/movie/a") is None
+    assert cache.get("/tvx") == "4"
+
+
+def test_account_switch_clears_entries(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.bind_account("account1")
+    cache.set("/a", "1")
+    cache.bind_account("account1")
+    assert cache.get("/a") == "1"
+    cache.bind_account("account2")
+    assert cache.get("/a") is None
+    assert len(cache) == 0
+
+
+def test_flush_and_reload(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.bind_account("account1")
+    cache.set("//a//b/", "1")
+    cache.set("/c", "2")
+    cache.flush()
+
+    reloaded = make_cache(tmp_path)
+    assert reloaded.get("/a/b") == "1"
+    assert reloaded.get("/c") == "2"
+    reloaded.bind_account("account1")
+    assert len(reloaded) == 2
+    # 切换账号后写回，旧账号的条目不会再被加载
+    reloaded.bind_account("account2")
+    reloaded.flush()
+    assert len(make_cache(tmp_path)) == 0
+
+
+def test_flush_skips_unchanged(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.flush()
+    assert not (tmp_path / "fid_cache.json").exists()
+    cache.set("/a", "1")
+    cache.flush()
+    mtime = (tmp_path / "fid_cache.json").stat().st_mtime_ns
+    cache.set("/a", "1")
+    cache.flush()
+    assert (tmp_path / "fid_cache.json").stat().st_mtime_ns == mtime
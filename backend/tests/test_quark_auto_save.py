@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from task.quark_auto_save import QuarkAutoSave
+from task.task_context import TaskRunContext
+from utils.config_manager import config_manager
+from utils.magic_rename import MagicRename
+
+
+class FakeSDK:
+    """前 throttled 次重命名返回限流"""
+
+    cookie = "__pus=test"
+
+    def __init__(self, throttled: int):
+        self.throttled = throttled
+        self.calls = []
+
+    async def rename_file(self, fid, name):
+        self.calls.append((fid, name))
+        if len(self.calls) <= self.throttled:
+            return {"status": 429, "code": 32003, "message": "请求过于频繁"}
+        return {"code": 0}
+
+
+@pytest.fixture
+def auto_save(monkeypatch):
+    scheduler_config = config_manager.get_config().setdefault("scheduler", {})
+    monkeypatch.setitem(scheduler_config, "quark_rename_rate", 5)
+    saver = QuarkAutoSave()
+    monkeypatch.setattr(saver, "RENAME_RETRY_INTERVAL", 0.01)
+    return saver, scheduler_config
+
+
+def test_rename_retries_after_throttle(auto_save):
+    saver, _ = auto_save
+    sdk = FakeSDK(throttled=2)
+    saver.helper = SimpleNamespace(sdk=sdk)
+    files = [{"file_name": "a.mp4", "file_name_re": "S01E01.mp4"}]
+
+    results = asyncio.run(saver._rename_saved_files({"a.mp4": "fid1"}, files))
+    assert results[0]["status"] == "renamed"
+    assert len(sdk.calls) == 3
+
+
+def test_rename_gives_up_after_max_retries(auto_save):
+    saver, _ = auto_save
+    sdk = FakeSDK(throttled=100)
+    saver.helper = SimpleNamespace(sdk=sdk)
+    files = [{"file_name": "a.mp4", "file_name_re": "S01E01.mp4"}]
+
+    results = asyncio.run(saver._rename_saved_files({"a.mp4": "fid1"}, files))
+    assert results[0]["status"] == "failed"
+    assert len(sdk.calls) == QuarkAutoSave.RENAME_MAX_RETRIES + 1
+
+
+def test_zero_rename_rate_disables_limiter(auto_save, monkeypatch):
+    saver, scheduler_config = auto_save
+    saver.helper = SimpleNamespace(sdk=FakeSDK(throttled=0))
+    assert saver._rename_limiter() is not None
+    monkeypatch.setitem(scheduler_config, "quark_rename_rate", 0)
+    assert saver._rename_limiter() is None
+
+    files = [{"file_name": f"{i}.mp4", "file_name_re": f"S01E{i:02d}.mp4"} for i in range(20)]
+    results = asyncio.run(saver._rename_saved_files({f["file_name"]: f"fid{i}" for i, f in enumerate(files)}, files))
+    assert all(r["status"] == "renamed" for r in results)
+
+
+class ListingSDK:
+    """分享目录与目标目录列表"""
+
+    cookie = "__pus=test"
+
+    def __init__(self, share_files, target_files):
+        self.share_files = share_files
+        self.target_files = target_files
+
+    async def get_share_file_list(self, pwd_id, stoken, pdir_fid):
+        return {"code": 0, "data": {"list": self.share_files}}
+
+    async def get_fids(self, paths):
+        return [{"file_path": path, "fid": f"fid-{path}"} for path in paths]
+
+    async def get_file_list(self, fid, recursive=False):
+        return {"code": 0, "data": {"list": self.target_files}}
+
+
+def test_check_dir_plans_names_in_one_batch(auto_save, monkeypatch):
+    saver, _ = auto_save
+    share_files = [
+        {"fid": f"s{i}", "file_name": f"Show.S01E{i:02d}.mp4", "dir": False, "share_fid_token": "t"}
+        for i in range(1, 6)
+    ]
+    saver.helper = SimpleNamespace(sdk=ListingSDK(share_files, [{"file_name": "S01E01.mp4"}]))
+    batch_calls = []
+    original = MagicRename.batch_sub
+
+    def batch_sub(self, pattern, replace, file_names):
+        batch_calls.append(list(file_names))
+        return original(self, pattern, replace, file_names)
+
+    def sub(self, pattern, replace, file_name):
+        raise AssertionError("应使用 batch_sub 一次算出整个列表")
+
+    monkeypatch.setattr(MagicRename, "batch_sub", batch_sub)
+    monkeypatch.setattr(MagicRename, "sub", sub)
+    ctx = TaskRunContext({
+        "name": "Show",
+        "params": {"targetDir": "/Show", "pattern": r".*(S\d+E\d+).*\.mp4", "replace": r"\1.mp4"},
+    })
+
+    asyncio.run(saver._check_dir(ctx, "pwd", "stoken"))
+    assert batch_calls == [[f["file_name"] for f in share_files]]
+    saved = ctx.save_batches["fid-/Show"]
+    # 替换后已存在的 S01E01 不再保存
+    assert [f["file_name_re"] for f in saved] == [f"S01E{i:02d}.mp4" for i in range(2, 6)]
@@ -0,0 +1,60 @@
+import asyncio
+
+from utils.quark_sdk import QuarkSDK
+
+
+def make_sdk(monkeypatch, total: int, server_page_size: int) -> QuarkSDK:
+    """分页接口把单页条目数限制为 server_page_size"""
+    sdk = QuarkSDK(cookie="__pus=test", page_size=100)
+    items = [{"fid": str(i), "file_name": f"{i}.mp4", "dir": False} for i in range(total)]
+
+    async def send_request(method, url, **kwargs):
+        params = kwargs.get("params") or {}
+        page = int(params.get("_page", 1))
+        size = min(int(params.get("_size", 50)), server_page_size)
+        return {
+            "code": 0,
+            "data": {"list": items[(page - 1) * size:page * size]},
+            "metadata": {"_total": total, "_page": page, "_size": size},
+        }
+
+    monkeypatch.setattr(sdk, "_send_request", send_request)
+    return sdk
+
+
+def test_file_list_merges_all_pages_when_server_caps_page_size(monkeypatch):
+    sdk = make_sdk(monkeypatch, total=150, server_page_size=50)
+    response = asyncio.run(sdk.get_file_list("0"))
+    assert response["code"] == 0
+    assert len(response["data"]["list"]) == response["metadata"]["_total"]
+    assert [item["fid"] for item in response["data"]["list"]] == [str(i) for i in range(150)]
+
+
+def test_iter_file_list_yields_every_entry(monkeypatch):
+    sdk = make_sdk(monkeypatch, total=230, server_page_size=100)
+
+    async def run():
+        return [item async for entries in sdk.iter_file_list("0") for item in entries]
+
+    assert len(asyncio.run(run())) == 230
+
+
+def test_task_status_keeps_polling_through_query_errors(monkeypatch):
+    sdk = QuarkSDK(cookie="__pus=test")
+    monkeypatch.setattr(sdk, "TASK_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(sdk, "TASK_POLL_MAX_INTERVAL", 0.01)
+    responses = [
+        {"status": 429, "code": 32003, "message": "请求过于频繁"},
+        {"status": 500, "code": 1, "message": "请求异常"},
+        {"status": 200, "code": 0, "data": {"status": 0}},
+        {"status": 200, "code": 0, "data": {"status": 2, "save_as": {"save_as_top_fids": ["a"]}}},
+    ]
+
+    async def send_request(method, url, **kwargs):
+        return responses.pop(0)
+
+    monkeypatch.setattr(sdk, "_send_request", send_request)
+    result = asyncio.run(sdk.get_task_status("task1"))
+    assert result["code"] == 0
+    assert result["data"]["status"] == 2
+    assert not responses
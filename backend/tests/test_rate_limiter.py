@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+from utils.rate_limiter import TokenBucket, get_token_bucket
+
+
+def test_burst_then_paced():
+    bucket = TokenBucket(rate=20, capacity=5)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        burst = time.monotonic() - start
+        for _ in range(4):
+            await bucket.acquire()
+        return burst, time.monotonic() - start
+
+    burst, total = asyncio.run(run())
+    # 容量内的请求不等待，之后按 20 个/秒补充
+    assert burst < 0.05
+    assert total >= 4 / 20 * 0.9
+
+
+def test_drain_makes_next_acquire_wait():
+    bucket = TokenBucket(rate=10)
+    bucket.drain()
+    assert bucket.tokens < 1
+
+    async def run():
+        start = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_shared_bucket_updates_rate():
+    first = get_token_bucket("test_shared_bucket", 5)
+    second = get_token_bucket("test_shared_bucket", 10)
+    assert first is second
+    assert second.rate == 10
+    assert second.capacity == 10
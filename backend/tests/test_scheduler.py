@@ -0,0 +1,156 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import utils.scheduler as scheduler_module
+from utils.scheduled_manager import scheduled_manager
+from utils.scheduler import TaskScheduler
+
+
+def test_waiting_for_type_slot_does_not_hold_global_slot():
+    scheduler = TaskScheduler()
+    running = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+
+    async def handler(task):
+        kind = task["task"]
+        running[kind] += 1
+        peak[kind] = max(peak[kind], running[kind])
+        await asyncio.sleep(0.05)
+        running[kind] -= 1
+
+    async def run():
+        scheduler._worker_semaphore = asyncio.Semaphore(5)
+        scheduler._type_semaphores = {"a": asyncio.Semaphore(1)}
+        tasks = [{"task": "a"}] * 6 + [{"task": "b"}] * 4
+        await asyncio.gather(*(scheduler._run_in_pool(t["task"], handler, t) for t in tasks))
+
+    try:
+        asyncio.run(run())
+    finally:
+        scheduler._worker_semaphore = None
+        scheduler._type_semaphores = {}
+    assert peak["a"] == 1
+    # 排队中的 a 任务不占全局名额，b 任务可以用满剩余的 4 个名额
+    assert peak["b"] == 4
+
+
+class FakeScheduledManager:
+    """内存中的定时任务配置，变更时通知监听器"""
+
+    def __init__(self):
+        self.tasks = {}
+        self.listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def get_enabled_tasks(self):
+        return [task for task in self.tasks.values() if task.get("enabled")]
+
+    def get_task_by_name(self, name):
+        return self.tasks.get(name)
+
+    def get_next_run_time(self, task, base_time=None):
+        return scheduled_manager.get_next_run_time(task, base_time)
+
+    def save(self, task):
+        self.tasks[task["name"]] = task
+        for listener in self.listeners:
+            listener(task["name"])
+
+    def delete(self, name):
+        del self.tasks[name]
+        for listener in self.listeners:
+            listener(name)
+
+
+@pytest.fixture
+def fake_manager(monkeypatch):
+    manager = FakeScheduledManager()
+    monkeypatch.setattr(scheduler_module, "scheduled_manager", manager)
+    scheduler = TaskScheduler()
+    monkeypatch.setattr(scheduler, "_timer_heap", [])
+    monkeypatch.setattr(scheduler, "_next_runs", {})
+    monkeypatch.setattr(scheduler, "_last_run_times", {})
+    monkeypatch.setattr(scheduler, "_dirty_tasks", set())
+    monkeypatch.setattr(scheduler, "_loop", None)
+    monkeypatch.setattr(scheduler, "_wakeup_event", None)
+    return manager
+
+
+def test_stale_heap_entries_are_skipped(fake_manager):
+    scheduler = TaskScheduler()
+    now = datetime(2026, 1, 1, 12, 0)
+    task = {"name": "t", "enabled": True, "cron": "*/5 * * * *"}
+    fake_manager.tasks["t"] = task
+    scheduler._last_run_times["t"] = now
+    scheduler._schedule_task(task, now)
+    # 修改 cron 后旧条目留在堆中，只有新的执行时间有效
+    task["cron"] = "*/10 * * * *"
+    scheduler._schedule_task(task, now)
+    assert len(scheduler._timer_heap) == 2
+    assert scheduler._next_runs["t"] == datetime(2026, 1, 1, 12, 10)
+
+    assert scheduler._pop_due_tasks(datetime(2026, 1, 1, 12, 7)) == []
+    assert scheduler._pop_due_tasks(datetime(2026, 1, 1, 12, 10)) == [task]
+    # 下次执行时间从本次调度时间算起
+    assert scheduler._next_runs["t"] == datetime(2026, 1, 1, 12, 20)
+
+
+def test_disabled_task_leaves_heap(fake_manager):
+    scheduler = TaskScheduler()
+    task = {"name": "t", "enabled": True, "cron": "* * * * *"}
+    fake_manager.tasks["t"] = task
+    scheduler._schedule_task(task)
+    task["enabled"] = False
+    scheduler._schedule_task(task)
+    assert "t" not in scheduler._next_runs
+    assert scheduler._pop_due_tasks(datetime.now() + timedelta(days=1)) == []
+    assert scheduler._timer_heap == []
+    scheduler._rebuild_timer_heap()
+    assert scheduler._timer_heap == []
+
+
+def test_task_changes_wake_scheduler(fake_manager, monkeypatch):
+    scheduler = TaskScheduler()
+    dispatched = []
+    monkeypatch.setattr(scheduler, "_dispatch_batch", lambda tasks: dispatched.extend(t["name"] for t in tasks))
+    monkeypatch.setattr(scheduler, "_max_sleep_seconds", 60)
+
+    async def until(condition):
+        for _ in range(100):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        raise AssertionError("调度循环没有被唤醒")
+
+    async def run():
+        scheduler._running = True
+        loop_task = asyncio.create_task(scheduler._check_and_execute_tasks())
+        try:
+            await asyncio.sleep(0.05)
+            # 新增任务立即执行一次，之后等待下一个 cron 时间
+            fake_manager.save({"name": "t", "enabled": True, "cron": "0 0 1 1 *"})
+            await until(lambda: dispatched == ["t"])
+            # 修改 cron 重新计算执行时间
+            fake_manager.save({"name": "t", "enabled": True, "cron": "0 0 1 2 *"})
+            await until(lambda: scheduler._next_runs.get("t", datetime.min).month == 2)
+            # 禁用后移出调度，重新启用立即执行
+            fake_manager.save({"name": "t", "enabled": False, "cron": "0 0 1 2 *"})
+            await until(lambda: "t" not in scheduler._next_runs)
+            fake_manager.save({"name": "t", "enabled": True, "cron": "0 0 1 2 *"})
+            await until(lambda: dispatched == ["t", "t"])
+            fake_manager.delete("t")
+            await until(lambda: "t" not in scheduler._next_runs)
+        finally:
+            scheduler._running = False
+            scheduler._wakeup()
+            await loop_task
+
+    asyncio.run(run())
+    assert dispatched == ["t", "t"]
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from utils.task_tracker import TaskTimeoutError, TaskTracker
+
+
+class FakeTasks:
+    """任务在第 finish_after 次查询时结束"""
+
+    def __init__(self, finish_after=None):
+        self.finish_after = finish_after or {}
+        self.calls = []
+
+    async def check(self, task_id, attempt):
+        self.calls.append((task_id, attempt))
+        done = attempt + 1 >= self.finish_after.get(task_id, float("inf"))
+        return done, {"task_id": task_id, "attempt": attempt}
+
+
+def make_tracker(tasks, **kwargs):
+    options = {"initial_interval": 0.01, "max_interval": 0.02, "jitter": 0, "timeout": 5}
+    options.update(kwargs)
+    return TaskTracker(tasks.check, **options)
+
+
+def test_multiplexes_tasks_and_waiters():
+    tasks = FakeTasks({"a": 3, "b": 1})
+    tracker = make_tracker(tasks)
+
+    async def run():
+        results = await asyncio.gather(tracker.wait("a"), tracker.wait("a"), tracker.wait("b"))
+        return results, tracker._poller
+
+    (a1, a2, b), poller = asyncio.run(run())
+    assert a1 == a2 == {"task_id": "a", "attempt": 2}
+    assert b == {"task_id": "b", "attempt": 0}
+    # 同一任务的两个等待方共用查询
+    assert [c for c in tasks.calls if c[0] == "a"] == [("a", 0), ("a", 1), ("a", 2)]
+    assert tracker.pending == 0
+    assert poller.done()
+
+
+def test_deadline_raises_task_timeout_error():
+    tasks = FakeTasks()
+    tracker = make_tracker(tasks)
+
+    with pytest.raises(TaskTimeoutError) as exc_info:
+        asyncio.run(tracker.wait("slow", timeout=0.1))
+    assert exc_info.value.task_id == "slow"
+    assert exc_info.value.last_result["task_id"] == "slow"
+    assert tracker.pending == 0
+
+
+def test_cancelled_waiter_does_not_affect_others():
+    tasks = FakeTasks({"a": 5})
+    tracker = make_tracker(tasks)
+
+    async def run():
+        first = asyncio.create_task(tracker.wait("a"))
+        second = asyncio.create_task(tracker.wait("a"))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        result = await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return result
+
+    assert asyncio.run(run())["attempt"] == 4
+
+
+def test_reset_backoff_restores_initial_interval():
+    tracker = None
+    intervals = []
+
+    async def check(task_id, attempt):
+        intervals.append(tracker._tasks[task_id].interval)
+        if attempt == 2:
+            tracker.reset_backoff(task_id)
+        return attempt >= 4, attempt
+
+    tracker = TaskTracker(check, initial_interval=0.01, max_interval=1, jitter=0, timeout=5)
+    assert asyncio.run(tracker.wait("a")) == 4
+    # 每次查询后间隔翻倍，第 3 次查询中重置后从初始值重新开始
+    assert intervals == pytest.approx([0.01, 0.02, 0.04, 0.02, 0.04])
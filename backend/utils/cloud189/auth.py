@@ -1,12 +1,12 @@
 """天翼云盘认证客户端"""
 
 import re
-import json
 import time
 from typing import Dict, Any, Optional, Tuple
 from urllib.parse import urlencode
 
 from loguru import logger
+from utils import json_codec
 from utils.http_client import http_client
 
 from .const import *
@@ -29,7 +29,7 @@ class CloudAuthClient:
         response = await self.request.post(
             f"{AUTH_URL}/api/logbox/config/encryptConf.do"
         )
-        data = json.loads(response)
+        data = json_codec.loads(response)
         return data.get("data", {})
 
     async def get_login_form(self) -> LoginFormCache:
@@ -136,7 +136,7 @@ class CloudAuthClient:
                     session[field.lower()] = match.group(1)
             return session
             
-        return json.loads(response)
+        return json_codec.loads(response)
 
     async def login_by_password(self, username: str, password: str) -> TokenSession:
         """
@@ -168,7 +168,7 @@ class CloudAuthClient:
                 data=form_data,
                 headers=headers,
             )
-            login_result = json.loads(response)
+            login_result = json_codec.loads(response)
             logger.info(f"登录结果: {login_result}")
             
             # 3. 获取会话信息
@@ -236,4 +236,4 @@ class CloudAuthClient:
             f"{AUTH_URL}/api/oauth2/refreshToken.do",
             data=form_data
         )
-        return json.loads(response) 
\ No newline at end of file
+        return json_codec.loads(response) 
\ No newline at end of file
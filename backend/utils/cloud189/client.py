@@ -2,17 +2,20 @@
 
 import random
 import re
-import json
 import time
 from datetime import datetime
-from typing import Dict, List, Optional, Union, Tuple, Any
+from typing import Dict, List, Optional, Union, Tuple, Any, AsyncIterator
 from urllib.parse import urlparse, parse_qs, unquote
 from urllib.parse import urlparse as parse_url
 import asyncio
+import contextvars
 
 from loguru import logger
+from utils import json_codec
 from utils.http_client import http_client
 from utils.config_manager import ConfigManager
+from utils.session_cache import validated_sessions
+from utils.task_tracker import TaskTracker, TaskTimeoutError
 
 from .const import *
 from .error import *
@@ -20,9 +23,20 @@ from .types import *
 from .auth import CloudAuthClient
 from .util import get_signature
 
+# 当前协程是否处于登录流程中，登录过程中发出的请求遇到会话失效时不再触发刷新
+_in_login: contextvars.ContextVar[bool] = contextvars.ContextVar("cloud189_in_login", default=False)
+
+SESSION_ERROR_CODES = ("InvalidAccessToken", "InvalidSessionKey")
+
 class Cloud189Client:
     """天翼云盘客户端"""
 
+    # 会话失效时单个请求最多刷新重试的次数
+    MAX_SESSION_RETRIES = 2
+    BATCH_TASK_POLL_INTERVAL = 0.5  # 批量任务状态首次重试间隔（秒）
+    BATCH_TASK_POLL_MAX_INTERVAL = 5  # 批量任务状态最大重试间隔（秒）
+    BATCH_TASK_TIMEOUT = 120  # 等待批量任务完成的最长时间（秒）
+
     def __init__(self, username: str = "", password: str = "", cookies: str = "", sson_cookie: str = ""):
         """
         初始化客户端
@@ -39,20 +53,40 @@ class Cloud189Client:
         self.session: Optional[ClientSession] = None
         self.user_info: Optional[UserInfo] = None
         self.config_manager = ConfigManager()
+        # 同一时间只允许一个登录流程，会话每替换一次代数加一
+        self._login_lock = asyncio.Lock()
+        self._session_generation = 0
+        self._login_ok = False
+        # 同一账号的批量任务共用一个跟踪器，{任务ID: 任务类型}
+        self._batch_tracker: Optional[TaskTracker] = None
+        self._batch_task_types: Dict[str, str] = {}
 
-    def _load_session_from_config(self) -> bool:
-        """从配置文件加载session"""
+    def _load_session_from_config(self, stale_token: str = "") -> bool:
+        """
+        从配置文件加载session
+        :param stale_token: 已确认失效的 access_token，配置中仍是它时不再加载
+        """
         config = self.config_manager.get_config()
         cloud189_session = config.get("cloud189_session")
         
         if cloud189_session:
             # 检查session是否过期
             expires_in = cloud189_session.get("expires_in", 0)
-            if expires_in > time.time():
-                self.session = cloud189_session
+            if expires_in > time.time() and not (stale_token and cloud189_session.get("access_token") == stale_token):
+                self._set_session(cloud189_session)
                 return True
         return False
 
+    def _set_session(self, session: Optional[Dict[str, Any]]):
+        """替换当前会话，正在等待刷新的请求通过代数判断会话是否已更新"""
+        if (session or {}).get("access_token") != (self.session or {}).get("access_token"):
+            self._session_generation += 1
+        self.session = session
+
+    def _session_cache_key(self) -> str:
+        """当前会话在已验证会话缓存中的键，任务与接口的客户端实例共用"""
+        return validated_sessions.make_key("cloud189", (self.session or {}).get("access_token", ""))
+
     def _save_session_to_config(self):
         """保存session到配置文件"""
         if self.session:
@@ -64,16 +98,21 @@ class Cloud189Client:
         self,
         method: str,
         url: str,
+        _session_retries: int = 0,
         **kwargs
     ) -> Dict[str, Any]:
         """
         发送 HTTP 请求
         :param method: 请求方法
         :param url: 请求地址
+        :param _session_retries: 会话失效后已刷新重试的次数
         :param kwargs: 其他参数
         :return: 响应数据
         :raises: NetworkError 当请求失败时
         """
+        # 保留原始参数，会话刷新后用新会话重新签名
+        retry_kwargs = {**kwargs, "params": dict(kwargs["params"])} if kwargs.get("params") else dict(kwargs)
+        generation = self._session_generation
         headers = DEFAULT_HEADERS.copy()
         
         # 添加基础headers
@@ -176,21 +215,25 @@ class Cloud189Client:
             )
                         
             if isinstance(response, str):
-                data = json.loads(response)
+                data = json_codec.loads(response)
                 
                 # 处理token失效
-                if isinstance(data, dict):
+                if isinstance(data, dict) and data.get("errorCode") in SESSION_ERROR_CODES:
                     error_code = data.get("errorCode")
-                    if error_code == "InvalidAccessToken":
-                        logger.debug("AccessToken已失效,正在刷新...")
-                        await self.login()
-                        return await self._send_request(method, url, **kwargs)
-                    elif error_code == "InvalidSessionKey":
-                        logger.debug("SessionKey已失效,正在刷新...")
-                        await self.login()
-                        return await self._send_request(method, url, **kwargs)
+                    validated_sessions.invalidate(self._session_cache_key())
+                    # 登录流程内的请求或重试次数用尽时直接报错，避免无限递归
+                    if _in_login.get() or _session_retries >= self.MAX_SESSION_RETRIES:
+                        raise AuthError(f"会话已失效: {error_code}", error_code)
+                    logger.debug(f"{error_code} 已失效,正在刷新...")
+                    if not await self._refresh_session(generation):
+                        raise AuthError(f"会话刷新失败: {error_code}", error_code)
+                    return await self._send_request(
+                        method, url, _session_retries=_session_retries + 1, **retry_kwargs
+                    )
                         
                 check_error(data)
+                if self.session:
+                    validated_sessions.touch(self._session_cache_key())
                 return data
                 
             return response
@@ -199,17 +242,58 @@ class Cloud189Client:
             logger.error(f"请求失败: {str(e)}")
             raise NetworkError(f"请求失败: {str(e)}")
 
+    async def _refresh_session(self, generation: int) -> bool:
+        """
+        刷新失效的会话，并发的刷新请求只会触发一次登录
+        :param generation: 请求发出时的会话代数，会话已被其他请求刷新时直接返回
+        :return: 是否已有可用的新会话
+        """
+        async with self._login_lock:
+            if generation != self._session_generation:
+                return self.session is not None
+            stale_token = (self.session or {}).get("access_token", "")
+            token = _in_login.set(True)
+            try:
+                return await self._login(stale_token)
+            finally:
+                _in_login.reset(token)
+
     async def login(self) -> bool:
         """
-        登录并初始化客户端
+        登录并初始化客户端，并发调用时只执行一次登录
         :return: 是否登录成功
         """
+        generation = self._session_generation
+        async with self._login_lock:
+            # 等待期间其他调用方已完成登录，直接复用结果
+            if generation != self._session_generation:
+                return self._login_ok
+            token = _in_login.set(True)
+            try:
+                return await self._login()
+            finally:
+                _in_login.reset(token)
+
+    async def _login(self, stale_token: str = "") -> bool:
+        """
+        执行登录，调用方需持有登录锁
+        :param stale_token: 已失效的 access_token，配置文件中仍是它时跳过加载
+        :return: 是否登录成功
+        """
+        self._login_ok = False
         try:
             # 首先尝试从配置文件加载session
-            if self._load_session_from_config():
+            if self._load_session_from_config(stale_token):
                 logger.info("从配置文件加载session成功")
+                # 有效期内验证过的session直接复用，不再请求用户信息
+                user_info = validated_sessions.get(self._session_cache_key())
+                if user_info:
+                    self.user_info = user_info
+                    self._login_ok = True
+                    return True
                 # 验证session是否有效
                 if await self.init():
+                    self._login_ok = True
                     return True
                 logger.info("配置文件中的session已失效，尝试重新登录")
             
@@ -231,17 +315,18 @@ class Cloud189Client:
             if not session:
                 return False
                 
-            self.session = {
+            self._set_session({
                 "access_token": session["accesstoken"],
                 "session_key": session["sessionkey"],
                 "expires_in": int(time.time() + 6 * 24 * 60 * 60)
-            }
+            })
             
             # 保存session到配置文件
             self._save_session_to_config()
             
             # 获取用户信息
-            return await self.init()
+            self._login_ok = await self.init()
+            return self._login_ok
             
         except Exception as e:
             logger.error(f"登录失败：{str(e)}")
@@ -260,6 +345,7 @@ class Cloud189Client:
                     "cloud_capacity_info": info.get("cloudCapacityInfo", {}),
                     "family_capacity_info": info.get("familyCapacityInfo", {})
                 }
+                validated_sessions.mark(self._session_cache_key(), self.user_info)
                 return True
             return False
         except Exception as e:
@@ -285,6 +371,81 @@ class Cloud189Client:
         )
         return result
 
+    async def _iter_list_pages(
+        self,
+        url: str,
+        params: Dict[str, Any],
+        page_size: int = LIST_PAGE_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        逐页请求列表接口，直到取满 fileListAO.count 条或返回空页
+        :param url: 请求地址
+        :param params: 除分页参数外的请求参数
+        :param page_size: 分页大小
+        :return: 异步迭代器，每次产出一页的完整响应
+        """
+        page_num = 1
+        fetched = 0
+        while True:
+            result = await self._send_request(
+                "GET",
+                url,
+                params={**params, "pageNum": page_num, "pageSize": page_size}
+            )
+            yield result
+
+            file_list_ao = result.get("fileListAO", {})
+            page_count = len(file_list_ao.get("fileList", [])) + len(file_list_ao.get("folderList", []))
+            fetched += page_count
+            if page_count == 0 or fetched >= file_list_ao.get("count", 0):
+                break
+            page_num += 1
+
+    async def _merge_list_pages(self, pages: AsyncIterator[Dict[str, Any]]) -> Dict[str, Any]:
+        """合并所有分页的文件和文件夹列表，返回首页响应结构"""
+        response = None
+        file_list = []
+        folder_list = []
+        async for result in pages:
+            if response is None:
+                response = result
+            file_list_ao = result.get("fileListAO", {})
+            file_list.extend(file_list_ao.get("fileList", []))
+            folder_list.extend(file_list_ao.get("folderList", []))
+
+        if response and "fileListAO" in response:
+            response["fileListAO"]["fileList"] = file_list
+            response["fileListAO"]["folderList"] = folder_list
+        return response
+
+    def _share_dir_params(
+        self,
+        share_id: str,
+        file_id: str,
+        share_mode: str,
+        access_code: str,
+        is_folder: bool
+    ) -> Dict[str, Any]:
+        """构建分享目录列表请求参数"""
+        return {
+            "shareId": share_id,
+            "fileId": file_id,
+            "isFolder": is_folder,
+            "orderBy": "lastOpTime",
+            "descending": True,
+            "shareMode": share_mode,
+            "accessCode": access_code
+        }
+
+    def _folder_params(self, folder_id: str) -> Dict[str, Any]:
+        """构建文件列表请求参数"""
+        return {
+            "folderId": folder_id,
+            "mediaType": 0,
+            "orderBy": "lastOpTime",
+            "descending": True
+        }
+
     async def list_share_files(
         self,
         share_id: str,
@@ -294,48 +455,65 @@ class Cloud189Client:
         is_folder: bool = True
     ) -> List[FileInfo]:
         """
-        获取分享文件列表
+        获取分享文件列表（自动合并所有分页）
         :param share_id: 分享ID
         :param file_id: 文件ID
         :param share_mode: 分享模式
         :param access_code: 访问码
         """
-        result = await self._send_request(
-            "GET",
+        return await self._merge_list_pages(self.iter_share_files(
+            share_id, file_id, share_mode, access_code, is_folder
+        ))
+
+    async def iter_share_files(
+        self,
+        share_id: str,
+        file_id: str = ROOT_FOLDER_ID,
+        share_mode: str = "1",
+        access_code: str = "",
+        is_folder: bool = True,
+        page_size: int = LIST_PAGE_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        逐页获取分享文件列表
+        :param share_id: 分享ID
+        :param file_id: 文件ID
+        :param share_mode: 分享模式
+        :param access_code: 访问码
+        :param page_size: 分页大小
+        :return: 异步迭代器，每次产出一页响应，条目位于 fileListAO.fileList / fileListAO.folderList
+        """
+        async for result in self._iter_list_pages(
             f"{WEB_URL}/api/open/share/listShareDir.action",
-            params={
-                "shareId": share_id,
-                "fileId": file_id,
-                "isFolder": is_folder,
-                "orderBy": "lastOpTime",
-                "descending": True,
-                "shareMode": share_mode,
-                "pageNum": 1,
-                "pageSize": 1000,
-                "accessCode": access_code
-            }
-        )
-        
-        return result
+            self._share_dir_params(share_id, file_id, share_mode, access_code, is_folder),
+            page_size
+        ):
+            yield result
 
     async def list_files(self, folder_id: str = ROOT_FOLDER_ID) -> FileListResponse:
         """
-        获取文件列表
+        获取文件列表（自动合并所有分页）
         :param folder_id: 文件夹ID
         """
-        result = await self._send_request(
-            "GET",
+        return await self._merge_list_pages(self.iter_files(folder_id))
+
+    async def iter_files(
+        self,
+        folder_id: str = ROOT_FOLDER_ID,
+        page_size: int = LIST_PAGE_SIZE
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        逐页获取文件列表
+        :param folder_id: 文件夹ID
+        :param page_size: 分页大小
+        :return: 异步迭代器，每次产出一页响应，条目位于 fileListAO.fileList / fileListAO.folderList
+        """
+        async for result in self._iter_list_pages(
             f"{WEB_URL}/api/open/file/listFiles.action",
-            params={
-                "folderId": folder_id,
-                "mediaType": 0,
-                "orderBy": "lastOpTime",
-                "descending": True,
-                "pageNum": 1,
-                "pageSize": 1000
-            }
-        )
-        return result
+            self._folder_params(folder_id),
+            page_size
+        ):
+            yield result
 
     async def create_batch_task(self, task_params: BatchTaskParams) -> TaskResponse:
         """
@@ -345,7 +523,7 @@ class Cloud189Client:
         # 构建表单数据
         form_data = {
             "type": task_params["type"],
-            "taskInfos": json.dumps(task_params["taskInfos"], ensure_ascii=False),  # 将taskInfos转为JSON字符串
+            "taskInfos": json_codec.dumps(task_params["taskInfos"]),  # 将taskInfos转为JSON字符串
             "targetFolderId": task_params["targetFolderId"],
             **({"shareId": task_params["shareId"]} if "shareId" in task_params else {})
         }                
@@ -410,12 +588,102 @@ class Cloud189Client:
                 "taskId": task_id,
                 "type": TASK_TYPE_SHARE_SAVE,
                 "targetFolderId": target_folder_id,
-                "taskInfos": json.dumps(task_infos, ensure_ascii=False)
+                "taskInfos": json_codec.dumps(task_infos)
             },
             headers={"Content-Type": "application/x-www-form-urlencoded"}
         )
         return result
 
+    async def _resolve_conflict(self, task_id: str):
+        """获取冲突文件并全部设置为跳过(dealWay=1)，任务随后继续执行"""
+        conflict_task_info = await self.get_conflict_task_info(task_id)
+        if not conflict_task_info:
+            raise Cloud189Error("获取冲突任务信息失败")
+        for task_info in conflict_task_info.get("taskInfos", []):
+            task_info["dealWay"] = 1
+        await self.manage_batch_task(
+            task_id,
+            conflict_task_info["targetFolderId"],
+            conflict_task_info.get("taskInfos", [])
+        )
+
+    async def _check_batch_task(self, task_id: str, retry_index: int):
+        """
+        查询批量任务状态，供任务跟踪器调用
+        taskStatus: 1、3 进行中，2 存在冲突，4 完成，其他视为失败
+        """
+        task_type = self._batch_task_types.get(task_id, TASK_TYPE_SHARE_SAVE)
+        status = await self.check_task_status(task_id, task_type)
+        task_status = status.get("taskStatus")
+        if task_status == 2:
+            # 处理冲突后任务重新开始执行，按初始间隔继续查询
+            logger.info(f"任务 {task_id} 存在文件冲突，跳过冲突文件后继续")
+            try:
+                await self._resolve_conflict(task_id)
+            except Exception as e:
+                # 冲突处理失败时任务不会再推进，直接以该错误结束等待，不再重复处理
+                logger.error(f"任务 {task_id} 处理文件冲突失败: {e}")
+                self._batch_tracker.fail(task_id, e if isinstance(e, Cloud189Error) else Cloud189Error(f"处理文件冲突失败: {e}"))
+                return False, status
+            self._batch_tracker.reset_backoff(task_id)
+            return False, status
+        return task_status not in (1, 3), status
+
+    async def wait_batch_task(
+        self,
+        task_id: str,
+        task_type: str = TASK_TYPE_SHARE_SAVE,
+        timeout: Optional[float] = None
+    ) -> TaskResponse:
+        """
+        等待批量任务结束，冲突文件自动跳过
+        :param task_id: 任务ID
+        :param task_type: 任务类型
+        :param timeout: 等待超时时间（秒），默认使用 BATCH_TASK_TIMEOUT
+        :return: 任务结束时的状态
+        :raises TaskTimeoutError: 超时仍未结束
+        """
+        if self._batch_tracker is None:
+            self._batch_tracker = TaskTracker(
+                self._check_batch_task,
+                name="天翼云盘",
+                initial_interval=self.BATCH_TASK_POLL_INTERVAL,
+                max_interval=self.BATCH_TASK_POLL_MAX_INTERVAL,
+                timeout=self.BATCH_TASK_TIMEOUT,
+            )
+        self._batch_task_types[task_id] = task_type
+        try:
+            return await self._batch_tracker.wait(task_id, timeout)
+        finally:
+            self._batch_task_types.pop(task_id, None)
+
+    @staticmethod
+    def find_failed_entries(
+        task_infos: List[Dict[str, Any]],
+        listing: Optional[Dict[str, Any]],
+        task_type: str = TASK_TYPE_SHARE_SAVE
+    ) -> List[Dict[str, Any]]:
+        """
+        对照目标目录的列表找出批量任务中未成功处理的条目
+        :param task_infos: 任务提交的文件信息列表
+        :param listing: list_files 返回的目录列表
+        :param task_type: SHARE_SAVE 时不在目录中的条目视为失败；DELETE 时仍在目录中的条目视为失败
+        :return: 失败的任务条目
+        """
+        file_list_ao = (listing or {}).get("fileListAO", {})
+        entries = file_list_ao.get("fileList", []) + file_list_ao.get("folderList", [])
+        if task_type == "DELETE":
+            remaining_ids = {str(entry.get("id")) for entry in entries}
+            return [info for info in task_infos if str(info.get("fileId")) in remaining_ids]
+
+        # 转存后的文件ID会变化，按 md5（有的话）或文件名判断是否已存在
+        names = {entry.get("name") for entry in entries}
+        md5s = {entry.get("md5") for entry in entries if entry.get("md5")}
+        return [
+            info for info in task_infos
+            if not (info.get("md5") and info["md5"] in md5s) and info.get("fileName") not in names
+        ]
+
     async def search_files(self, filename: str) -> FileListResponse:
         """
         搜索文件
@@ -457,10 +725,12 @@ class Cloud189Client:
         normal = response.get("normal", {})
         url = normal.get("url")
         
-        async with http_client._session.get(
+        # 只需要重定向地址，不读取响应体
+        async with http_client.stream(
+            "GET",
             url,
-            follow_redirects=False,
-            headers=DEFAULT_HEADERS
+            headers=DEFAULT_HEADERS,
+            allow_redirects=False
         ) as res:
             return res.headers.get("location", "")
 
@@ -514,10 +784,17 @@ class Cloud189Client:
         )
         return result
 
-    async def delete_files(self, file_ids: List[BatchTaskInfo]) -> Dict[str, Any]:
+    async def delete_files(
+        self,
+        file_ids: List[BatchTaskInfo],
+        timeout: Optional[float] = None,
+        folder_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         删除文件或文件夹
         :param file_ids: 要删除的文件信息列表，格式为：[{"fileId": "xxx", "fileName": "xxx", "isFolder": 1}]
+        :param timeout: 等待任务完成的超时时间（秒），默认使用 BATCH_TASK_TIMEOUT
+        :param folder_id: 文件所在文件夹ID，提供时只列出一次该文件夹来确认删除结果，否则逐个搜索文件
         :return: 删除结果
         """
         try:
@@ -530,37 +807,35 @@ class Cloud189Client:
             
             task = await self.create_batch_task(task_params)
             
-            # 检查任务状态
-            start_time = time.time()
-            status = await self.check_task_status(task["taskId"], "DELETE")
-            
             # 等待任务完成
-            while status["taskStatus"] in [1, 3]:  # 1和3表示任务进行中
-                # 检查是否超时(5秒)
-                if time.time() - start_time > 5:
-                    logger.error(f"任务 {task['taskId']} 执行超时")
-                    return {
-                        "message": "文件删除失败：任务执行超时(超过5秒)",
-                        "task_id": task["taskId"],
-                        "status": status
-                    }
-                await asyncio.sleep(.5)  # 暂停0.5秒
-                status = await self.check_task_status(task["taskId"], "DELETE")
+            try:
+                status = await self.wait_batch_task(task["taskId"], "DELETE", timeout)
+            except TaskTimeoutError as e:
+                logger.error(f"任务 {task['taskId']} 执行超时")
+                return {
+                    "message": f"文件删除失败：任务执行超时(超过{timeout or self.BATCH_TASK_TIMEOUT}秒)",
+                    "task_id": task["taskId"],
+                    "status": e.last_result
+                }
             
             # 检查任务结果
             if status["taskStatus"] == 4:  # 4表示任务成功完成
                 # 检查是否有失败的文件
                 if status.get("failedCount", 0) > 0:
-                    failed_files = []
-                    for file in file_ids:
-                        # 检查文件是否还存在
-                        try:
-                            search_result = await self.search_files(file.get("fileName", ""))
-                            if any(f.get("fileId") == file.get("fileId") for f in search_result.get("fileList", [])):
-                                failed_files.append(file)
-                        except Exception:
-                            # 如果搜索失败，假设文件已被删除
-                            pass
+                    if folder_id:
+                        # 列出一次所在文件夹，仍在其中的文件即删除失败
+                        failed_files = self.find_failed_entries(file_ids, await self.list_files(folder_id), "DELETE")
+                    else:
+                        failed_files = []
+                        for file in file_ids:
+                            # 检查文件是否还存在
+                            try:
+                                search_result = await self.search_files(file.get("fileName", ""))
+                                if any(f.get("fileId") == file.get("fileId") for f in search_result.get("fileList", [])):
+                                    failed_files.append(file)
+                            except Exception:
+                                # 如果搜索失败，假设文件已被删除
+                                pass
                     
                     # 记录失败的文件信息
                     if failed_files:
@@ -691,6 +966,7 @@ class Cloud189Client:
         shareInfo: Optional[Dict[str, Any]] = None,
         target_folder_id: str = ROOT_FOLDER_ID,
         file_ids: Optional[List[BatchTaskInfo]] = None,
+        timeout: Optional[float] = None,
     ) -> SaveShareResult:
         """
         保存分享文件
@@ -698,6 +974,7 @@ class Cloud189Client:
         :param shareInfo: 分享信息（可选，与share_url二选一）
         :param target_folder_id: 目标文件夹ID
         :param file_ids: 要保存的文件信息列表
+        :param timeout: 等待任务完成的超时时间（秒），默认使用 BATCH_TASK_TIMEOUT
         :return: 保存结果
         """
         try:
@@ -750,74 +1027,23 @@ class Cloud189Client:
             # 创建任务
             task = await self.create_batch_task(task_params)
             
-            # 检查任务状态
-            start_time = time.time()
-            status = await self.check_task_status(task["taskId"])
-            while status["taskStatus"] in [1, 3]:  # 1和3表示任务进行中
-                # 检查是否超时(1分钟)
-                if time.time() - start_time > 5:
-                    logger.error(f"任务 {task['taskId']} 执行超时")
-                    return {
-                        "message": "文件保存失败：任务执行超时(超过5秒)",
-                        "task_id": task["taskId"],
-                        "status": status
-                    }
-                await asyncio.sleep(.5)  # 暂停2秒
-                status = await self.check_task_status(task["taskId"])
-                
-            if status["taskStatus"] == 2:  # 2表示有文件冲突
-                # 获取冲突任务信息
-                conflict_task_info = await self.get_conflict_task_info(task["taskId"])
-                if not conflict_task_info:
-                    raise Cloud189Error("获取冲突任务信息失败")
-                    
-                # 设置所有冲突文件的处理方式为忽略冲突(dealWay=1)
-                for task_info in conflict_task_info["taskInfos"]:
-                    task_info["dealWay"] = 1
-                    
-                # 处理冲突
-                await self.manage_batch_task(
-                    task["taskId"], 
-                    conflict_task_info["targetFolderId"], 
-                    conflict_task_info["taskInfos"]
-                )
-                
-                # 等待200ms
-                await asyncio.sleep(.5)
+            # 等待任务完成，冲突文件在等待过程中自动跳过
+            try:
+                status = await self.wait_batch_task(task["taskId"], TASK_TYPE_SHARE_SAVE, timeout)
+            except TaskTimeoutError as e:
+                logger.error(f"任务 {task['taskId']} 执行超时")
+                return {
+                    "message": f"文件保存失败：任务执行超时(超过{timeout or self.BATCH_TASK_TIMEOUT}秒)",
+                    "task_id": task["taskId"],
+                    "status": e.last_result
+                }
                 
-                # 继续检查任务状态
-                start_time = time.time()  # 重置开始时间
-                status = await self.check_task_status(task["taskId"])
-                while status["taskStatus"] in [1, 3]:  # 继续等待任务完成
-                    # 检查是否超时(1分钟)
-                    if time.time() - start_time > 5:
-                        logger.error(f"任务 {task['taskId']} 执行超时")
-                        return {
-                            "message": "文件保存失败：任务执行超时(超过5秒)",
-                            "task_id": task["taskId"],
-                            "status": status
-                        }
-                    await asyncio.sleep(0.5)
-                    status = await self.check_task_status(task["taskId"])
-                    
             if status["taskStatus"] == 4:  # 4表示任务成功完成
                 # 检查是否有失败的文件
                 if status.get("failedCount", 0) > 0:
-                    # 获取目标文件夹中的所有文件
+                    # 列出一次目标文件夹，找出未成功保存的文件（可能是被和谐的文件）
                     folder_files = await self.list_files(target_folder_id)
-                    
-                    # 获取原始任务信息中的文件列表
-                    task_files = task_params["taskInfos"]
-                    
-                    # 找出未成功保存的文件（可能是被和谐的文件）
-                    failed_files = []
-                    for task_file in task_files:
-                        file_exists = any(
-                            folder_file.get("md5") == task_file.get("md5")
-                            for folder_file in folder_files
-                        )
-                        if not file_exists:
-                            failed_files.append(task_file)
+                    failed_files = self.find_failed_entries(task_params["taskInfos"], folder_files)
                     
                     # 记录失败的文件信息
                     if failed_files:
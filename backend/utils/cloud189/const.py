@@ -33,6 +33,9 @@ FILE_TYPE_FILE = 2
 # 默认根目录ID
 ROOT_FOLDER_ID = "-11"
 
+# 列表接口单页条目数
+LIST_PAGE_SIZE = 1000
+
 # 批量任务类型
 TASK_TYPE_SHARE_SAVE = "SHARE_SAVE"
 TASK_TYPE_DOWNLOAD = "DOWNLOAD"
@@ -1,12 +1,14 @@
 import os
+import copy
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Callable, Set
 from loguru import logger
 
 class ConfigManager:
     _instance = None
     _config: Dict[str, Any] = {}
+    _listeners: List[Callable[[Set[str]], None]] = []  # 配置变更监听器
     _default_config = {
         # Emby 配置
         "emby_url": "",  # Emby 服务器地址
@@ -31,6 +33,42 @@ class ConfigManager:
         "proxy_port": "",  # 代理端口
         "proxy_username": "",  # 代理用户名（可选）
         "proxy_password": "",  # 代理密码（可选）
+        # 定时任务调度配置
+        "scheduler": {
+            "max_workers": 5,  # 全局最大并发任务数
+            "task_type_limits": {  # 各任务类型的最大并发数
+                "quark_auto_save": 3,
+                "cloud189_auto_save": 3
+            },
+            "quark_folder_concurrency": 3,  # 夸克网盘单账号同时处理的目录数
+            "quark_rename_rate": 5,  # 夸克网盘单账号每秒最多重命名的文件数，0 为不限制
+            "cloud189_folder_concurrency": 3  # 天翼云盘单账号同时处理的目录数
+        },
+        # 按主机的请求策略，hosts 按域名后缀覆盖 default 中的字段
+        "http_policies": {
+            "default": {
+                "max_concurrency": 20,  # 单主机最大并发请求数
+                "rate": 0,  # 单主机每秒请求数，0 为不限制
+                "burst": 0,  # 突发请求数，0 为与 rate 相同
+                "retry_base_delay": 1,  # 首次重试等待（秒），之后按指数增长
+                "retry_max_delay": 10,  # 最大重试等待（秒）
+                "failure_threshold": 5,  # 连续服务端错误/超时多少次后熔断
+                "recovery_timeout": 30  # 熔断持续时间（秒）
+            },
+            "hosts": {
+                "quark.cn": {"max_concurrency": 10, "rate": 20},
+                "189.cn": {"max_concurrency": 10, "rate": 20},
+                "douban.com": {"max_concurrency": 4, "rate": 5},
+                "t.me": {"max_concurrency": 5, "rate": 10}
+            }
+        },
+        # HTTP 连接配置
+        "http_client": {
+            "verify_ssl": False,  # 是否校验证书
+            "pool_limit": 100,  # 最大连接数
+            "pool_limit_per_host": 20,  # 单主机最大连接数
+            "keepalive_timeout": 60  # 空闲连接保持时间（秒）
+        },
         # TG资源配置
         "tg_resource": {
             "telegram": {
@@ -111,6 +149,26 @@ class ConfigManager:
         """获取配置"""
         return self._config
 
+    def add_listener(self, listener: Callable[[Set[str]], None]):
+        """注册配置变更监听器，配置更新后以发生变化的顶层配置项名称集合回调"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Set[str]], None]):
+        """移除配置变更监听器"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify_config_changed(self, keys: Set[str]):
+        """通知监听器配置已变更"""
+        if not keys:
+            return
+        for listener in self._listeners:
+            try:
+                listener(keys)
+            except Exception as e:
+                logger.error(f"配置变更通知失败: {e}")
+
     def update_config(self, new_config: Dict[str, Any]):
         """更新配置"""
         def update_nested_dict(current: dict, updates: dict):
@@ -120,8 +178,10 @@ class ConfigManager:
                 else:
                     current[key] = value
 
+        before = {key: copy.deepcopy(self._config.get(key)) for key in new_config}
         update_nested_dict(self._config, new_config)
         self._save_config()
+        self._notify_config_changed({key for key in new_config if self._config.get(key) != before[key]})
 
     def set_value(self, key: str, value: Any):
         """设置单个配置项的值"""
@@ -131,8 +191,11 @@ class ConfigManager:
             if k not in current:
                 current[k] = {}
             current = current[k]
+        changed = current.get(keys[-1]) != value
         current[keys[-1]] = value
         self._save_config()
+        if changed:
+            self._notify_config_changed({keys[0]})
 
 # 创建全局实例
 config_manager = ConfigManager()
\ No newline at end of file
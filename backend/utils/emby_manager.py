@@ -32,7 +32,7 @@ class EmbyManager:
             logger.error(f"检查 Emby 是否启用时出错: {str(e)}")
             return False
 
-    async def _make_request(self, endpoint: str, method: str = 'GET', params: dict = None, json: dict = None) -> dict:
+    async def _make_request(self, endpoint: str, method: str = 'GET', params: dict = None, json: dict = None, coalesce: bool = False) -> dict:
         """发送请求到 Emby 服务器
 
         Args:
@@ -40,6 +40,7 @@ class EmbyManager:
             method (str, optional): HTTP 方法. Defaults to 'GET'.
             params (dict, optional): URL 参数. Defaults to None.
             json (dict, optional): JSON 请求体. Defaults to None.
+            coalesce (bool, optional): 是否合并同时发起的相同 GET 请求. Defaults to False.
 
         Returns:
             dict: 响应数据
@@ -50,7 +51,8 @@ class EmbyManager:
             url=url,
             headers=self.headers,
             params=params,
-            json=json
+            json=json,
+            coalesce=coalesce
         )
         return response if isinstance(response, dict) else {}
 
@@ -260,7 +262,7 @@ class EmbyManager:
             Dict: 系统信息
         """
         endpoint = '/System/Info'
-        return await self._make_request(endpoint)
+        return await self._make_request(endpoint, coalesce=True)
 
     async def search_items(self, search_term: str, include_item_types: List[str] = None, 
                          limit: int = 10, recursive: bool = True) -> Dict:
@@ -0,0 +1,203 @@
+import asyncio
+import random
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from utils.rate_limiter import TokenBucket
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """目标主机熔断中，请求被直接拒绝"""
+    def __init__(self, host: str, retry_after: float):
+        self.host = host
+        self.retry_after = retry_after
+        super().__init__(f"主机 {host} 连续请求失败，已熔断，{retry_after:.0f} 秒后重试")
+
+
+class CircuitBreaker:
+    """熔断器
+
+    连续 failure_threshold 次服务端错误或超时后打开，recovery_timeout 秒内请求直接失败；
+    之后进入半开状态，只放行一个探测请求，成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.recovery_timeout = float(recovery_timeout)
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        # 半开状态下探测请求的开始时间，0 表示没有探测中的请求
+        self._probe_started = 0.0
+
+    def retry_after(self) -> float:
+        """熔断剩余时间（秒）"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.recovery_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        """是否放行本次请求"""
+        if self.state == self.OPEN:
+            if self.retry_after() > 0:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_started = 0.0
+        if self.state == self.HALF_OPEN:
+            now = time.monotonic()
+            # 探测请求被取消等原因一直没有结果时，超过 recovery_timeout 再放行一个
+            if self._probe_started and now - self._probe_started < self.recovery_timeout:
+                return False
+            self._probe_started = now
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_started = 0.0
+
+    def release_probe(self):
+        """探测请求因非网络原因（取消、解析失败等）结束，没有结果，放行下一个探测请求"""
+        if self.state == self.HALF_OPEN:
+            self._probe_started = 0.0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        self._probe_started = 0.0
+
+
+class HostPolicy:
+    """单个主机的请求策略"""
+
+    FIELDS = {
+        "max_concurrency": 20,  # 最大并发请求数
+        "rate": 0,  # 每秒请求数，0 为不限制
+        "burst": 0,  # 令牌桶容量，0 为与 rate 相同
+        "retry_base_delay": 1,  # 首次重试等待（秒），之后按指数增长
+        "retry_max_delay": 10,  # 最大重试等待（秒）
+        "failure_threshold": 5,  # 连续失败多少次后熔断
+        "recovery_timeout": 30,  # 熔断持续时间（秒）
+    }
+
+    def __init__(self, **options):
+        for name, default in self.FIELDS.items():
+            setattr(self, name, options.get(name, default))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次重试前的等待时间，带 ±20% 随机抖动"""
+        delay = min(float(self.retry_max_delay), float(self.retry_base_delay) * (2 ** attempt))
+        return delay * random.uniform(0.8, 1.2)
+
+
+class HostState:
+    """单个主机的并发、限流和熔断状态"""
+
+    def __init__(self, host: str, policy: HostPolicy):
+        self.host = host
+        self.policy = policy
+        self.semaphore = asyncio.Semaphore(max(1, int(policy.max_concurrency)))
+        self.bucket = TokenBucket(policy.rate, policy.burst or None) if policy.rate else None
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.recovery_timeout)
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.rejected = 0
+        self.throttled = 0
+        # 解析策略时的配置版本
+        self.version: Optional[int] = None
+
+    def apply(self, policy: HostPolicy):
+        """策略配置变化时就地更新"""
+        if policy.max_concurrency != self.policy.max_concurrency:
+            # 正在进行的请求释放旧信号量，新请求使用新的并发数
+            self.semaphore = asyncio.Semaphore(max(1, int(policy.max_concurrency)))
+        if not policy.rate:
+            self.bucket = None
+        elif self.bucket is None:
+            self.bucket = TokenBucket(policy.rate, policy.burst or None)
+        else:
+            self.bucket.update(policy.rate, policy.burst or None)
+        self.breaker.failure_threshold = max(1, int(policy.failure_threshold))
+        self.breaker.recovery_timeout = float(policy.recovery_timeout)
+        self.policy = policy
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "host": self.host,
+            "policy": self.policy.to_dict(),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "tokens": round(self.bucket.tokens, 2) if self.bucket else None,
+            "circuit": {
+                "state": self.breaker.state,
+                "consecutive_failures": self.breaker.consecutive_failures,
+                "retry_after": round(self.breaker.retry_after(), 1),
+            },
+        }
+
+
+class HostPolicyRegistry:
+    """按主机名管理请求策略
+
+    配置项 http_policies.default 为默认策略，http_policies.hosts 按域名后缀覆盖部分字段，
+    例如 "quark.cn" 对 drive-pc.quark.cn、pan.quark.cn 都生效，匹配最长的后缀。
+    """
+
+    def __init__(self):
+        self._hosts: Dict[str, HostState] = {}
+
+    @staticmethod
+    def resolve_policy(host: str, config: Dict[str, Any]) -> HostPolicy:
+        options = dict(config.get("default", {}))
+        overrides = config.get("hosts", {}) or {}
+        matched = [
+            suffix for suffix in overrides
+            if host == suffix or host.endswith("." + suffix)
+        ]
+        if matched:
+            options.update(overrides[max(matched, key=len)] or {})
+        return HostPolicy(**options)
+
+    def get(self, host: str, config: Optional[Dict[str, Any]] = None, version: Optional[int] = None) -> HostState:
+        """
+        获取主机状态，策略配置有变化时同步更新
+        :param version: 策略配置的版本号，与上次相同时跳过策略解析
+        """
+        state = self._hosts.get(host)
+        if state is not None and version is not None and state.version == version:
+            return state
+        policy = self.resolve_policy(host, config or {})
+        if state is None:
+            state = self._hosts[host] = HostState(host, policy)
+        elif state.policy.to_dict() != policy.to_dict():
+            state.apply(policy)
+        state.version = version
+        return state
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {host: state.snapshot() for host, state in sorted(self._hosts.items())}
+
+    def reset(self, host: Optional[str] = None):
+        """关闭熔断并清空统计，host 为空时重置全部主机"""
+        for name in ([host] if host else list(self._hosts)):
+            state = self._hosts.pop(name, None)
+            if state is not None:
+                self._hosts[name] = HostState(name, state.policy)
+
+
+host_policies = HostPolicyRegistry()
@@ -1,12 +1,76 @@
 import aiohttp
 import asyncio
-from typing import Optional, Dict, Any, Union
+import copy
+import hashlib
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, Union, NamedTuple, Tuple, Set, AsyncIterator
+from urllib.parse import urlparse, quote
 from loguru import logger
+from utils import json_codec
 from utils.config_manager import config_manager
+from utils.host_policy import CircuitOpenError, host_policies
+
+
+class ConnectionProfile(NamedTuple):
+    """连接配置快照，创建后不再修改，配置变化时生成新的版本"""
+    version: int
+    proxy: Optional[str]
+    verify_ssl: bool
+    pool_limit: int
+    pool_limit_per_host: int
+    keepalive_timeout: float
+    default_headers: Tuple[Tuple[str, str], ...]
+    http_policies: Dict[str, Any]
+
+
+class StreamResponse:
+    """流式响应，响应体按块读取，不整体缓存在内存中"""
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, response: aiohttp.ClientResponse):
+        self._response = response
+        self.status = response.status
+        self.headers = response.headers
+        self.url = str(response.url)
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("content-type", "")
+
+    @property
+    def content_length(self) -> Optional[int]:
+        return self._response.content_length
+
+    async def iter_chunks(self, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """逐块读取响应体"""
+        async for chunk in self._response.content.iter_chunked(chunk_size):
+            yield chunk
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self.iter_chunks()
+
+    async def read(self) -> bytes:
+        """读取剩余的全部响应体，只用于已知体积较小的响应"""
+        return await self._response.read()
+
 
 class HttpClient:
     _instance = None
     _session: Optional[aiohttp.ClientSession] = None
+    _profile: Optional[ConnectionProfile] = None
+    _profile_version = 0
+    # 会话对应的连接配置版本及其上正在进行的请求数
+    _session_version = 0
+    _session_users: Dict[aiohttp.ClientSession, int] = {}
+    # 合并中的 GET 请求 {请求键: 正在执行的请求}
+    _inflight: Dict[str, asyncio.Task] = {}
+    # 影响连接配置的顶层配置项
+    PROFILE_KEYS = {
+        "use_proxy", "proxy_host", "proxy_port", "proxy_username", "proxy_password",
+        "http_client", "http_policies",
+    }
+    SESSION_DRAIN_TIMEOUT = 60  # 旧会话等待进行中请求结束的最长时间（秒）
     _default_headers = {
         "accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
         "accept-language": "zh-CN,zh;q=0.9,en;q=0.8",
@@ -16,53 +80,113 @@ class HttpClient:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(HttpClient, cls).__new__(cls)
+            config_manager.add_listener(cls._instance._on_config_changed)
         return cls._instance
 
-    async def _ensure_session(self, headers: Dict[str, str] = None):
-        """确保会话已创建"""
-        if self._session is None or self._session.closed:
-            # 获取代理配置
-            sys_config = config_manager.get_config()
-            proxy = None
-            
-            if sys_config.get("use_proxy", False):
-                host = sys_config.get("proxy_host", "")
-                port = sys_config.get("proxy_port", "")
-                username = sys_config.get("proxy_username", "")
-                password = sys_config.get("proxy_password", "")
-                
-                if host and port:
-                    # 构建代理URL
-                    if username and password:
-                        proxy = f"http://{username}:{password}@{host}:{port}"
-                        logger.info(f"使用带认证的代理: {host}:{port}")
-                    else:
-                        proxy = f"http://{host}:{port}"
-                        logger.info(f"使用代理: {proxy}")
-            
-            merged_headers = {**self._default_headers}
-            if headers:
-                merged_headers.update(headers)
-            
-            # 创建会话
+    def _on_config_changed(self, keys: Set[str]):
+        """代理、连接池等配置变化时作废当前连接配置，下一个请求使用新配置重建会话"""
+        if keys & self.PROFILE_KEYS:
+            self._profile = None
+
+    def reload_profile(self):
+        """直接修改了配置字典（未经过 update_config）时，手动让连接配置重新生成"""
+        self._profile = None
+
+    def _build_profile(self) -> ConnectionProfile:
+        sys_config = config_manager.get_config()
+        proxy = None
+        if sys_config.get("use_proxy", False):
+            host = sys_config.get("proxy_host", "")
+            port = sys_config.get("proxy_port", "")
+            username = sys_config.get("proxy_username", "")
+            password = sys_config.get("proxy_password", "")
+            if host and port:
+                # 构建代理URL
+                if username and password:
+                    proxy = f"http://{quote(str(username), safe='')}:{quote(str(password), safe='')}@{host}:{port}"
+                    logger.info(f"使用带认证的代理: {host}:{port}")
+                else:
+                    proxy = f"http://{host}:{port}"
+                    logger.info(f"使用代理: {proxy}")
+
+        client_config = sys_config.get("http_client", {}) or {}
+        HttpClient._profile_version += 1
+        return ConnectionProfile(
+            version=self._profile_version,
+            proxy=proxy,
+            verify_ssl=bool(client_config.get("verify_ssl", False)),
+            pool_limit=int(client_config.get("pool_limit", 100)),
+            pool_limit_per_host=int(client_config.get("pool_limit_per_host", 20)),
+            keepalive_timeout=float(client_config.get("keepalive_timeout", 60)),
+            default_headers=tuple(self._default_headers.items()),
+            http_policies=copy.deepcopy(sys_config.get("http_policies", {}) or {}),
+        )
+
+    @property
+    def profile(self) -> ConnectionProfile:
+        """当前连接配置"""
+        if self._profile is None:
+            self._profile = self._build_profile()
+        return self._profile
+
+    async def _ensure_session(self) -> Tuple[aiohttp.ClientSession, ConnectionProfile]:
+        """确保会话已创建且与当前连接配置一致，返回会话和对应的连接配置"""
+        profile = self.profile
+        if self._session is None or self._session.closed or self._session_version != profile.version:
+            old_session = self._session
+            # 创建会话，请求头只使用默认值，调用方的请求头按请求传入，不会带给其他请求
             self._session = aiohttp.ClientSession(
-                headers=merged_headers,
+                headers=dict(profile.default_headers),
                 trust_env=True,  # 允许从环境变量读取代理设置
+                json_serialize=json_codec.dumps,
                 connector=aiohttp.TCPConnector(
-                    ssl=False,  # 禁用SSL验证
+                    ssl=None if profile.verify_ssl else False,
                     force_close=False,  # 不强制关闭连接
                     enable_cleanup_closed=True,  # 清理已关闭的连接
-                    limit=100,  # 最大并发连接数
-                    limit_per_host=20,  # 每个主机的最大并发连接数
-                    keepalive_timeout=60  # 保持连接活跃的超时时间
+                    limit=profile.pool_limit,  # 最大并发连接数
+                    limit_per_host=profile.pool_limit_per_host,  # 每个主机的最大并发连接数
+                    keepalive_timeout=profile.keepalive_timeout  # 保持连接活跃的超时时间
                 )
             )
+            self._session_version = profile.version
+            if old_session is not None and not old_session.closed:
+                logger.info(f"连接配置已更新(版本 {profile.version})，旧会话将在请求结束后关闭")
+                asyncio.ensure_future(self._drain_session(old_session))
+        return self._session, profile
+
+    async def _drain_session(self, session: aiohttp.ClientSession):
+        """等待旧会话上进行中的请求结束后关闭"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.SESSION_DRAIN_TIMEOUT
+        while self._session_users.get(session) and loop.time() < deadline:
+            await asyncio.sleep(0.2)
+        # 超时后仍有请求（例如长时间的流式下载）时直接关闭，计数由请求结束时清理
+        await session.close()
+
+    def _release_session(self, session: aiohttp.ClientSession):
+        """请求结束，减少会话上的进行中请求数，归零时移除记录"""
+        count = self._session_users.get(session, 0) - 1
+        if count > 0:
+            self._session_users[session] = count
+        else:
+            self._session_users.pop(session, None)
 
     async def close(self):
         """关闭会话"""
         if self._session and not self._session.closed:
             await self._session.close()
 
+    @staticmethod
+    def _coalesce_key(method: str, url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]) -> str:
+        """请求合并键：方法 + URL + 参数 + 请求头（含 cookie、token 等身份信息）"""
+        parts = [
+            method.upper(),
+            url,
+            repr(sorted((str(k), str(v)) for k, v in (params or {}).items())),
+            repr(sorted((str(k).lower(), str(v)) for k, v in (headers or {}).items())),
+        ]
+        return hashlib.md5("\n".join(parts).encode("utf-8")).hexdigest()
+
     async def request(
         self,
         method: str,
@@ -74,60 +198,235 @@ class HttpClient:
         data: Any = None,
         timeout: int = 30,
         retry_times: int = 3,
-        retry_delay: int = 1
+        retry_delay: Optional[float] = None,
+        coalesce: bool = False
     ) -> Union[Dict[str, Any], str]:
-        """发送 HTTP 请求"""
-        await self._ensure_session(headers)
-        
-        # 获取代理配置
-        sys_config = config_manager.get_config()
-        proxy = None
-        if sys_config.get("use_proxy", False):
-            host = sys_config.get("proxy_host", "")
-            port = sys_config.get("proxy_port", "")
-            if host and port:
-                proxy = f"http://{host}:{port}"
-        
+        """
+        发送 HTTP 请求
+        :param coalesce: 合并相同的 GET 请求，同时发起的相同请求（方法、URL、参数、请求头一致）
+                         只请求一次上游，各调用方拿到同一结果的副本
+        """
+        if not coalesce or method.upper() != "GET":
+            return await self._request(
+                method, url, params=params, headers=headers, json=json, data=data,
+                timeout=timeout, retry_times=retry_times, retry_delay=retry_delay
+            )
+
+        key = self._coalesce_key(method, url, params, headers)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._request(
+                method, url, params=params, headers=headers,
+                timeout=timeout, retry_times=retry_times, retry_delay=retry_delay
+            ))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._on_coalesced_done(key, t))
+        # 单个调用方取消等待不会取消其他调用方共用的请求
+        result = await asyncio.shield(task)
+        # 解析后的结果可能被调用方修改，每个调用方拿到独立的副本
+        return result if isinstance(result, str) else copy.deepcopy(result)
+
+    def _on_coalesced_done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有调用方都已取消等待时，避免未读取的异常被当作未处理异常记录
+        if not task.cancelled():
+            task.exception()
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Dict[str, Any] = None,
+        headers: Dict[str, str] = None,
+        json: Any = None,
+        data: Any = None,
+        timeout: int = 30,
+        retry_times: int = 3,
+        retry_delay: Optional[float] = None
+    ) -> Union[Dict[str, Any], str]:
+        """
+        发送 HTTP 请求
+
+        按目标主机的策略（http_policies 配置）限制并发和请求速率，失败后指数退避重试，
+        连续服务端错误或超时达到阈值后熔断，熔断期间直接抛出 CircuitOpenError。
+        :param retry_delay: 首次重试等待（秒），默认使用主机策略的 retry_base_delay
+        """
         for i in range(retry_times):
+            # 每次尝试重新获取会话：退避等待期间连接配置可能变化，旧会话已被关闭
+            session, profile = await self._ensure_session()
+            host_state = host_policies.get(urlparse(url).hostname or "", profile.http_policies, profile.version)
+            policy = host_state.policy
+            if not host_state.breaker.allow():
+                host_state.rejected += 1
+                raise CircuitOpenError(host_state.host, host_state.breaker.retry_after())
+            if host_state.bucket:
+                await host_state.bucket.acquire()
             try:
-                # logger.info(f"请求参数: {method} {url} {params} {headers} {json} {data}")
-                async with self._session.request(
+                async with host_state.semaphore:
+                    host_state.in_flight += 1
+                    host_state.requests += 1
+                    self._session_users[session] = self._session_users.get(session, 0) + 1
+                    try:
+                        # logger.info(f"请求参数: {method} {url} {params} {headers} {json} {data}")
+                        async with session.request(
+                            method=method,
+                            url=url,
+                            params=params,
+                            headers=headers,
+                            json=json,
+                            data=data,
+                            timeout=aiohttp.ClientTimeout(total=timeout),
+                            allow_redirects=True,
+                            ssl=None if profile.verify_ssl else False,
+                            proxy=profile.proxy  # 在请求时设置代理
+                        ) as response:
+                            self._record_response(host_state, response.status)
+                            if response.status == 404:
+                                raise aiohttp.ClientError(f"资源未找到: {url}")
+                            
+                            response.raise_for_status()
+                            
+                            content_type = response.headers.get('content-type', '').lower()
+                            if 'application/json' in content_type:
+                                body = await response.read()
+                                result = json_codec.loads(body) if body.strip() else None
+                                # logger.info(f"请求响应: {result}")
+                            else:
+                                result = await response.text()
+                            return result
+                    finally:
+                        host_state.in_flight -= 1
+                        self._release_session(session)
+                        
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                self._record_error(host_state, e, url, i, retry_times)
+                if i == retry_times - 1:
+                    raise
+            except BaseException:
+                # 取消、解析失败等不说明主机是否可用，释放半开状态的探测名额
+                host_state.breaker.release_probe()
+                raise
+                    
+            await asyncio.sleep(policy.backoff(i) if retry_delay is None else retry_delay * (2 ** i))
+
+    @staticmethod
+    def _record_response(host_state, status: int):
+        """收到响应说明主机可用，服务端错误和限流由 _record_error 处理"""
+        if status < 500 and status != 429:
+            host_state.breaker.record_success()
+
+    @staticmethod
+    def _record_error(host_state, e: BaseException, url: str, attempt: int, retry_times: int):
+        """按错误类型更新主机的熔断和限流状态并记录日志"""
+        if isinstance(e, asyncio.TimeoutError):
+            host_state.failures += 1
+            host_state.breaker.record_failure()
+            logger.warning(f"请求超时 ({attempt + 1}/{retry_times}): {url}")
+            return
+        if isinstance(e, aiohttp.ClientResponseError):
+            if e.status == 429:
+                # 被限流时清空令牌，让同一主机的其他请求一起放慢
+                host_state.throttled += 1
+                if host_state.bucket:
+                    host_state.bucket.drain()
+            elif e.status >= 500:
+                host_state.failures += 1
+                host_state.breaker.record_failure()
+            else:
+                host_state.breaker.record_success()
+        elif isinstance(e, aiohttp.ClientConnectionError):
+            # 只有连接失败计入熔断，资源不存在等错误说明主机本身可用
+            host_state.failures += 1
+            host_state.breaker.record_failure()
+        else:
+            # 资源不存在、URL 无效等不说明主机是否可用
+            host_state.breaker.release_probe()
+        logger.error(f"请求错误 ({attempt + 1}/{retry_times}): {url}", exc_info=e)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Dict[str, Any] = None,
+        headers: Dict[str, str] = None,
+        json: Any = None,
+        data: Any = None,
+        timeout: int = 30,
+        retry_times: int = 3,
+        retry_delay: Optional[float] = None,
+        allow_redirects: bool = True
+    ) -> AsyncIterator[StreamResponse]:
+        """
+        发送 HTTP 请求并以流的方式读取响应体
+
+        用法:
+            async with http_client.stream("GET", url) as response:
+                async for chunk in response.iter_chunks():
+                    ...
+
+        与 request 使用相同的代理、主机策略和重试：收到响应头之前的失败会重试，
+        开始读取响应体后的错误直接抛给调用方。退出上下文前一直占用主机的并发名额。
+        :param timeout: 连接及两次读取之间的超时（秒），不限制整个响应体的读取时间
+        :param allow_redirects: 是否跟随重定向，为 False 时可从响应头中读取 location
+        """
+        for i in range(retry_times):
+            session, profile = await self._ensure_session()
+            host_state = host_policies.get(urlparse(url).hostname or "", profile.http_policies, profile.version)
+            policy = host_state.policy
+            if not host_state.breaker.allow():
+                host_state.rejected += 1
+                raise CircuitOpenError(host_state.host, host_state.breaker.retry_after())
+            if host_state.bucket:
+                await host_state.bucket.acquire()
+            # 策略变化时信号量会被替换，释放时要用获取时的那个
+            semaphore = host_state.semaphore
+            await semaphore.acquire()
+            host_state.in_flight += 1
+            host_state.requests += 1
+            self._session_users[session] = self._session_users.get(session, 0) + 1
+            response = None
+            try:
+                response = await session.request(
                     method=method,
                     url=url,
                     params=params,
                     headers=headers,
                     json=json,
                     data=data,
-                    timeout=aiohttp.ClientTimeout(total=timeout),
-                    allow_redirects=True,
-                    verify_ssl=False,  # 禁用SSL验证
-                    proxy=proxy  # 在请求时设置代理
-                ) as response:
-                    if response.status == 404:
-                        raise aiohttp.ClientError(f"资源未找到: {url}")
-                    
-                    response.raise_for_status()
-                    
-                    content_type = response.headers.get('content-type', '').lower()
-                    if 'application/json' in content_type:
-                        result = await response.json()
-                        # logger.info(f"请求响应: {result}")
-                        return result
-                    else:
-                        result = await response.text()
-                        return result
-                        
-            except asyncio.TimeoutError:
-                logger.warning(f"请求超时 ({i + 1}/{retry_times}): {url}")
-                if i == retry_times - 1:
+                    timeout=aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout),
+                    allow_redirects=allow_redirects,
+                    ssl=None if profile.verify_ssl else False,
+                    proxy=profile.proxy
+                )
+                self._record_response(host_state, response.status)
+                response.raise_for_status()
+            except BaseException as e:
+                if response is not None:
+                    response.release()
+                semaphore.release()
+                host_state.in_flight -= 1
+                self._release_session(session)
+                if not isinstance(e, (asyncio.TimeoutError, aiohttp.ClientError)):
+                    host_state.breaker.release_probe()
                     raise
-                    
-            except aiohttp.ClientError as e:
-                logger.error(f"请求错误 ({i + 1}/{retry_times}): {url}", exc_info=e)
+                self._record_error(host_state, e, url, i, retry_times)
                 if i == retry_times - 1:
                     raise
-                    
-            await asyncio.sleep(retry_delay)
+                await asyncio.sleep(policy.backoff(i) if retry_delay is None else retry_delay * (2 ** i))
+                continue
+
+            try:
+                yield StreamResponse(response)
+            finally:
+                response.release()
+                semaphore.release()
+                host_state.in_flight -= 1
+                self._release_session(session)
+            return
 
     async def get(self, url: str, **kwargs) -> Union[Dict[str, Any], str]:
         """发送 GET 请求"""
@@ -0,0 +1,60 @@
+"""
+JSON 编解码
+
+使用 orjson（pyproject 中的依赖），未安装时回退到标准库 json，调用方不需要关心具体实现。
+两种实现的输出保持一致：UTF-8 原样输出（等同 ensure_ascii=False），紧凑分隔符。
+"""
+import json
+from typing import Any, Callable, Optional, Type, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于运行环境
+    orjson = None
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+BACKEND = "orjson" if orjson else "json"
+
+JSONDecodeError = orjson.JSONDecodeError if orjson else json.JSONDecodeError
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """解析 JSON 文本"""
+    if orjson:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("utf-8")
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any, *, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    序列化为 UTF-8 字节
+    :param indent: 是否缩进两个空格
+    :param default: 无法序列化的对象的转换函数，例如 str
+    """
+    if orjson:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+    return dumps(obj, indent=indent, default=default).encode("utf-8")
+
+
+def dumps(obj: Any, *, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """
+    序列化为字符串
+    :param indent: 是否缩进两个空格
+    :param default: 无法序列化的对象的转换函数，例如 str
+    """
+    if orjson:
+        return dumps_bytes(obj, indent=indent, default=default).decode("utf-8")
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=default)
+
+
+def json_response_class() -> Type[JSONResponse]:
+    """FastAPI 默认响应类，有 orjson 时使用 ORJSONResponse"""
+    return ORJSONResponse if orjson else JSONResponse
@@ -1,10 +1,10 @@
-import json
 import inspect
 import traceback
 import os
 from typing import Optional, Dict, Any, List
 from loguru import logger
 from datetime import datetime, timedelta
+from utils import json_codec
 from schemas.log import LogEntry, LogQuery, LogStats, LogListResponse
 import asyncio
 from pathlib import Path
@@ -61,7 +61,7 @@ class FileLoggerService:
     def _format_log_entry(self, log_entry: LogEntry) -> str:
         """格式化日志条目为JSON字符串"""
         log_dict = log_entry.model_dump()
-        return json.dumps(log_dict, ensure_ascii=False, default=str)
+        return json_codec.dumps(log_dict, default=str)
     
     async def _rotate_log_file(self):
         """轮转日志文件"""
@@ -122,7 +122,7 @@ class FileLoggerService:
         # 记录到控制台
         log_message = f"[{module}.{function}:{line}] {message}"
         if extra_data:
-            log_message += f" | Extra: {json.dumps(extra_data, ensure_ascii=False)}"
+            log_message += f" | Extra: {json_codec.dumps(extra_data, default=str)}"
         
         if level.upper() == "DEBUG":
             logger.debug(log_message)
@@ -186,7 +186,7 @@ class FileLoggerService:
                             continue
                         
                         try:
-                            log_dict = json.loads(line)
+                            log_dict = json_codec.loads(line)
                             log_entry = LogEntry(**log_dict)
                             
                             # 应用过滤条件
@@ -266,7 +266,7 @@ class FileLoggerService:
                             continue
                         
                         try:
-                            log_dict = json.loads(line)
+                            log_dict = json_codec.loads(line)
                             log_entry = LogEntry(**log_dict)
                             
                             total_count += 1
@@ -322,7 +322,7 @@ class FileLoggerService:
                             continue
                         
                         try:
-                            log_dict = json.loads(line)
+                            log_dict = json_codec.loads(line)
                             log_entry = LogEntry(**log_dict)
                             if log_entry.module:
                                 modules.add(log_entry.module)
@@ -350,7 +350,7 @@ class FileLoggerService:
                             continue
                         
                         try:
-                            log_dict = json.loads(line)
+                            log_dict = json_codec.loads(line)
                             log_entry = LogEntry(**log_dict)
                             levels.add(log_entry.level)
                         except Exception:
@@ -1,10 +1,71 @@
 import re
 import os
 from datetime import datetime
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Union
 
 from loguru import logger
 
+
+@lru_cache(maxsize=1024)
+def compile_pattern(pattern: str) -> "re.Pattern":
+    """编译并缓存正则表达式"""
+    return re.compile(pattern)
+
+
+MAGIC_I_PATTERN = compile_pattern(r"\{I+\}")
+DIGITS_PATTERN = compile_pattern(r"\d+")
+BACKREF_PATTERN = compile_pattern(r"\\[0-9]+")
+
+
+class FileNameIndex:
+    """目标目录文件名索引
+
+    每个目录构建一次，供 MagicRename.is_exists 反复查询：
+    完整文件名和去扩展名后的文件名分别放入哈希集合，{I+} 通配查询的正则预编译后缓存。
+    """
+
+    def __init__(self, filename_list: List[str]):
+        self.names = list(filename_list)
+        self.exact = set(self.names)
+        self._stems: Optional[List[str]] = None
+        self._stem_set: Optional[set] = None
+
+    def _build_stems(self):
+        if self._stems is None:
+            self._stems = [os.path.splitext(f)[0] for f in self.names]
+            self._stem_set = set(self._stems)
+
+    @property
+    def stems(self) -> List[str]:
+        """去掉扩展名的文件名列表"""
+        self._build_stems()
+        return self._stems
+
+    @property
+    def stem_set(self) -> set:
+        """去掉扩展名的文件名集合"""
+        self._build_stems()
+        return self._stem_set
+
+    def find(self, filename: str, ignore_ext: bool = False) -> Optional[str]:
+        """
+        查找文件名，处理忽略扩展名和 {I+} 通配
+        :return: 存在返回文件名，不存在返回None
+        """
+        if ignore_ext:
+            filename = os.path.splitext(filename)[0]
+        # {I+} 模式，用I通配数字序号
+        if match := MAGIC_I_PATTERN.search(filename):
+            magic_i = match.group()
+            matcher = compile_pattern(filename.replace(magic_i, r"\d" * magic_i.count("I")))
+            for name in (self.stems if ignore_ext else self.names):
+                if matcher.match(name):
+                    return name
+            return None
+        names = self.stem_set if ignore_ext else self.exact
+        return filename if filename in names else None
+
 class MagicRename:
     """文件名魔法重命名工具"""
 
@@ -71,9 +132,15 @@ class MagicRename:
         :param magic_regex: 自定义魔法正则
         :param magic_variable: 自定义魔法变量
         """
-        self.magic_regex.update(magic_regex)
-        self.magic_variable.update(magic_variable)
+        # 复制为实例属性，避免并发任务之间互相修改 {TASKNAME}、{I} 等变量
+        self.magic_regex = {**self.magic_regex, **magic_regex}
+        self.magic_variable = {**self.magic_variable, **magic_variable}
         self.dir_filename_dict = {}
+        # 正则类魔法变量的合并匹配器及每个文件名的匹配结果
+        self._regex_variable_map: Optional[Dict[str, List[str]]] = None
+        self._variable_matchers: Dict[Tuple[str, ...], Any] = {}
+        self._variable_cache: Dict[str, Dict[str, Optional[str]]] = {}
+        self._sort_key_cache: Dict[str, str] = {}
 
     def set_taskname(self, taskname: str):
         """
@@ -95,6 +162,79 @@ class MagicRename:
             if replace == "":
                 replace = self.magic_regex[keyword]["replace"]
         return pattern, replace
+    def _regex_variables(self) -> Dict[str, List[str]]:
+        """正则类魔法变量 {变量名: 正则列表}"""
+        if self._regex_variable_map is None:
+            self._regex_variable_map = {
+                key: p_list for key, p_list in self.magic_variable.items()
+                if p_list and isinstance(p_list, list)
+            }
+        return self._regex_variable_map
+
+    def _variable_matcher(self, keys: Tuple[str, ...]):
+        """
+        把多个正则类魔法变量合并成一个正则，每个文件名只需匹配一次
+        每个变量的正则列表按优先级组成分支 (?:(?=.*?(?P<v0_0>p0))|(?=.*?(?P<v0_1>p1))|)，
+        前瞻从文件名开头查找，与逐个 re.search 取第一个命中的正则结果一致；末尾空分支保证整体总能匹配
+        :return: (合并后的正则, 分组名列表, [(变量名, 分组起始, 分组结束)])，无法合并时正则为 None
+        """
+        if keys in self._variable_matchers:
+            return self._variable_matchers[keys]
+        regex_variables = self._regex_variables()
+        blocks = []
+        group_names: List[str] = []
+        # 每个变量的分组在 group_names 中的区间
+        spans: List[Tuple[str, int, int]] = []
+        for vi, key in enumerate(keys):
+            alternatives = []
+            start = len(group_names)
+            for j, p in enumerate(regex_variables[key]):
+                group = f"v{vi}_{j}"
+                alternatives.append(f"(?=(?s:.*?)(?P<{group}>{p}))")
+                group_names.append(group)
+            spans.append((key, start, len(group_names)))
+            blocks.append(f"(?:{'|'.join(alternatives)}|)")
+        matcher = None
+        # 含反向引用等无法合并的自定义正则，退回逐个匹配
+        if not any(BACKREF_PATTERN.search(p) for key in keys for p in regex_variables[key]):
+            try:
+                matcher = re.compile("".join(blocks))
+            except re.error:
+                matcher = None
+        self._variable_matchers[keys] = (matcher, group_names, spans)
+        return self._variable_matchers[keys]
+
+    def match_variables(self, file_name: str, keys: Optional[Tuple[str, ...]] = None) -> Dict[str, Optional[str]]:
+        """
+        计算文件名对应的正则类魔法变量的值，结果按文件名缓存
+        :param file_name: 文件名
+        :param keys: 需要的变量，默认全部正则类变量
+        :return: {变量名: 匹配到的值}，未匹配为 None
+        """
+        regex_variables = self._regex_variables()
+        if keys is None:
+            keys = tuple(regex_variables)
+        values = self._variable_cache.setdefault(file_name, {})
+        missing = tuple(key for key in keys if key not in values and key in regex_variables)
+        if not missing:
+            return values
+        matcher, group_names, spans = self._variable_matcher(missing)
+        if matcher:
+            groups = matcher.match(file_name).group(*group_names)
+            if len(group_names) == 1:
+                groups = (groups,)
+            for key, start, end in spans:
+                values[key] = None
+                for value in groups[start:end]:
+                    if value is not None:
+                        values[key] = value
+                        break
+        else:
+            for key in missing:
+                match = next((m for m in (compile_pattern(p).search(file_name) for p in regex_variables[key]) if m), None)
+                values[key] = match.group() if match else None
+        return values
+
     def start_magic_is_save(self, start_magic:List[Dict[str, Any]],file_name:str) -> bool:
         """
         判断是否需要保存
@@ -108,31 +248,22 @@ class MagicRename:
         if len(start_magic) == 0:
             return True
         flag = [False] * len(start_magic)
+        values = self.match_variables(file_name, tuple(dict.fromkeys(item["type"] for item in start_magic)))
         for i, start_magic in enumerate(start_magic):
-            if start_magic["type"] in self.magic_variable:
-              regex = self.magic_variable[start_magic["type"]]
-              #  根据文件名 正则匹配 然后根据symbol判断 symbol 是> < 或者=              
-              for p in regex:
-                match = re.search(p, file_name)
-                if match:
-                    # 提取数字
-                    match = match.group()
-                    number_str = re.search(r'\d+', match)
-                    if number_str:
-                        number = int(number_str.group())
-                        if start_magic["symbol"] == ">":
-                            if number > start_magic["value"]:
-                                flag[i] = True
-                                break
-                        elif start_magic["symbol"] == "<":
-                            if number < start_magic["value"]:
-                                flag[i] = True
-                                break
-                        elif start_magic["symbol"] == "=":
-                            if number == start_magic["value"]:
-                                flag[i] = True
-                                break
-                    break
+            #  根据文件名 正则匹配 然后根据symbol判断 symbol 是> < 或者=
+            match = values.get(start_magic["type"])
+            if match is None:
+                continue
+            # 提取数字
+            number_str = DIGITS_PATTERN.search(match)
+            if number_str:
+                number = int(number_str.group())
+                if start_magic["symbol"] == ">":
+                    flag[i] = number > start_magic["value"]
+                elif start_magic["symbol"] == "<":
+                    flag[i] = number < start_magic["value"]
+                elif start_magic["symbol"] == "=":
+                    flag[i] = number == start_magic["value"]
         return all(flag)
 
     def sub(self, pattern: str, replace: str, file_name: str) -> str:
@@ -143,47 +274,67 @@ class MagicRename:
         :param file_name: 文件名
         :return: 替换后的文件名
         """
+        return self.batch_sub(pattern, replace, [file_name])[0]
+
+    def batch_sub(self, pattern: str, replace: str, file_names: List[str]) -> List[str]:
+        """
+        批量魔法正则、变量替换，替换式中的变量和正则只解析一次
+        :param pattern: 匹配模式
+        :param replace: 替换模式
+        :param file_names: 文件名列表
+        :return: 与 file_names 一一对应的替换后文件名
+        """
         if not replace:
-            return file_name
-            
+            return list(file_names)
+        regex_keys = set(self._regex_variables())
+        # 替换式中出现的正则类变量
+        used_keys = tuple(key for key in self._regex_variables() if key in replace)
+        pattern_re = compile_pattern(pattern) if pattern else None
+        return [
+            self._sub_one(pattern_re, replace, regex_keys, used_keys, file_name)
+            for file_name in file_names
+        ]
+
+    def _sub_one(self, pattern_re, replace: str, regex_keys: set, used_keys: Tuple[str, ...], file_name: str) -> str:
+        """替换单个文件名"""
+        values = None
         # 预处理替换变量
-        for key, p_list in self.magic_variable.items():
-            if key in replace:
-                # 正则类替换变量
-                if p_list and isinstance(p_list, list):
-                    match = None
-                    for p in p_list:
-                        match = re.search(p, file_name)
-                        if match:
-                            # 匹配成功，替换为匹配到的值
-                            value = match.group()
-                            # 日期格式处理：补全、格式化
-                            if key == "{DATE}":
-                                value = "".join(
-                                    [char for char in value if char.isdigit()]
-                                )
-                                value = (
-                                    str(datetime.now().year)[: (8 - len(value))] + value
-                                )
-                            replace = replace.replace(key, value)
-                            break
-                    # 清理未匹配的变量
-                    if not match:
-                        if key == "{SXX}":
-                            replace = replace.replace(key, "S01")
-                        else:
-                            replace = replace.replace(key, "")
-                # 非正则类替换变量
-                elif key == "{TASKNAME}":
-                    replace = replace.replace(key, self.magic_variable["{TASKNAME}"])
-                elif key == "{I}":
-                    continue
+        for key in self.magic_variable:
+            if key not in replace:
+                continue
+            # 正则类替换变量
+            if key in regex_keys:
+                if values is None:
+                    values = self.match_variables(file_name, used_keys)
+                if key not in values:
+                    values = self.match_variables(file_name, (key,))
+                value = values.get(key)
+                if value is not None:
+                    # 日期格式处理：补全、格式化
+                    if key == "{DATE}":
+                        value = "".join(
+                            [char for char in value if char.isdigit()]
+                        )
+                        value = (
+                            str(datetime.now().year)[: (8 - len(value))] + value
+                        )
+                    replace = replace.replace(key, value)
+                # 清理未匹配的变量
+                elif key == "{SXX}":
+                    replace = replace.replace(key, "S01")
                 else:
-                    # 清理未匹配的 magic_variable key
                     replace = replace.replace(key, "")
+            # 非正则类替换变量
+            elif key == "{TASKNAME}":
+                replace = replace.replace(key, self.magic_variable["{TASKNAME}"])
+            elif key == "{I}":
+                continue
+            else:
+                # 清理未匹配的 magic_variable key
+                replace = replace.replace(key, "")
 
-        if pattern and replace:
-            file_name = re.sub(pattern, replace, file_name)
+        if pattern_re and replace:
+            file_name = pattern_re.sub(replace, file_name)
         else:
             file_name = replace
             
@@ -195,10 +346,15 @@ class MagicRename:
         :param name: 文件名
         :return: 排序键
         """
-        for i, keyword in enumerate(self.priority_list):
-            if keyword in name:
-                return name.replace(keyword, f"{i:02d}")  # 替换为数字，方便排序
-        return name
+        key = self._sort_key_cache.get(name)
+        if key is None:
+            key = name
+            for i, keyword in enumerate(self.priority_list):
+                if keyword in name:
+                    key = name.replace(keyword, f"{i:02d}")  # 替换为数字，方便排序
+                    break
+            self._sort_key_cache[name] = key
+        return key
 
     def sort_file_list(self, file_list: List[Dict[str, Any]], dir_filename_dict: Dict[int, str] = {}):
         """
@@ -214,25 +370,34 @@ class MagicRename:
         
         dir_filename_dict = dir_filename_dict or self.dir_filename_dict
         # 合并目录文件列表
-        filename_list = list(set(filename_list) | set(dir_filename_dict.values()))
+        dir_filenames = set(dir_filename_dict.values())
+        filename_list = list(set(filename_list) | dir_filenames)
         filename_list.sort(key=self._custom_sort_key)
-        
+
+        # 编号 = 不小于 max(排序位置, 上一个编号 + 1) 的最小空闲编号
+        # 已分配的编号单调递增，只需一个游标和已占用编号的位图即可线性完成
+        limit = len(filename_list) + len(dir_filename_dict) + 2
+        occupied = bytearray(limit)
+        for i in dir_filename_dict.keys():
+            if isinstance(i, int) and 0 <= i < limit:
+                occupied[i] = 1
+
         filename_index = {}
-        for name in filename_list:
-            if name in dir_filename_dict.values():
+        cursor = 0
+        for position, name in enumerate(filename_list, start=1):
+            if name in dir_filenames:
                 continue
-            i = filename_list.index(name) + 1
-            while i in dir_filename_dict.keys():
-                i += 1
-            dir_filename_dict[i] = name
-            filename_index[name] = i
+            cursor = max(cursor + 1, position)
+            while cursor < limit and occupied[cursor]:
+                cursor += 1
+            dir_filename_dict[cursor] = name
+            filename_index[name] = cursor
             
         for file in file_list:
             if file.get("file_name_re"):
-                if match := re.search(r"\{I+\}", file["file_name_re"]):
+                if match := MAGIC_I_PATTERN.search(file["file_name_re"]):
                     i = filename_index.get(file["file_name_re"], 0)
-                    file["file_name_re"] = re.sub(
-                        match.group(),
+                    file["file_name_re"] = compile_pattern(match.group()).sub(
                         str(i).zfill(match.group().count("I")),
                         file["file_name_re"],
                     )
@@ -250,7 +415,7 @@ class MagicRename:
         filename_list = [f["file_name"] for f in file_list if not f["dir"]]
         filename_list.sort()
         
-        if match := re.search(r"\{I+\}", replace):
+        if match := MAGIC_I_PATTERN.search(replace):
             # 由替换式转换匹配式
             magic_i = match.group()
             pattern_i = r"\d" * magic_i.count("I")
@@ -260,42 +425,29 @@ class MagicRename:
                 if key in pattern:
                     pattern = pattern.replace(key, "🔣")
                     
-            pattern = re.sub(r"\\[0-9]+", "🔣", pattern)  # \1 \2 \3
+            pattern = BACKREF_PATTERN.sub("🔣", pattern)  # \1 \2 \3
             pattern = f"({re.escape(pattern).replace('🔣', '.*?').replace('🔢', f')({pattern_i})(')})"
+            matcher = compile_pattern(pattern)
             
             # 获取起始编号
-            if match := re.match(pattern, filename_list[-1]):
+            if match := matcher.match(filename_list[-1]):
                 self.magic_variable["{I}"] = int(match.group(2))
                 
             # 目录文件列表
             for filename in filename_list:
-                if match := re.match(pattern, filename):
+                if match := matcher.match(filename):
                     self.dir_filename_dict[int(match.group(2))] = (
                         match.group(1) + magic_i + match.group(3)
                     )
 
-    def is_exists(self, filename: str, filename_list: List[str], ignore_ext: bool = False) -> str:
+    def is_exists(self, filename: str, filename_list: Union[List[str], FileNameIndex], ignore_ext: bool = False) -> str:
         """
         判断文件是否存在，处理忽略扩展名
         :param filename: 文件名
-        :param filename_list: 文件名列表
+        :param filename_list: 文件名列表，同一目录多次查询时传入 FileNameIndex 避免重复构建
         :param ignore_ext: 是否忽略扩展名
         :return: 存在返回文件名，不存在返回None
         """
-        
-        if ignore_ext:
-            filename = os.path.splitext(filename)[0]
-            filename_list = [os.path.splitext(f)[0] for f in filename_list]
-        
-        # {I+} 模式，用I通配数字序号
-        if match := re.search(r"\{I+\}", filename):
-            magic_i = match.group()
-            pattern_i = r"\d" * magic_i.count("I")
-            pattern = filename.replace(magic_i, pattern_i)
-            for filename in filename_list:
-                if re.match(pattern, filename):
-                    return filename
-            return None
-        else:
-            return filename if filename in filename_list else None 
-        
\ No newline at end of file
+        if not isinstance(filename_list, FileNameIndex):
+            filename_list = FileNameIndex(filename_list)
+        return filename_list.find(filename, ignore_ext)
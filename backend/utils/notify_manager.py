@@ -1,7 +1,6 @@
 import os
 import re
 import yaml
-import json
 import time
 import hmac
 import base64
@@ -16,6 +15,9 @@ from email.utils import formataddr
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Callable
 
+from utils import json_codec
+
+
 class NotifyManager:
     _instance = None
     _config: Optional[Dict[str, Any]] = None
@@ -254,7 +256,7 @@ class NotifyManager:
             response = requests.post(
                 url=url,
                 headers={"Content-Type": "application/json;charset=utf-8"},
-                data=json.dumps(data),
+                data=json_codec.dumps_bytes(data),
                 timeout=15
             ).json()
 
@@ -288,7 +290,7 @@ class NotifyManager:
             response = requests.post(
                 url=url,
                 headers={"Content-Type": "application/json;charset=utf-8"},
-                data=json.dumps(data),
+                data=json_codec.dumps_bytes(data),
                 timeout=15
             ).json()
 
@@ -314,7 +316,7 @@ class NotifyManager:
             response = requests.post(
                 url=url,
                 headers={"Content-Type": "application/json;charset=utf-8"},
-                data=json.dumps(data),
+                data=json_codec.dumps_bytes(data),
                 timeout=15
             ).json()
 
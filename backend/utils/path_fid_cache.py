@@ -0,0 +1,141 @@
+import os
+import hashlib
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+from loguru import logger
+from utils import json_codec
+
+
+class PathFidCache:
+    """网盘目录路径 -> fid 的持久化 LRU 缓存
+
+    缓存保存在 config 目录下，按账号区分，容量超过 max_size 时淘汰最久未使用的路径。
+    任务执行期间只在内存中读写，由调用方在合适的时机调用 flush 写回磁盘。
+    """
+
+    ROOT_PATH = "/"
+    ROOT_FID = "0"
+
+    def __init__(self, file_name: str, max_size: int = 2000):
+        config_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config")
+        self._cache_file = os.path.join(config_dir, file_name)
+        self._max_size = max(1, int(max_size))
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._account = ""
+        self._loaded = False
+        self._dirty = False
+
+    @staticmethod
+    def normalize(path: str) -> str:
+        """规范化路径：以 / 开头，去掉重复和结尾的 /"""
+        path = "/" + "/".join(part for part in str(path).split("/") if part)
+        return path
+
+    @staticmethod
+    def account_key(secret: str) -> str:
+        """根据账号凭证生成缓存分区标识，避免凭证明文落盘"""
+        return hashlib.md5(secret.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        """首次使用时从磁盘加载缓存"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self._cache_file):
+            return
+        try:
+            with open(self._cache_file, "rb") as f:
+                data = json_codec.loads(f.read()) or {}
+            self._account = data.get("account", "")
+            self._entries = OrderedDict(data.get("entries", []))
+        except Exception as e:
+            logger.error(f"读取目录缓存失败: {e}")
+            self._entries = OrderedDict()
+
+    def bind_account(self, account: str):
+        """绑定当前账号，账号变化时清空缓存"""
+        self._load()
+        if self._account != account:
+            if self._entries:
+                logger.info("网盘账号已变更，清空目录缓存")
+            self._entries.clear()
+            self._account = account
+            self._dirty = True
+
+    def get(self, path: str) -> Optional[str]:
+        """获取路径对应的 fid，未命中返回 None"""
+        path = self.normalize(path)
+        if path == self.ROOT_PATH:
+            return self.ROOT_FID
+        self._load()
+        fid = self._entries.get(path)
+        if fid is not None:
+            self._entries.move_to_end(path)
+        return fid
+
+    def set(self, path: str, fid: str):
+        """写入路径对应的 fid"""
+        path = self.normalize(path)
+        if path == self.ROOT_PATH or not fid:
+            return
+        self._load()
+        if self._entries.get(path) == fid:
+            self._entries.move_to_end(path)
+            return
+        self._entries[path] = fid
+        self._entries.move_to_end(path)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    def invalidate(self, path: str):
+        """使路径及其所有子路径失效"""
+        path = self.normalize(path)
+        self._load()
+        prefix = path.rstrip("/") + "/"
+        stale = [p for p in self._entries if p == path or p.startswith(prefix)]
+        self._remove(stale)
+
+    def invalidate_fids(self, fids: Iterable[str]):
+        """使指向这些 fid 的路径及其子路径失效（用于重命名、删除）"""
+        fids = set(fids)
+        if not fids:
+            return
+        self._load()
+        for path in [p for p, fid in self._entries.items() if fid in fids]:
+            self.invalidate(path)
+
+    def _remove(self, paths: List[str]):
+        for path in paths:
+            self._entries.pop(path, None)
+        if paths:
+            self._dirty = True
+
+    def clear(self):
+        """清空缓存"""
+        self._load()
+        if self._entries:
+            self._entries.clear()
+            self._dirty = True
+
+    def flush(self):
+        """将缓存写回磁盘，没有变化时不写"""
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self._cache_file), exist_ok=True)
+            tmp_file = f"{self._cache_file}.tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(json_codec.dumps_bytes({"account": self._account, "entries": list(self._entries.items())}))
+            os.replace(tmp_file, self._cache_file)
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"保存目录缓存失败: {e}")
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._entries)
+
+
+# 夸克网盘目录缓存
+quark_fid_cache = PathFidCache("quark_fid_cache.json")
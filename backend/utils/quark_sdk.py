@@ -1,29 +1,62 @@
 import re
-import json
+import math
 import time
 import random
 import asyncio
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Union, Callable, AsyncIterator
 from loguru import logger
+from utils import json_codec
 from utils.http_client import http_client
+from utils.path_fid_cache import quark_fid_cache
+from utils.session_cache import validated_sessions
+from utils.task_tracker import TaskTracker, TaskTimeoutError
+
+class QuarkSDKError(Exception):
+    """夸克网盘接口错误"""
+    def __init__(self, message: str, code: Any = None):
+        self.message = message
+        self.code = code
+        super().__init__(message)
 
 class QuarkSDK:
     """夸克网盘 SDK"""
     
     BASE_URL = "https://drive-pc.quark.cn"
     BASE_URL_APP = "https://drive-m.quark.cn"
+    ACCOUNT_URL = "https://pan.quark.cn"
     USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36 Edg/137.0.0.0"
+    DEFAULT_PAGE_SIZE = 50  # 默认分页大小
+    MAX_PAGE_SIZE = 100  # 服务端允许的最大分页大小
+    PAGE_CONCURRENCY = 4  # 分页并发请求数
+    TASK_POLL_INTERVAL = 0.5  # 任务状态首次重试间隔（秒）
+    TASK_POLL_MAX_INTERVAL = 5  # 任务状态最大重试间隔（秒）
+    TASK_TIMEOUT = 120  # 等待任务完成的最长时间（秒）
+    AUTH_ERROR_CODES = (31001,)  # 未登录 / cookie 失效
 
-    def __init__(self, cookie: str = ""):
+    def __init__(self, cookie: str = "", page_size: int = DEFAULT_PAGE_SIZE):
         """
         初始化夸克网盘 SDK
         :param cookie: 夸克网盘 cookie
+        :param page_size: 列表分页大小，最大为 MAX_PAGE_SIZE
         """
         self.cookie = cookie.strip()
         self.is_active = False
         self.nickname = ""
         self.mparam = self._match_mparam_from_cookie(cookie)
+        # 已验证会话缓存的键，同一 cookie 的实例共用验证结果
+        self._session_key = validated_sessions.make_key("quark", self.cookie)
+        self._init_lock = asyncio.Lock()
+        self.page_size = self._clamp_page_size(page_size)
+        # 同一账号的异步任务共用一个跟踪器
+        self._task_tracker: Optional[TaskTracker] = None
+
+    def _clamp_page_size(self, page_size: Optional[int]) -> int:
+        """将分页大小限制在服务端允许的范围内"""
+        if not page_size:
+            return self.DEFAULT_PAGE_SIZE
+        return max(1, min(int(page_size), self.MAX_PAGE_SIZE))
 
     def _match_mparam_from_cookie(self, cookie: str) -> Dict[str, str]:
         """从 cookie 中提取 mparam 参数"""
@@ -100,7 +133,12 @@ class QuarkSDK:
                 **kwargs
             )
             if isinstance(response, str):
-                return json.loads(response)
+                response = json_codec.loads(response)
+            if isinstance(response, dict):
+                if response.get("status") == 401 or response.get("code") in self.AUTH_ERROR_CODES:
+                    validated_sessions.invalidate(self._session_key)
+                elif response.get("code") == 0:
+                    validated_sessions.touch(self._session_key)
             return response
         except Exception as e:
             logger.error(f"请求异常：{str(e)}")
@@ -110,75 +148,196 @@ class QuarkSDK:
                 "message": f"请求异常：{str(e)}"
             }
 
-    async def init(self) -> Union[Dict[str, Any], bool]:
-        """初始化账号信息"""
-        account_info = await self.get_account_info()
-        if account_info:
-            self.is_active = True
-            self.nickname = account_info["nickname"]
-            return account_info
-        return False
+    async def init(self, force: bool = False) -> Union[Dict[str, Any], bool]:
+        """
+        初始化账号信息
+        :param force: 忽略已验证会话缓存，重新请求账号信息
+        """
+        # 并发初始化时只请求一次账号信息，其余调用方等待后读取缓存
+        async with self._init_lock:
+            account_info = None if force else validated_sessions.get(self._session_key)
+            if not account_info:
+                account_info = await self.get_account_info()
+            if account_info:
+                validated_sessions.mark(self._session_key, account_info)
+                self.is_active = True
+                self.nickname = account_info["nickname"]
+                return account_info
+            validated_sessions.invalidate(self._session_key)
+            return False
 
     async def get_account_info(self) -> Union[Dict[str, Any], bool]:
         """获取账号信息"""
-        url = "https://pan.quark.cn/account/info"
+        url = f"{self.ACCOUNT_URL}/account/info"
         response = await self._send_request(
             "GET",
             url,
-            params={"fr": "pc", "platform": "pc"}
+            params={"fr": "pc", "platform": "pc"},
+            coalesce=True
         )
         return response.get("data", False)
 
-    async def get_file_list(self, dir_id: str = "0", **kwargs) -> Dict[str, Any]:
+    async def _iter_pages(
+        self,
+        url: str,
+        build_params: Callable[[int], Dict[str, Any]],
+        page_size: int,
+        fetch_all: bool = True
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        获取文件列表
-        :param dir_id: 文件夹 ID，默认为根目录
-        :param kwargs: 其他参数
-            - fetch_full_path: 是否获取完整路径，默认为0
-            - recursive: 是否获取所有分页数据，默认为True
-        :return: 文件列表信息
+        按页码顺序逐页产出分页响应
+        首页返回总数后，其余分页以滑动窗口方式并发预取，最多同时缓存 PAGE_CONCURRENCY 页；
+        某页请求失败时产出该页的错误响应后停止
+        :param url: 请求地址
+        :param build_params: 根据页码构建请求参数
+        :param page_size: 分页大小
+        :param fetch_all: 是否获取所有分页，否则只获取第一页
+        """
+        response = await self._send_request("GET", url, params=build_params(1))
+        yield response
+        if response.get("code") != 0:
+            return
+
+        first_page = response.get("data", {}).get("list") or []
+        total = response.get("metadata", {}).get("_total", 0)
+        if not fetch_all or not first_page or len(first_page) >= total:
+            return
+
+        # 服务端可能把分页大小限制得比请求的小，按首页实际条数计算页数
+        page_count = math.ceil(total / min(page_size, len(first_page)))
+        collected = len(first_page)
+        next_page = 2
+        pending = deque()
+        try:
+            while next_page <= page_count or pending:
+                while next_page <= page_count and len(pending) < self.PAGE_CONCURRENCY:
+                    pending.append(asyncio.create_task(
+                        self._send_request("GET", url, params=build_params(next_page))
+                    ))
+                    next_page += 1
+                page_response = await pending.popleft()
+                yield page_response
+                if page_response.get("code") != 0:
+                    return
+                page_entries = page_response.get("data", {}).get("list") or []
+                collected += len(page_entries)
+                # 预计的页数取完仍不足总数时继续往后取，直到取满或遇到空页
+                if not pending and next_page > page_count and page_entries and collected < total:
+                    page_count += 1
+        finally:
+            # 提前结束迭代时取消尚未完成的预取请求
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_pages(
+        self,
+        url: str,
+        build_params: Callable[[int], Dict[str, Any]],
+        page_size: int,
+        fetch_all: bool = True
+    ) -> Dict[str, Any]:
+        """
+        分页获取列表并按页码顺序合并
+        :return: 首页响应，其中 data.list 为合并后的完整列表；任一页失败时返回该页的错误响应
         """
+        response = None
         list_merge = []
-        page = 1
-        recursive = kwargs.pop("recursive", True)  # 默认获取所有分页数据
-        
-        while True:
-            url = f"{self.BASE_URL}/1/clouddrive/file/sort"
-            params = {
+        async for page_response in self._iter_pages(url, build_params, page_size, fetch_all):
+            if page_response.get("code") != 0:
+                return page_response
+            if response is None:
+                response = page_response
+            list_merge.extend(page_response.get("data", {}).get("list") or [])
+
+        # 更新最终响应中的文件列表
+        if response.get("data"):
+            response["data"]["list"] = list_merge
+        return response
+
+    async def _iter_entries(
+        self,
+        url: str,
+        build_params: Callable[[int], Dict[str, Any]],
+        page_size: int
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """逐页产出列表条目，请求失败时抛出 QuarkSDKError"""
+        async for page_response in self._iter_pages(url, build_params, page_size):
+            if page_response.get("code") != 0:
+                raise QuarkSDKError(page_response.get("message", "获取列表失败"), page_response.get("code"))
+            entries = page_response.get("data", {}).get("list") or []
+            if entries:
+                yield entries
+
+    def _file_list_params(self, dir_id: str, page_size: int, fetch_full_path: int = 0) -> Callable[[int], Dict[str, Any]]:
+        """构建文件列表分页参数"""
+        def build_params(page: int) -> Dict[str, Any]:
+            return {
                 "pr": "ucpro",
                 "fr": "pc",
                 "uc_param_str": "",
                 "pdir_fid": dir_id,
                 "_page": page,
-                "_size": "50",
+                "_size": str(page_size),
                 "_fetch_total": "1",
                 "_fetch_sub_dirs": "0",
                 "_sort": "file_type:asc,updated_at:desc",
-                "_fetch_full_path": kwargs.get("fetch_full_path", 0)
+                "_fetch_full_path": fetch_full_path
             }
-            
-            response = await self._send_request("GET", url, params=params)
-            if response.get("code") != 0:
-                return response
-                
-            if response.get("data", {}).get("list"):
-                list_merge.extend(response["data"]["list"])
-                if not recursive:  # 如果不获取所有分页，只获取第一页
-                    break
-                page += 1
-            else:
-                break
-                
-            # 检查是否已获取所有文件
-            total = response.get("metadata", {}).get("_total", 0)
-            if len(list_merge) >= total:
-                break
-        
-        # 更新最终响应中的文件列表
-        if response.get("data"):
-            response["data"]["list"] = list_merge
-            
-        return response
+        return build_params
+
+    def _share_file_list_params(self, share_id: str, token: str, dir_id: str, page_size: int,
+                                fetch_share: int = 0) -> Callable[[int], Dict[str, Any]]:
+        """构建分享文件列表分页参数"""
+        def build_params(page: int) -> Dict[str, Any]:
+            return {
+                "pr": "ucpro",
+                "fr": "pc",
+                "pwd_id": share_id,
+                "stoken": token,
+                "pdir_fid": dir_id,
+                "force": "0",
+                "_page": page,
+                "_size": str(page_size),
+                "_fetch_banner": "0",
+                "_fetch_share": fetch_share,
+                "_fetch_total": "1",
+                "_sort": "file_type:asc,updated_at:desc",
+                "__dt": int(random.uniform(1, 5) * 60 * 1000),
+                "__t": int(datetime.now().timestamp())
+            }
+        return build_params
+
+    async def get_file_list(self, dir_id: str = "0", **kwargs) -> Dict[str, Any]:
+        """
+        获取文件列表
+        :param dir_id: 文件夹 ID，默认为根目录
+        :param kwargs: 其他参数
+            - fetch_full_path: 是否获取完整路径，默认为0
+            - recursive: 是否获取所有分页数据，默认为True
+            - page_size: 分页大小，默认为实例的 page_size
+        :return: 文件列表信息
+        """
+        recursive = kwargs.pop("recursive", True)  # 默认获取所有分页数据
+        page_size = self._clamp_page_size(kwargs.pop("page_size", self.page_size))
+        url = f"{self.BASE_URL}/1/clouddrive/file/sort"
+        build_params = self._file_list_params(dir_id, page_size, kwargs.get("fetch_full_path", 0))
+        return await self._fetch_pages(url, build_params, page_size, fetch_all=recursive)
+
+    async def iter_file_list(self, dir_id: str = "0", page_size: Optional[int] = None,
+                             fetch_full_path: int = 0) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        逐页获取文件列表
+        :param dir_id: 文件夹 ID，默认为根目录
+        :param page_size: 分页大小，默认为实例的 page_size
+        :param fetch_full_path: 是否获取完整路径，默认为0
+        :return: 异步迭代器，每次产出一页文件条目
+        :raises: QuarkSDKError 当某页请求失败时
+        """
+        page_size = self._clamp_page_size(page_size or self.page_size)
+        url = f"{self.BASE_URL}/1/clouddrive/file/sort"
+        build_params = self._file_list_params(dir_id, page_size, fetch_full_path)
+        async for entries in self._iter_entries(url, build_params, page_size):
+            yield entries
 
     async def search_files(self, keyword: str, dir_id: str = "0") -> Dict[str, Any]:
         """
@@ -230,7 +389,11 @@ class QuarkSDK:
         url = f"{self.BASE_URL}/1/clouddrive/file/rename"
         params = {"pr": "ucpro", "fr": "pc"}
         data = {"fid": file_id, "file_name": new_name}
-        return await self._send_request("POST", url, params=params, json=data)
+        response = await self._send_request("POST", url, params=params, json=data)
+        if response.get("code") == 0:
+            # 路径已变化，清除目录缓存
+            quark_fid_cache.invalidate_fids([file_id])
+        return response
 
     async def delete_files(self, file_ids: List[str]) -> Dict[str, Any]:
         """
@@ -244,7 +407,10 @@ class QuarkSDK:
             "filelist": file_ids,
             "exclude_fids": []
         }
-        return await self._send_request("POST", url, params=params, json=data)
+        response = await self._send_request("POST", url, params=params, json=data)
+        if response.get("code") == 0:
+            quark_fid_cache.invalidate_fids(file_ids)
+        return response
 
     async def get_share_info(self, share_id: str, password: str = "") -> Dict[str, Any]:
         """
@@ -257,57 +423,38 @@ class QuarkSDK:
         data = {"pwd_id": share_id, "passcode": password}
         return await self._send_request("POST", url, params=params, json=data)
 
-    async def get_share_file_list(self, share_id: str, token: str, dir_id: str = "0", fetch_share: int = 0) -> Dict[str, Any]:
+    async def get_share_file_list(self, share_id: str, token: str, dir_id: str = "0", fetch_share: int = 0,
+                                  page_size: Optional[int] = None) -> Dict[str, Any]:
         """
         获取分享文件列表
         :param share_id: 分享 ID
         :param token: 分享 token
         :param dir_id: 文件夹 ID
         :param fetch_share: 是否获取分享信息，默认为0
+        :param page_size: 分页大小，默认为实例的 page_size
         :return: 分享文件列表信息
         """
-        list_merge = []
-        page = 1
-        
-        while True:
-            url = f"{self.BASE_URL}/1/clouddrive/share/sharepage/detail"
-            params = {
-                "pr": "ucpro",
-                "fr": "pc",
-                "pwd_id": share_id,
-                "stoken": token,
-                "pdir_fid": dir_id,
-                "force": "0",
-                "_page": page,
-                "_size": "50",
-                "_fetch_banner": "0",
-                "_fetch_share": fetch_share,
-                "_fetch_total": "1",
-                "_sort": "file_type:asc,updated_at:desc",
-                "__dt": int(random.uniform(1, 5) * 60 * 1000),
-                "__t": int(datetime.now().timestamp())
-            }
-            
-            response = await self._send_request("GET", url, params=params)
-            if response.get("code") != 0:
-                return response
-                
-            if response.get("data", {}).get("list"):
-                list_merge.extend(response["data"]["list"])
-                page += 1
-            else:
-                break
-                
-            # 检查是否已获取所有文件
-            total = response.get("metadata", {}).get("_total", 0)
-            if len(list_merge) >= total:
-                break
-        
-        # 更新最终响应中的文件列表
-        if response.get("data"):
-            response["data"]["list"] = list_merge
-            
-        return response
+        page_size = self._clamp_page_size(page_size or self.page_size)
+        url = f"{self.BASE_URL}/1/clouddrive/share/sharepage/detail"
+        build_params = self._share_file_list_params(share_id, token, dir_id, page_size, fetch_share)
+        return await self._fetch_pages(url, build_params, page_size)
+
+    async def iter_share_file_list(self, share_id: str, token: str, dir_id: str = "0",
+                                   page_size: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        逐页获取分享文件列表
+        :param share_id: 分享 ID
+        :param token: 分享 token
+        :param dir_id: 文件夹 ID
+        :param page_size: 分页大小，默认为实例的 page_size
+        :return: 异步迭代器，每次产出一页分享文件条目
+        :raises: QuarkSDKError 当某页请求失败时
+        """
+        page_size = self._clamp_page_size(page_size or self.page_size)
+        url = f"{self.BASE_URL}/1/clouddrive/share/sharepage/detail"
+        build_params = self._share_file_list_params(share_id, token, dir_id, page_size)
+        async for entries in self._iter_entries(url, build_params, page_size):
+            yield entries
 
     async def save_share_files(self, share_id: str, token: str, file_ids: List[str],
                         file_tokens: List[str], target_dir_id: str = "0", pdir_fid: str = "0") -> Dict[str, Any]:
@@ -340,33 +487,51 @@ class QuarkSDK:
         }
         return await self._send_request("POST", url, params=params, json=data)
 
-    async def get_task_status(self, task_id: str) -> Dict[str, Any]:
+    async def _check_task_status(self, task_id: str, retry_index: int):
         """
-        获取任务状态
+        查询一次任务状态，status 为 0 表示任务仍在执行
+        查询本身失败（限流、网络错误等 code 不为 0）时不代表任务结束，继续轮询直到超时
+        """
+        url = f"{self.BASE_URL}/1/clouddrive/task"
+        params = {
+            "pr": "ucpro",
+            "fr": "pc",
+            "uc_param_str": "",
+            "task_id": task_id,
+            "retry_index": retry_index,
+            "__dt": int(random.uniform(1, 5) * 60 * 1000),
+            "__t": int(datetime.now().timestamp())
+        }
+        response = await self._send_request("GET", url, params=params)
+        if response.get("code") != 0:
+            logger.warning(f"查询任务 {task_id} 状态失败: {response.get('message')}")
+            return False, response
+        return response.get("data", {}).get("status") != 0, response
+
+    async def get_task_status(self, task_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        获取任务状态，等待任务执行结束
         :param task_id: 任务 ID
+        :param timeout: 等待超时时间（秒），默认使用 TASK_TIMEOUT
         """
-        retry_index = 0
-        while True:
-            url = f"{self.BASE_URL}/1/clouddrive/task"
-            params = {
-                "pr": "ucpro",
-                "fr": "pc",
-                "uc_param_str": "",
-                "task_id": task_id,
-                "retry_index": retry_index,
-                "__dt": int(random.uniform(1, 5) * 60 * 1000),
-                "__t": int(datetime.now().timestamp())
+        if self._task_tracker is None:
+            self._task_tracker = TaskTracker(
+                self._check_task_status,
+                name="夸克网盘",
+                initial_interval=self.TASK_POLL_INTERVAL,
+                max_interval=self.TASK_POLL_MAX_INTERVAL,
+                timeout=self.TASK_TIMEOUT,
+            )
+        try:
+            return await self._task_tracker.wait(task_id, timeout)
+        except TaskTimeoutError as e:
+            logger.error(str(e))
+            return {
+                "status": 408,
+                "code": 1,
+                "message": str(e),
+                "data": (e.last_result or {}).get("data", {})
             }
-            response = await self._send_request("GET", url, params=params)
-            
-            if response.get("data", {}).get("status") != 0:
-                break
-            else:
-                if retry_index == 0:
-                    logger.info(f"正在等待[{response['data']['task_title']}]执行结果", end="", flush=True)
-                retry_index += 1
-                await asyncio.sleep(0.5)
-        return response
 
     async def get_fids(self, file_paths: List[str]) -> List[Dict[str, Any]]:
         """
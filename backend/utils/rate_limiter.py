@@ -0,0 +1,73 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """令牌桶限流器
+
+    以 rate 个/秒的速度补充令牌，最多积攒 capacity 个，允许短时突发。
+    等待令牌的协程按先来后到的顺序获取。
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        :param rate: 每秒补充的令牌数
+        :param capacity: 桶容量，默认与 rate 相同
+        """
+        self.rate = max(float(rate), 0.001)
+        self.capacity = max(float(capacity if capacity is not None else rate), 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def update(self, rate: float, capacity: Optional[float] = None):
+        """调整限流速率"""
+        self._refill()
+        self.rate = max(float(rate), 0.001)
+        self.capacity = max(float(capacity if capacity is not None else rate), 1.0)
+        self._tokens = min(self._tokens, self.capacity)
+
+    async def acquire(self, tokens: float = 1.0):
+        """获取令牌，令牌不足时等待"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+    def drain(self):
+        """清空令牌，用于被服务端限流后让所有调用方一起放慢"""
+        self._refill()
+        self._tokens = 0.0
+
+    @property
+    def tokens(self) -> float:
+        """当前可用令牌数"""
+        self._refill()
+        return self._tokens
+
+
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def get_token_bucket(key: str, rate: float, capacity: Optional[float] = None) -> TokenBucket:
+    """
+    获取共享的令牌桶，同一 key 的调用方共用一个桶
+    :param key: 限流维度，例如 账号 + 操作类型
+    :param rate: 每秒补充的令牌数
+    :param capacity: 桶容量
+    """
+    bucket = _buckets.get(key)
+    if bucket is None:
+        bucket = _buckets[key] = TokenBucket(rate, capacity)
+    elif bucket.rate != rate or (capacity is not None and bucket.capacity != capacity):
+        bucket.update(rate, capacity)
+    return bucket
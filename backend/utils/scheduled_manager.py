@@ -1,7 +1,7 @@
 import os
 import yaml
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable
 from loguru import logger
 from datetime import datetime
 import croniter
@@ -9,6 +9,7 @@ import croniter
 class ScheduledManager:
     _instance = None
     _config: Dict[str, Any] = {}
+    _listeners: List[Callable[[str], None]] = []  # 任务变更监听器
     _default_config = {
         "magic_regex": {
             "$TV": {
@@ -98,6 +99,24 @@ class ScheduledManager:
         """获取配置"""
         return self._config
 
+    def add_listener(self, listener: Callable[[str], None]):
+        """注册任务变更监听器，任务新增、更新、删除时以任务名称回调"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str], None]):
+        """移除任务变更监听器"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify_task_changed(self, name: str):
+        """通知监听器任务已变更"""
+        for listener in self._listeners:
+            try:
+                listener(name)
+            except Exception as e:
+                logger.error(f"任务变更通知失败: {e}")
+
     def get_tasks(self) -> List[Dict[str, Any]]:
         """获取所有任务"""
         return self._config.get("tasks", [])
@@ -146,6 +165,7 @@ class ScheduledManager:
                 self._config["tasks"] = []
             self._config["tasks"].append(task)
             self._save_config()
+            self._notify_task_changed(task["name"])
             return True
         except Exception as e:
             logger.error(f"添加任务失败: {e}")
@@ -168,6 +188,9 @@ class ScheduledManager:
                     # 更新任务
                     tasks[i].update(task)
                     self._save_config()
+                    self._notify_task_changed(name)
+                    if tasks[i].get("name") != name:
+                        self._notify_task_changed(tasks[i]["name"])
                     return True
             logger.error(f"任务不存在: {name}")
             return False
@@ -183,6 +206,7 @@ class ScheduledManager:
                 if task.get("name") == name:
                     tasks.pop(i)
                     self._save_config()
+                    self._notify_task_changed(name)
                     return True
             logger.error(f"任务不存在: {name}")
             return False
@@ -198,14 +222,18 @@ class ScheduledManager:
         """禁用任务"""
         return self.update_task(name, {"enabled": False})
 
-    def get_next_run_time(self, task: Dict[str, Any]) -> Optional[datetime]:
-        """获取任务下次运行时间"""
+    def get_next_run_time(self, task: Dict[str, Any], base_time: Optional[datetime] = None) -> Optional[datetime]:
+        """
+        获取任务下次运行时间
+        :param task: 任务信息
+        :param base_time: 计算起点，默认为当前时间
+        """
         try:
             cron = task.get("cron")
             if not cron:
                 return None
             
-            cron_iter = croniter.croniter(cron, datetime.now())
+            cron_iter = croniter.croniter(cron, base_time or datetime.now())
             return cron_iter.get_next(datetime)
         except Exception as e:
             logger.error(f"获取下次运行时间失败: {e}")
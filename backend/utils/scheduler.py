@@ -1,10 +1,12 @@
 import asyncio
+import heapq
 from datetime import datetime
-from typing import Dict, Any, Callable, Optional, List
+from typing import Dict, Any, Callable, Optional, List, Tuple
 from loguru import logger
 import re
 from task import cloud189_auto_save, quark_auto_save
 from utils.emby_manager import emby_manager
+from utils.config_manager import config_manager
 from utils.notify_manager import notify_manager
 from utils.scheduled_manager import scheduled_manager
 
@@ -23,6 +25,15 @@ class TaskScheduler:
     _last_run_times: Dict[str, datetime] = {}  # 记录每个任务的上次执行时间
     _running_tasks: Dict[str, asyncio.Task] = {}  # 记录正在运行的任务
     _task_results: Dict[str, TaskResult] = {}  # 记录任务执行结果
+    _worker_semaphore: Optional[asyncio.Semaphore] = None  # 全局并发限制
+    _type_semaphores: Dict[str, asyncio.Semaphore] = {}  # 各任务类型的并发限制
+    _batch_tasks: set = set()  # 正在执行的任务批次
+    _timer_heap: List[Tuple[datetime, str]] = []  # 按下次执行时间排序的小顶堆
+    _next_runs: Dict[str, datetime] = {}  # 每个任务当前有效的下次执行时间
+    _dirty_tasks: set = set()  # 配置变更待重新计算的任务
+    _wakeup_event: Optional[asyncio.Event] = None  # 调度循环唤醒事件
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _max_sleep_seconds = 3600  # 最长休眠时间，防止系统时间调整导致漏执行
 
     def __new__(cls):
         if cls._instance is None:
@@ -39,6 +50,30 @@ class TaskScheduler:
         self.register_task_handler("cloud189_auto_save", cloud189_auto_save.Cloud189AutoSave().cloud189_auto_save)
         logger.info("系统任务注册完成")
 
+    def _init_worker_pool(self):
+        """根据系统配置初始化任务执行池"""
+        scheduler_config = config_manager.get_config().get("scheduler", {})
+        max_workers = max(1, int(scheduler_config.get("max_workers", 5)))
+        self._worker_semaphore = asyncio.Semaphore(max_workers)
+        self._type_semaphores = {
+            task_type: asyncio.Semaphore(max(1, int(limit)))
+            for task_type, limit in scheduler_config.get("task_type_limits", {}).items()
+        }
+        logger.info(f"任务执行池初始化完成: 全局并发 {max_workers}, 类型并发 {scheduler_config.get('task_type_limits', {})}")
+
+    async def _run_in_pool(self, task_type: str, handler: Callable, task: Dict[str, Any]):
+        """在执行池中运行任务处理器，受全局及任务类型并发数限制"""
+        if self._worker_semaphore is None:
+            self._init_worker_pool()
+        type_semaphore = self._type_semaphores.get(task_type)
+        if type_semaphore is None:
+            async with self._worker_semaphore:
+                return await handler(task)
+        # 先拿类型名额再拿全局名额，排队等类型名额的任务不占用全局名额，其他类型的任务不会被饿死
+        async with type_semaphore:
+            async with self._worker_semaphore:
+                return await handler(task)
+
     def _record_task_result(self, task_name: str, success: bool, message: str, is_manual: bool):
         """记录任务执行结果"""
         self._task_results[task_name] = TaskResult(
@@ -95,19 +130,13 @@ class TaskScheduler:
             execution_type = "手动" if is_manual else "自动"
             logger.info(f"开始{execution_type}执行任务: {task_name}")
             
-            # 创建任务并保存引用
-            task_coroutine = handler(task)
-            task_obj = asyncio.create_task(task_coroutine)
+            # 创建任务并保存引用，排队等待执行池空位期间同样视为运行中
+            task_obj = asyncio.create_task(self._run_in_pool(task_type, handler, task))
             self._running_tasks[task_name] = task_obj
             
             # 等待任务完成并获取结果
             task_result = await task_obj
             
-            # 更新上次执行时间（仅对自动执行有效）
-            if not is_manual:
-                self._last_run_times[task_name] = datetime.now()
-                
-            
             # 处理任务返回的结果
             if isinstance(task_result, dict):
                 # 如果任务返回了结果，记录到任务结果中
@@ -130,67 +159,150 @@ class TaskScheduler:
             self._record_task_result(task_name, False, error_message, is_manual)
         finally:
             # 清理任务引用
-            if task_name in self._running_tasks:
+            if task_name in self._running_tasks and self._running_tasks[task_name].done():
                 del self._running_tasks[task_name]
 
+    async def _execute_batch(self, tasks: List[Dict[str, Any]]):
+        """并发执行同一轮到期的任务，全部结束后统一通知并刷新 Emby"""
+        results = await asyncio.gather(
+            *(self._execute_task(task) for task in tasks),
+            return_exceptions=True
+        )
+        task_run_result = [result for result in results if isinstance(result, dict)]
+        logger.info(f"任务执行结果: {task_run_result}")
+        if task_run_result:
+            await self.task_done_notify_refresh_emby(task_run_result)
+
+    def _dispatch_batch(self, tasks: List[Dict[str, Any]]):
+        """将到期任务投递到执行池，不阻塞检查循环"""
+        batch = asyncio.create_task(self._execute_batch(tasks))
+        self._batch_tasks.add(batch)
+        batch.add_done_callback(self._batch_tasks.discard)
+
+    def _on_task_changed(self, task_name: str):
+        """任务配置变更回调，标记任务并唤醒调度循环"""
+        self._dirty_tasks.add(task_name)
+        self._wakeup()
+
+    def _wakeup(self):
+        """唤醒调度循环"""
+        if self._wakeup_event is None or self._loop is None:
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._wakeup_event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup_event.set)
+
+    def _schedule_task(self, task: Dict[str, Any], base_time: Optional[datetime] = None):
+        """
+        计算任务下次执行时间并压入定时堆
+        :param base_time: 计算起点，默认为当前时间；任务到期时传入本次调度时间，不受循环处理耗时影响
+        """
+        task_name = task.get("name")
+        if not task_name:
+            return
+        if not task.get("enabled", False):
+            # 禁用的任务移出定时堆，重新启用后立即执行一次
+            self._next_runs.pop(task_name, None)
+            self._last_run_times.pop(task_name, None)
+            return
+
+        # 从未调度过的任务立即执行一次
+        if task_name not in self._last_run_times:
+            next_run = datetime.now()
+        else:
+            next_run = scheduled_manager.get_next_run_time(task, base_time)
+        if not next_run:
+            self._next_runs.pop(task_name, None)
+            return
+        self._next_runs[task_name] = next_run
+        heapq.heappush(self._timer_heap, (next_run, task_name))
+
+    def _rebuild_timer_heap(self):
+        """根据当前有效的执行时间重建定时堆，清除过期条目"""
+        self._timer_heap = [(next_run, task_name) for task_name, next_run in self._next_runs.items()]
+        heapq.heapify(self._timer_heap)
+
+    def _apply_task_changes(self):
+        """处理变更过的任务，重新计算其下次执行时间"""
+        while self._dirty_tasks:
+            task_name = self._dirty_tasks.pop()
+            task = scheduled_manager.get_task_by_name(task_name)
+            if task:
+                self._schedule_task(task)
+            else:
+                # 任务已删除，清理执行记录
+                self._next_runs.pop(task_name, None)
+                self._last_run_times.pop(task_name, None)
+
+        # 堆中过期条目过多时重建
+        if len(self._timer_heap) > 2 * len(self._next_runs) + 16:
+            self._rebuild_timer_heap()
+
+    def _pop_due_tasks(self, current_time: datetime) -> List[Dict[str, Any]]:
+        """弹出所有已到期的任务，并为其安排下一次执行时间"""
+        due_tasks = []
+        while self._timer_heap and self._timer_heap[0][0] <= current_time:
+            next_run, task_name = heapq.heappop(self._timer_heap)
+            # 跳过已被更新或移除的过期条目
+            if self._next_runs.get(task_name) != next_run:
+                continue
+            task = scheduled_manager.get_task_by_name(task_name)
+            if not task or not task.get("enabled", False):
+                self._next_runs.pop(task_name, None)
+                continue
+
+            # 记录本次调度时间，避免任务排队期间被重复调度
+            self._last_run_times[task_name] = current_time
+            due_tasks.append(task)
+            self._schedule_task(task, current_time)
+        return due_tasks
+
+    async def _wait_for_next_deadline(self):
+        """休眠至最早的执行时间，任务变更或调度器停止时提前唤醒"""
+        timeout = self._max_sleep_seconds
+        if self._timer_heap:
+            delay = (self._timer_heap[0][0] - datetime.now()).total_seconds()
+            timeout = min(max(delay, 0), self._max_sleep_seconds)
+        try:
+            await asyncio.wait_for(self._wakeup_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup_event.clear()
+
     async def _check_and_execute_tasks(self):
-        """检查并执行到期的任务"""
-        # 缓存每个任务的next_run时间，避免每次都重新计算
-        task_next_runs = {}
-        
-        while self._running:
-            try:
-                # 获取所有启用的任务
-                enabled_tasks = scheduled_manager.get_enabled_tasks()
-                current_time = datetime.now()
-                task_run_result = []
-
-                for task in enabled_tasks:
-                    task_name = task.get("name")
-                    if not task_name:
-                        continue
-
-                    # 获取或缓存任务的下次执行时间
-                    if task_name not in task_next_runs:
-                        next_run = scheduled_manager.get_next_run_time(task)
-                        if next_run:
-                            task_next_runs[task_name] = next_run
-                        else:
-                            continue
-                    else:
-                        next_run = task_next_runs[task_name]
-
-                    # 检查是否需要执行
-                    last_run = self._last_run_times.get(task_name)
-                    # logger.info(f"last_run: {last_run}, next_run: {next_run}, current_time: {current_time} flag:{(next_run <= current_time and last_run < next_run)}")
-                    if not last_run or (next_run <= current_time and last_run < next_run):
-                        # 执行任务并获取结果
-                        result = await self._execute_task(task)
-                        if result:
-                            task_run_result.append(result)
-                        
-                        # 任务执行后，重新计算下次运行时间
-                        new_next_run = scheduled_manager.get_next_run_time(task)
-                        if new_next_run:
-                            task_next_runs[task_name] = new_next_run
-
-                # 打印任务执行结果
-                logger.info(f"任务执行结果: {task_run_result} {task_next_runs}")
-                if task_run_result:
-                    await self.task_done_notify_refresh_emby(task_run_result)
-                # 清理已删除任务的执行记录
-                task_names = {task.get("name") for task in enabled_tasks}
-                removed_tasks = set(self._last_run_times.keys()) - task_names
-                for task_name in removed_tasks:
-                    self._last_run_times.pop(task_name, None)
-                    task_next_runs.pop(task_name, None)  # 同时清理缓存
-
-                # 每分钟检查一次
-                await asyncio.sleep(60)
-
-            except Exception as e:
-                logger.error(f"任务检查失败: {str(e)}")
-                await asyncio.sleep(60)  # 发生错误时等待一分钟后继续
+        """按定时堆调度到期的任务"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup_event = asyncio.Event()
+        self._timer_heap = []
+        self._next_runs = {}
+        self._dirty_tasks = set()
+        for task in scheduled_manager.get_enabled_tasks():
+            self._schedule_task(task)
+        scheduled_manager.add_listener(self._on_task_changed)
+
+        try:
+            while self._running:
+                try:
+                    self._apply_task_changes()
+
+                    # 投递到期任务到执行池
+                    due_tasks = self._pop_due_tasks(datetime.now())
+                    if due_tasks:
+                        logger.info(f"投递到期任务: {[task.get('name') for task in due_tasks]}")
+                        self._dispatch_batch(due_tasks)
+
+                    await self._wait_for_next_deadline()
+
+                except Exception as e:
+                    logger.error(f"任务检查失败: {str(e)}")
+                    await asyncio.sleep(1)
+        finally:
+            scheduled_manager.remove_listener(self._on_task_changed)
 
     async def start(self):
         """启动调度器"""
@@ -199,6 +311,7 @@ class TaskScheduler:
 
         # 注册系统任务
         self.register_system_tasks()
+        self._init_worker_pool()
         
         self._running = True
         logger.info("定时任务调度器已启动")
@@ -207,6 +320,7 @@ class TaskScheduler:
     async def stop(self):
         """停止调度器"""
         self._running = False
+        self._wakeup()
         
         # 取消所有正在运行的任务
         for task_name, task in self._running_tasks.items():
@@ -217,6 +331,8 @@ class TaskScheduler:
         # 等待所有任务完成
         if self._running_tasks:
             await asyncio.gather(*self._running_tasks.values(), return_exceptions=True)
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
         
         logger.info("定时任务调度器已停止")
 
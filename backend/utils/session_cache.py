@@ -0,0 +1,60 @@
+import hashlib
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class ValidatedSessionCache:
+    """已验证会话缓存
+
+    记录最近一次确认可用的会话（夸克 cookie、天翼云盘 access_token 等）及验证时带回的账号信息。
+    在有效期内再次登录/初始化时直接复用，省去账号信息请求；
+    请求成功会刷新验证时间，遇到会话失效时由调用方移除。
+    """
+
+    DEFAULT_TTL = 10 * 60
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        """
+        :param ttl: 验证结果的有效期（秒）
+        """
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+
+    @staticmethod
+    def make_key(scope: str, secret: str) -> str:
+        """按网盘类型和会话凭据生成缓存键，不保存凭据原文"""
+        return f"{scope}:{hashlib.md5(secret.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        获取有效期内的验证结果
+        :return: 验证时保存的账号信息，未验证或已过期返回 None
+        """
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        validated_at, info = entry
+        if time.monotonic() - validated_at > self.ttl:
+            self._entries.pop(key, None)
+            return None
+        return info
+
+    def mark(self, key: str, info: Any = True):
+        """记录会话已验证可用"""
+        self._entries[key] = (time.monotonic(), info)
+
+    def touch(self, key: str):
+        """会话刚被成功使用，刷新验证时间"""
+        entry = self._entries.get(key)
+        if entry:
+            self._entries[key] = (time.monotonic(), entry[1])
+
+    def invalidate(self, key: str):
+        """会话已失效"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+validated_sessions = ValidatedSessionCache()
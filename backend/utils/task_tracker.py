@@ -0,0 +1,188 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+# 查询任务状态的回调：(任务ID, 第几次查询) -> (是否结束, 查询结果)
+StatusChecker = Callable[[str, int], Awaitable[Tuple[bool, Any]]]
+
+
+class TaskTimeoutError(asyncio.TimeoutError):
+    """等待异步任务完成超时"""
+    def __init__(self, task_id: str, last_result: Any = None):
+        self.task_id = task_id
+        self.last_result = last_result
+        super().__init__(f"等待任务 {task_id} 完成超时")
+
+
+class _TrackedTask:
+    """正在跟踪的任务"""
+    __slots__ = ("task_id", "futures", "attempt", "interval", "next_poll", "deadline", "last_result")
+
+    def __init__(self, task_id: str, interval: float, now: float, deadline: float):
+        self.task_id = task_id
+        self.futures: List[asyncio.Future] = []
+        self.attempt = 0
+        self.interval = interval
+        self.next_poll = now
+        self.deadline = deadline
+        self.last_result: Any = None
+
+
+class TaskTracker:
+    """异步任务完成跟踪器
+
+    网盘的转存、删除等操作是异步任务，需要轮询任务状态。跟踪器用一个轮询协程
+    统一处理所有未完成的任务：每个任务按指数退避加随机抖动安排下次查询，超过
+    截止时间则以 TaskTimeoutError 结束；每个等待方拿到自己的 future，取消等待
+    不会影响同一任务的其他等待方。
+    """
+
+    def __init__(
+        self,
+        check: StatusChecker,
+        name: str = "task",
+        initial_interval: float = 0.5,
+        max_interval: float = 5.0,
+        backoff: float = 2.0,
+        jitter: float = 0.2,
+        timeout: float = 60.0,
+    ):
+        """
+        :param check: 查询任务状态的回调
+        :param name: 跟踪器名称，用于日志
+        :param initial_interval: 首次重试间隔（秒）
+        :param max_interval: 最大重试间隔（秒）
+        :param backoff: 退避倍数
+        :param jitter: 抖动比例，实际间隔在 interval * (1 ± jitter) 之间
+        :param timeout: 默认等待超时时间（秒）
+        """
+        self._check = check
+        self._name = name
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.timeout = timeout
+        self._tasks: Dict[str, _TrackedTask] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    async def wait(self, task_id: str, timeout: Optional[float] = None) -> Any:
+        """
+        等待任务结束
+        :param task_id: 任务ID
+        :param timeout: 超时时间（秒），默认使用跟踪器的 timeout
+        :return: 任务结束时的查询结果
+        :raises TaskTimeoutError: 超时仍未结束
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        deadline = now + (self.timeout if timeout is None else timeout)
+        tracked = self._tasks.get(task_id)
+        if tracked is None:
+            tracked = _TrackedTask(task_id, self.initial_interval, now, deadline)
+            self._tasks[task_id] = tracked
+            self._wakeup.set()
+        else:
+            # 同一任务的多个等待方共用一次轮询，截止时间取最晚的
+            tracked.deadline = max(tracked.deadline, deadline)
+        future = loop.create_future()
+        tracked.futures.append(future)
+        self._ensure_poller(loop)
+        try:
+            return await future
+        finally:
+            if future in tracked.futures:
+                tracked.futures.remove(future)
+            # 没有等待方的任务不再轮询
+            if not tracked.futures and self._tasks.get(task_id) is tracked:
+                del self._tasks[task_id]
+
+    def reset_backoff(self, task_id: str):
+        """
+        任务状态发生推进（例如处理完冲突）后恢复初始重试间隔，
+        可在查询回调中调用，本次查询后的下一次间隔即按初始值计算
+        """
+        tracked = self._tasks.get(task_id)
+        if tracked is not None:
+            tracked.interval = self.initial_interval
+
+    def fail(self, task_id: str, error: BaseException):
+        """
+        任务无法继续（例如冲突处理失败），以 error 结束所有等待方，不再轮询；
+        可在查询回调中调用
+        """
+        tracked = self._tasks.get(task_id)
+        if tracked is not None:
+            self._finish(tracked, error=error)
+
+    @property
+    def pending(self) -> int:
+        """正在跟踪的任务数"""
+        return len(self._tasks)
+
+    def _ensure_poller(self, loop: asyncio.AbstractEventLoop):
+        if self._poller is None or self._poller.done() or self._poller.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._poller = loop.create_task(self._poll_loop())
+
+    def _next_interval(self, interval: float) -> float:
+        return min(interval * self.backoff, self.max_interval)
+
+    def _with_jitter(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _poll_loop(self):
+        loop = asyncio.get_running_loop()
+        while self._tasks:
+            now = loop.time()
+            due = [t for t in self._tasks.values() if t.next_poll <= now]
+            if due:
+                await asyncio.gather(*(self._poll_one(t) for t in due))
+                continue
+            next_poll = min(t.next_poll for t in self._tasks.values())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, next_poll - now))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll_one(self, tracked: _TrackedTask):
+        loop = asyncio.get_running_loop()
+        try:
+            done, result = await self._check(tracked.task_id, tracked.attempt)
+            error = None
+        except Exception as e:
+            done, result, error = False, None, e
+            logger.warning(f"[{self._name}] 查询任务 {tracked.task_id} 状态失败: {e}")
+
+        if self._tasks.get(tracked.task_id) is not tracked:
+            # 查询回调中已调用 fail 结束了任务
+            return
+        if done:
+            self._finish(tracked, result=result)
+            return
+        if result is not None:
+            tracked.last_result = result
+        tracked.attempt += 1
+        now = loop.time()
+        if now >= tracked.deadline:
+            self._finish(tracked, error=TaskTimeoutError(tracked.task_id, tracked.last_result))
+            return
+        if tracked.attempt == 1 and error is None:
+            logger.info(f"[{self._name}] 正在等待任务 {tracked.task_id} 执行结果")
+        delay = self._with_jitter(tracked.interval)
+        tracked.interval = self._next_interval(tracked.interval)
+        tracked.next_poll = min(now + delay, tracked.deadline)
+
+    def _finish(self, tracked: _TrackedTask, result: Any = None, error: Optional[BaseException] = None):
+        if self._tasks.get(tracked.task_id) is tracked:
+            del self._tasks[tracked.task_id]
+        for future in tracked.futures:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
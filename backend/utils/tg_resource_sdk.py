@@ -79,7 +79,7 @@ class TGResourceSDK:
             config = self._get_config()
             
             try:
-                html = await http_client.get(f"{config['telegram']['baseUrl']}{url}")
+                html = await http_client.get(f"{config['telegram']['baseUrl']}{url}", coalesce=True)
             except Exception as e:
                 logger.error(f"请求失败: {url}", exc_info=e)
                 raise